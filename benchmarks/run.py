@@ -0,0 +1,267 @@
+""" Benchmarks of the client against the local stand-in server.
+
+    python -m benchmarks.run                          # run all benchmarks and print the results
+    python -m benchmarks.run --save                   # also store the results as the new baseline
+    python -m benchmarks.run --compare                # fail when a result regressed against the baseline
+    python -m benchmarks.run shipment_create labels   # run only some benchmarks
+
+Every benchmark reports its throughput (ops/s) and p50/p99 latency (ms) in a machine-readable JSON file.
+Benchmarks with a budget (see BUDGETS) fail the run when their p50 latency is above it, with or without --compare.
+"""
+from typing import Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from dhlparcel.api import DHLParcel_API
+from dhlparcel.token_store import MemoryTokenStore
+from dhlparcel.transports import RequestsTransport, HTTP2Transport
+from dhlparcel.capability_table import CapabilityTable
+from dhlparcel.models.base import ObjectListModel
+from dhlparcel.models.lazy import LazyObjectListModel
+
+from .server import StandInServer, _parcelshop
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARKS = {}
+TRANSPORTS = { 'http1' : RequestsTransport, 'http2' : HTTP2Transport }
+TRANSPORT = 'http1'
+THREADS = 64
+
+# Maximum p50 latency in ms per benchmark, regardless of the baseline
+BUDGETS = { 'import_time' : 30 }
+
+# A cold invocation that only uses labels: import the client, build it and access one endpoint
+IMPORT_SCRIPT = 'import time; start = time.perf_counter(); from dhlparcel.api import DHLParcel_API; DHLParcel_API("benchmark", "key", "01234567").labels; print(time.perf_counter() - start)'
+
+def benchmark(name: str) -> Callable:
+    """ Registers a benchmark. A benchmark gets the server and the number of operations, and returns a list of latencies in seconds. """
+    
+    def register(func: Callable) -> Callable:
+        BENCHMARKS[name] = func
+        return func
+    
+    return register
+
+def make_client(server: StandInServer, **kwargs) -> DHLParcel_API:
+    return DHLParcel_API('benchmark', 'key', '01234567', base_url=server.url, token_store=MemoryTokenStore(), transport=TRANSPORTS[TRANSPORT](), **kwargs)
+
+def timed(func: Callable, operations: int) -> List[float]:
+    latencies = []
+    
+    for _ in range(operations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    
+    return latencies
+
+def shipment(number: int) -> dict:
+    address = { 'countryCode' : 'NL', 'postalCode' : '3542AD', 'city' : 'Utrecht', 'street' : 'Reactorweg', 'number' : '25', 'isBusiness' : False }
+    
+    return {
+        'shipmentId' : str(uuid.uuid4()),
+        'orderReference' : f'order-{number}',
+        'receiver' : { 'name' : { 'firstName' : 'John', 'lastName' : 'Doe' }, 'address' : address, 'email' : 'mrparcel@dhlparcel.nl' },
+        'shipper' : { 'name' : { 'companyName' : 'ACME Corp.' }, 'address' : dict(address, isBusiness=True) },
+        'options' : [{ 'key' : 'DOOR' }],
+        'pieces' : [{ 'parcelType' : 'SMALL', 'quantity' : 1, 'weight' : 1 }]
+    }
+
+@benchmark('shipment_create')
+def bench_shipment_create(server: StandInServer, operations: int) -> List[float]:
+    with make_client(server) as api:
+        return [item.elapsed for item in api.shipments.create_many((shipment(number) for number in range(operations)), max_in_flight=8)]
+
+@benchmark('shipment_create_serial')
+def bench_shipment_create_serial(server: StandInServer, operations: int) -> List[float]:
+    with make_client(server) as api:
+        api.products.list() # authenticate outside of the measurement
+        return timed(lambda: api.shipments.create(**shipment(0)), operations)
+
+@benchmark('label_download')
+def bench_label_download(server: StandInServer, operations: int) -> List[float]:
+    with make_client(server) as api:
+        api.products.list()
+        return timed(lambda: api.labels.get('c2a3c4d4-0000-4000-8000-000000000000'), operations)
+
+@benchmark('label_download_stream')
+def bench_label_download_stream(server: StandInServer, operations: int) -> List[float]:
+    with make_client(server) as api, tempfile.TemporaryDirectory() as directory:
+        api.products.list()
+        return timed(lambda: api.labels.download('c2a3c4d4-0000-4000-8000-000000000000', os.path.join(directory, 'label.pdf')), operations)
+
+@benchmark('parcelshop_lookup')
+def bench_parcelshop_lookup(server: StandInServer, operations: int) -> List[float]:
+    with make_client(server) as api:
+        api.products.list()
+        return timed(lambda: api.parcelshops.list('NL', postalCode='3542AD'), operations)
+
+@benchmark('capabilities')
+def bench_capabilities(server: StandInServer, operations: int) -> List[float]:
+    with make_client(server) as api:
+        api.products.list()
+        return timed(lambda: api.capabilities.get('business', 'NL', 'NL', False), operations)
+
+@benchmark('capabilities_local')
+def bench_capabilities_local(server: StandInServer, operations: int) -> List[float]:
+    with make_client(server) as api:
+        table = CapabilityTable(api)
+        table.sweep(['business'], ['NL'], ['NL', 'BE', 'DE'])
+        return timed(lambda: table.best('business', 'NL', 'DE', False, weight=5), operations)
+
+@benchmark('shared_client_threads')
+def bench_shared_client_threads(server: StandInServer, operations: int) -> List[float]:
+    # one client and its connection pool, shared by THREADS worker threads; every lookup goes to the server
+    return threaded_lookups(server, operations, lambda api, number: api.parcelshops.list('NL', postalCode='3542AD'), coalesce_requests=False)
+
+@benchmark('parcelshop_spike')
+def bench_parcelshop_spike(server: StandInServer, operations: int) -> List[float]:
+    # THREADS threads looking up the same few postal codes at once, identical lookups in flight share one request
+    return threaded_lookups(server, operations, lambda api, number: api.parcelshops.list('NL', postalCode=f'35{number % 4}2AD'))
+
+def threaded_lookups(server: StandInServer, operations: int, lookup: Callable, **kwargs) -> List[float]:
+    with make_client(server, pool_maxsize=THREADS, **kwargs) as api, ThreadPoolExecutor(max_workers=THREADS) as executor:
+        api.products.list()
+        
+        def timed_lookup(number: int) -> float:
+            start = time.perf_counter()
+            lookup(api, number)
+            return time.perf_counter() - start
+        
+        return list(executor.map(timed_lookup, range(operations)))
+
+@benchmark('model_construction')
+def bench_model_construction(server: StandInServer, operations: int) -> List[float]:
+    data = [_parcelshop('NL', number) for number in range(1000)]
+    return timed(lambda: [shop.address.city for shop in ObjectListModel().construct_from_response(data).items()], max(operations // 10, 1))
+
+@benchmark('model_construction_lazy')
+def bench_model_construction_lazy(server: StandInServer, operations: int) -> List[float]:
+    data = [_parcelshop('NL', number) for number in range(1000)]
+    return timed(lambda: [shop.address.city for shop in LazyObjectListModel().construct_from_response(data).items()], max(operations // 10, 1))
+
+@benchmark('cold_start_auth')
+def bench_cold_start_auth(server: StandInServer, operations: int) -> List[float]:
+    def cold_start() -> None:
+        with make_client(server) as api:
+            api.products.list()
+    
+    return timed(cold_start, max(operations // 5, 1))
+
+@benchmark('import_time')
+def bench_import_time(server: StandInServer, operations: int) -> List[float]:
+    def cold_import() -> float:
+        result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True)
+        return float(result.stdout)
+    
+    return [cold_import() for _ in range(max(operations // 10, 1))]
+
+def summarize(latencies: List[float], wall_time: float) -> dict:
+    latencies = sorted(latencies)
+    
+    return {
+        'operations' : len(latencies),
+        'ops_per_sec' : round(len(latencies) / wall_time, 1) if wall_time else None,
+        'p50_ms' : round(statistics.median(latencies) * 1000, 3),
+        'p99_ms' : round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3)
+    }
+
+def run(names: List[str], operations: int, latency: float, jitter: float, error_rate: float) -> dict:
+    results = {}
+    
+    with StandInServer(latency=latency, jitter=jitter, error_rate=error_rate) as server:
+        for name in names:
+            start = time.perf_counter()
+            latencies = BENCHMARKS[name](server, operations)
+            results[name] = summarize(latencies, time.perf_counter() - start)
+    
+    return {
+        'meta' : { 'python' : platform.python_version(), 'platform' : platform.platform(), 'operations' : operations, 'latency' : latency, 'jitter' : jitter, 'error_rate' : error_rate, 'transport' : TRANSPORT, 'timestamp' : int(time.time()) },
+        'results' : results
+    }
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """ Returns the regressions against the baseline: throughput that dropped or latency that rose by more than "tolerance". """
+    
+    regressions = []
+    
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base: continue
+        
+        if base.get('ops_per_sec') and result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+            regressions.append(f'{name}: ops_per_sec {result["ops_per_sec"]} < baseline {base["ops_per_sec"]}')
+        
+        for metric in ('p50_ms', 'p99_ms'):
+            if base.get(metric) and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{name}: {metric} {result[metric]} > baseline {base[metric]}')
+    
+    return regressions
+
+def check_budgets(report: dict) -> List[str]:
+    """ Returns the benchmarks whose p50 latency is above their budget. """
+    
+    return [f'{name}: p50_ms {result["p50_ms"]} > budget {BUDGETS[name]}' for name, result in report['results'].items() if name in BUDGETS and result['p50_ms'] > BUDGETS[name]]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the DHL Parcel client against a local stand-in server.')
+    parser.add_argument('benchmarks', nargs='*', help=f'benchmarks to run, default all: {", ".join(BENCHMARKS)}')
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.005, help='latency added by the server, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--transport', choices=list(TRANSPORTS), default='http1', help='transport used by the client (the stand-in server speaks HTTP/1.1, http2 falls back to it)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--compare', action='store_true', help='exit with status 1 when a result regressed against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--output', help='also write the results to this file')
+    args = parser.parse_args(argv)
+    
+    global TRANSPORT
+    TRANSPORT = args.transport
+    
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown: parser.error(f'unknown benchmarks: {", ".join(unknown)}')
+    
+    report = run(names, args.operations, args.latency, args.jitter, args.error_rate)
+    
+    print(f'{"benchmark":<26}{"ops/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+    for name, result in report['results'].items():
+        print(f'{name:<26}{result["ops_per_sec"]:>10}{result["p50_ms"]:>10}{result["p99_ms"]:>10}')
+    
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    
+    over_budget = check_budgets(report)
+    for budget in over_budget: print(f'OVER BUDGET {budget}')
+    
+    if args.compare and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        
+        for regression in regressions: print(f'REGRESSION {regression}')
+        if regressions: return 1
+    
+    if args.save:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+    
+    return 1 if over_budget else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
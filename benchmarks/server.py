@@ -0,0 +1,253 @@
+""" Local stand-in for api-gw.dhlparcel.nl, used by the benchmarks.
+
+It serves the endpoints used by the client with canned responses, and can inject latency and errors:
+
+    server = StandInServer(latency=0.02, jitter=0.005, error_rate=0.01, error_status=502)
+    server.start()
+    api = DHLParcel_API(user_id, key, account_number, base_url=server.url)
+    ...
+    server.stop()
+
+Run it on its own with: python -m benchmarks.server --port 8080 --latency 0.02
+"""
+from typing import Optional, Tuple
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+
+LABEL_PDF = b'%PDF-1.4\n' + b'0' * (48 * 1024) + b'\n%%EOF\n'
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # the default of 5 drops connections when many client threads connect at once
+
+class StandInServer:
+    """ Threaded HTTP/1.1 server with keep-alive, answering like the DHL Parcel API.
+    Latency: seconds added to every response. Jitter: random extra latency, up to this many seconds.
+    Error_rate: fraction of (non-auth) requests answered with "error_status".
+    Token_lifetime: seconds an access token stays valid. Expired or unknown tokens get a 401.
+    Parcelshops: number of parcelshops returned by a parcelshop lookup.
+    """
+    
+    def __init__(self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 502,
+        token_lifetime: float = 900,
+        parcelshops: int = 25
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_lifetime = token_lifetime
+        self.parcelshops = parcelshops
+        
+        self.tokens = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), _make_handler(self))
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+    
+    def __exit__(self, *args) -> None:
+        self.stop()
+    
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+    
+    def issue_tokens(self) -> dict:
+        now = time.time()
+        access_token, refresh_token = uuid.uuid4().hex, uuid.uuid4().hex
+        
+        with self._lock:
+            self.tokens[access_token] = now + self.token_lifetime
+        
+        return {
+            'accessToken' : access_token,
+            'accessTokenExpiration' : int(now + self.token_lifetime),
+            'refreshToken' : refresh_token,
+            'refreshTokenExpiration' : int(now + 7 * 24 * 3600)
+        }
+    
+    def is_authorized(self, authorization: Optional[str]) -> bool:
+        if not authorization or not authorization.startswith('Bearer '): return False
+        return self.tokens.get(authorization[len('Bearer '):], 0) > time.time()
+    
+    def route(self, method: str, path: str, query: dict, body: Optional[dict], accept: str) -> Tuple[int, str, bytes]:
+        """ Returns the status, content type and body for a request. """
+        
+        parts = [part for part in path.split('/') if part]
+        
+        if method == 'POST' and parts == ['authenticate', 'api-key']:
+            if not body or not body.get('userId') or not body.get('key'): return _json(401, { 'message' : 'Invalid credentials' })
+            return _json(200, self.issue_tokens())
+        
+        if method == 'POST' and parts == ['authenticate', 'refresh-token']:
+            if not body or not body.get('refreshToken'): return _json(401, { 'message' : 'Invalid refresh token' })
+            return _json(200, self.issue_tokens())
+        
+        if method == 'POST' and parts == ['shipments']:
+            pieces = body.get('pieces') or [{}]
+            return _json(201, {
+                'shipmentId' : body.get('shipmentId'),
+                'product' : body.get('product', 'DFY-B2C'),
+                'pieces' : [{ 'labelId' : str(uuid.uuid4()), 'trackerCode' : f'JVGL{random.randint(10 ** 11, 10 ** 12)}', 'parcelType' : piece.get('parcelType', 'SMALL'), 'pieceNumber' : number + 1 } for number, piece in enumerate(pieces)]
+            })
+        
+        if method == 'GET' and parts[:1] == ['labels'] and len(parts) == 2:
+            if 'application/pdf' in accept: return 200, 'application/pdf', LABEL_PDF
+            return _json(200, { 'labelId' : parts[1], 'labelType' : 'B2X_Generic_A4_Third', 'pdf' : 'JVBERi0xLjQK' })
+        
+        if method == 'GET' and parts == ['labels']:
+            return _json(200, [{ 'labelId' : str(uuid.uuid4()), 'orderReference' : query.get('orderReferenceFilter', [None])[0], 'trackerCode' : f'JVGL{number}' } for number in range(5)])
+        
+        if method == 'GET' and parts[:1] == ['capabilities']:
+            return _json(200, _capabilities(query))
+        
+        if method == 'GET' and parts[:1] == ['parcel-shop-locations'] and len(parts) == 3:
+            return _json(200, _parcelshop(parts[1], 0, parts[2]))
+        
+        if method == 'GET' and parts[:1] == ['parcel-shop-locations'] and len(parts) == 2:
+            return _json(200, [_parcelshop(parts[1], number) for number in range(self.parcelshops)])
+        
+        if method == 'GET' and parts[:1] == ['products']:
+            return _json(200, [{ 'key' : key, 'label' : key, 'businessProduct' : True } for key in ('DFY-B2C', 'DFY-B2B', 'EUROPLUS')])
+        
+        if method == 'GET' and parts[:1] == ['parcel-types']:
+            return _json(200, [{ 'key' : key, 'minWeightKg' : 0, 'maxWeightKg' : weight } for key, weight in (('SMALL', 2), ('MEDIUM', 10), ('LARGE', 20))])
+        
+        if method == 'GET' and parts[:1] == ['shipment-options']:
+            return _json(200, [{ 'key' : key, 'description' : key } for key in ('DOOR', 'PS', 'BP', 'EVE', 'INS', 'REFERENCE')])
+        
+        if method == 'GET' and parts == ['pickup-availability']:
+            return _json(200, [{ 'date' : '2026-10-19', 'timeFrom' : '09:00', 'timeTo' : '17:00' }])
+        
+        return _json(404, { 'message' : f'No route for {method} {path}' })
+
+def _json(status: int, content: object) -> Tuple[int, str, bytes]:
+    return status, 'application/json', json.dumps(content).encode()
+
+def _capabilities(query: dict) -> list:
+    to_business = query.get('toBusiness', ['false'])[0] == 'true'
+    products = ('DFY-B2B', 'EUROPLUS') if to_business else ('DFY-B2C', 'EXPRESS')
+    
+    return [{
+        'rank' : rank + 1,
+        'fromCountryCode' : query.get('fromCountry', ['NL'])[0],
+        'toCountryCode' : query.get('toCountry', ['NL'])[0],
+        'product' : { 'key' : product, 'label' : product, 'businessProduct' : to_business },
+        'parcelType' : {
+            'key' : parcel_type,
+            'minWeightKg' : 0,
+            'maxWeightKg' : weight,
+            'dimensions' : { 'maxLengthCm' : 80, 'maxWidthCm' : 50, 'maxHeightCm' : 35 },
+            'price' : { 'withoutTax' : price, 'withTax' : round(price * 1.21, 2), 'vatRate' : 21, 'currency' : 'EUR' }
+        },
+        'options' : [{ 'key' : 'DOOR', 'description' : 'Delivery to the door' }, { 'key' : 'REFERENCE', 'description' : 'Reference', 'inputType' : 'text', 'inputMax' : 15 }]
+    } for rank, (product, (parcel_type, weight, price)) in enumerate((product, parcel_type) for product in products for parcel_type in (('SMALL', 2, 4.5), ('MEDIUM', 10, 6.25), ('LARGE', 20, 9.95)))]
+
+def _parcelshop(country_code: str, number: int, id: Optional[str] = None) -> dict:
+    return {
+        'id' : id or f'8004-{country_code}-{100000 + number}',
+        'name' : f'Parcelshop {number}',
+        'keyword' : f'shop{number}',
+        'shopType' : 'packStation' if number % 5 == 0 else 'parcelShop',
+        'address' : { 'companyName' : f'Parcelshop {number}', 'street' : 'Reactorweg', 'number' : str(number + 1), 'zipCode' : '3542AD', 'city' : 'Utrecht', 'countryCode' : country_code },
+        'geoLocation' : { 'latitude' : 52.09 + number * 0.001, 'longitude' : 5.12 + number * 0.001 },
+        'distance' : 100 * number,
+        'openingTimes' : [{ 'weekDay' : week_day, 'timeFrom' : '09:00', 'timeTo' : '18:00' } for week_day in range(1, 7)],
+        'serviceTypes' : ['pick-up', 'drop-off'] if number % 2 else ['pick-up'],
+        'shipperPrinterLabels' : False
+    }
+
+def _make_handler(server: StandInServer) -> type:
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        
+        def log_message(self, *args) -> None:
+            pass
+        
+        def do_GET(self) -> None:
+            self._handle('GET')
+        
+        def do_POST(self) -> None:
+            self._handle('POST')
+        
+        def do_PUT(self) -> None:
+            self._handle('PUT')
+        
+        def _handle(self, method: str) -> None:
+            url = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            raw_body = self.rfile.read(length) if length else b''
+            
+            try:
+                body = json.loads(raw_body) if raw_body else None
+            except ValueError:
+                body = None
+            
+            server.count(url.path)
+            
+            delay = server.latency + (random.random() * server.jitter if server.jitter else 0)
+            if delay: time.sleep(delay)
+            
+            is_auth = url.path.startswith('/authenticate/')
+            
+            if not is_auth and not server.is_authorized(self.headers.get('Authorization')):
+                status, content_type, content = _json(401, { 'message' : 'Unauthorized' })
+            elif not is_auth and server.error_rate and random.random() < server.error_rate:
+                status, content_type, content = _json(server.error_status, { 'message' : 'Injected error' })
+            else:
+                status, content_type, content = server.route(method, url.path, parse_qs(url.query), body, self.headers.get('Accept', ''))
+            
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(content)))
+            if status == 429: self.send_header('Retry-After', '1')
+            self.end_headers()
+            self.wfile.write(content)
+    
+    return Handler
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local stand-in for the DHL Parcel API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=502)
+    args = parser.parse_args()
+    
+    server = StandInServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status)
+    print(f'Serving on {server.url}')
+    server._httpd.serve_forever()
@@ -0,0 +1,360 @@
+from http import HTTPStatus
+from typing import Tuple, Optional, Union, List, TYPE_CHECKING, Literal
+
+import asyncio
+import importlib
+import time
+
+try:
+    import httpx
+except ImportError: # pragma: no cover
+    raise ImportError('The async client requires "httpx". Install it with: pip install python-dhlparcel-api[async]')
+
+from .. import config
+from ..token_store import TokenStore
+from ..response_cache import ResponseCache
+from ..http_cache import HTTPCache, CachedResponse, FRESH, STALE
+from ..codecs import JSONCodec, get_codec, copy_response
+from ..throttling import RateLimiter, RetryPolicy
+from ..instrumentation import Instrumentation, RequestEvent, get_hooks, get_endpoint
+from ..coalescing import AsyncRequestCoalescer, make_request_key
+
+if TYPE_CHECKING:
+    from .auth_handler import AuthHandler
+    from ..validation import ShipmentValidator
+    from .endpoints.capabilities import CapabilityMethods
+    from .endpoints.shipments import ShipmentMethods
+    from .endpoints.labels import LabelMethods
+    from .endpoints.parcel_types import ParcelTypeMethods
+    from .endpoints.products import ProductMethods
+    from .endpoints.pickup_availability import PickupAvailabilityMethods
+    from .endpoints.parcelshops import ParcelShopMethods
+
+# Endpoints are created on first access, so only the modules of the endpoints that are used get imported
+ENDPOINTS = {
+    'capabilities' : ('.endpoints.capabilities', 'CapabilityMethods'),
+    'shipments' : ('.endpoints.shipments', 'ShipmentMethods'),
+    'labels' : ('.endpoints.labels', 'LabelMethods'),
+    'parcel_types' : ('.endpoints.parcel_types', 'ParcelTypeMethods'),
+    'products' : ('.endpoints.products', 'ProductMethods'),
+    'pickup_availability' : ('.endpoints.pickup_availability', 'PickupAvailabilityMethods'),
+    'parcelshops' : ('.endpoints.parcelshops', 'ParcelShopMethods'),
+}
+
+class AsyncDHLParcel_API:
+    """ Asyncio version of the DHLParcel_API. All endpoint functions are coroutines and must be awaited.
+    One event loop can drive many concurrent requests over the pooled connections of a single client. """
+
+    capabilities: 'CapabilityMethods'
+    shipments: 'ShipmentMethods'
+    labels: 'LabelMethods'
+    parcel_types: 'ParcelTypeMethods'
+    products: 'ProductMethods'
+    pickup_availability: 'PickupAvailabilityMethods'
+    parcelshops: 'ParcelShopMethods'
+
+    def __init__(self,
+        user_id: str,
+        key: str,
+        accountNumber: str,
+        max_connections: int = config.ASYNC_MAX_CONNECTIONS,
+        max_keepalive_connections: int = config.POOL_MAXSIZE,
+        timeout: Union[float, Tuple[float, float], None] = (config.CONNECT_TIMEOUT, config.READ_TIMEOUT),
+        client: Optional['httpx.AsyncClient'] = None,
+        token_expiry_skew: float = config.TOKEN_EXPIRY_SKEW,
+        token_store: Optional[TokenStore] = None,
+        response_cache: Optional[ResponseCache] = None,
+        http_cache: Optional[HTTPCache] = None,
+        lazy_models: bool = False,
+        row_lists: bool = False,
+        json_codec: Union[str, JSONCodec, None] = None,
+        base_url: Optional[str] = None,
+        http2: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry: Union[RetryPolicy, bool] = True,
+        retry_policies: Optional[dict] = None,
+        coalesce_requests: bool = True,
+        instrumentation: Union[Instrumentation, List[Instrumentation], None] = None,
+        shipment_validator: Union['ShipmentValidator', bool, None] = None
+    ) -> None:
+        self.user_id = user_id
+        self.key = key
+        self.accountNumber = accountNumber
+        
+        self._base_url = base_url.rstrip('/') if base_url else config.BASE_URL
+        self._client = client if client else self._create_client(max_connections, max_keepalive_connections, timeout, http2)
+        self._auth_settings = (token_expiry_skew, token_store) # the AuthHandler, and so the default token store, is created on first use
+        self._response_cache = response_cache
+        self._http_cache = http_cache
+        self._revalidations = set() # background revalidations, referenced until they are done
+        self._lazy_models = lazy_models
+        self._row_lists = row_lists
+        self._codec = get_codec(json_codec)
+        self._rate_limiter = rate_limiter
+        self._retry_policy = (RetryPolicy() if retry is True else retry) or None
+        self._retry_policies = retry_policies if retry_policies else {}
+        self._coalescer = AsyncRequestCoalescer(copy_response) if coalesce_requests else None
+        self._hooks = get_hooks(instrumentation)
+        self._shipment_validator = shipment_validator
+    
+    def __getattr__(self, name: str) -> object:
+        """ Creates an endpoint, or the AuthHandler, on its first access, importing its module then. Only called for attributes that are not set yet. """
+        
+        if name == '_auth_handler': return self.__dict__.setdefault(name, self._create_auth_handler())
+        if name not in ENDPOINTS: raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        
+        module_name, class_name = ENDPOINTS[name]
+        endpoint = getattr(importlib.import_module(module_name, __package__), class_name)(self)
+        
+        return self.__dict__.setdefault(name, endpoint)
+    
+    def _create_auth_handler(self) -> 'AuthHandler':
+        from .auth_handler import AuthHandler
+        
+        expiry_skew, token_store = self._auth_settings
+        return AuthHandler(self, self.user_id, self.key, expiry_skew=expiry_skew, token_store=token_store)
+    
+    def _create_client(self, max_connections: int, max_keepalive_connections: int, timeout: Union[float, Tuple[float, float], None], http2: bool) -> 'httpx.AsyncClient':
+        """ Creates an async client with a keep-alive connection pool. With "http2", concurrent requests are multiplexed over a few connections (requires "h2"). """
+        
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+    
+    async def close(self) -> None:
+        """ Closes the client and all pooled connections. """
+        await self._client.aclose()
+    
+    async def __aenter__(self) -> 'AsyncDHLParcel_API':
+        return self
+    
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+    
+    async def _check_header_tokens(self) -> str:
+        """ Returns a valid access token, requesting or refreshing one if needed.
+        The token is refreshed before it expires, see "token_expiry_skew". Concurrent tasks share one auth call. """
+        
+        return await self._auth_handler.get_access_token()
+    
+    async def _refresh_header_tokens(self, stale_token: str) -> str:
+        """ Replaces a token that was rejected by DHL with a new one. Returns the new token. """
+        
+        return await self._auth_handler.refresh(stale_token)
+
+    def _prepare_data_for_request(self, data: dict) -> dict:
+        """ Gets data to be sent in a request and converts them to the way the DHL API expects. Returns a new dict. """
+        if not data: return None
+        
+        # bool variables need to be converted to strings; the data of the caller is left untouched
+        return { key : ('true' if value else 'false') if type(value) == bool else value for key, value in data.items() }
+
+    def _build_headers(self, token: Optional[str] = None, headers: Optional[dict] = None) -> dict:
+        """ Builds the headers of a single request from the default headers, the access token and the given headers.
+        The shared default headers are never changed, so one connection can be used by many threads at once. """
+        
+        request_headers = { 'Content-Type' : 'application/json', 'Accept' : 'application/json' }
+        if token: request_headers['Authorization'] = f'Bearer {token}'
+        if headers: request_headers.update(headers)
+        
+        return request_headers
+
+    async def _do_request(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, token: Optional[str] = None, prepend_base_to_url: Optional[bool] = True, event: Optional[RequestEvent] = None) -> 'httpx.Response':
+        """ Makes a request to the given url, with the given method and data; updates headers with new values if given.
+        By default, the base url (BASE_URL, unless "base_url" is given) is prepended to the URL. If the arg "prepend_base_to_url" is set to False, it will not be prepended.
+        The access "token" is sent as Authorization Bearer header. If an "event" is given, the size of the sent body is recorded on it.
+        """
+        
+        headers = self._build_headers(token, headers)
+
+        if prepend_base_to_url:
+            request_url = f'{self._base_url}/{url}'
+        else:
+            request_url = url
+        
+        data = self._prepare_data_for_request(data)
+        
+        if method == 'GET':
+            response = await self._client.get(request_url, params=data, headers=headers)
+        elif method in ('POST', 'PUT'):
+            content = self._codec.dumps(data)
+            if event: event.request_bytes = len(content)
+            response = await self._client.request(method, request_url, content=content, headers=headers)
+        
+        return response
+
+    def _get_retry_policy(self, url: str) -> Optional[RetryPolicy]:
+        """ Returns the retry policy of the endpoint of the url, e.g. "shipments" for "shipments/<id>", or the default policy. """
+        return self._retry_policies.get(get_endpoint(url, self._base_url), self._retry_policy)
+    
+    async def _send(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple['httpx.Response', Optional[RequestEvent]]:
+        """ Checks the header tokens and then carries out the request, through the rate limiter if one is set.
+        A 401 means the token was rejected, e.g. during a token rollover: the token is refreshed and the request is retried once.
+        Failed requests are retried according to the retry policy of the endpoint.
+        Returns the response and, with instrumentation set, the event of the last request; the caller passes it to "after_request". """
+        hooks = self._hooks
+        
+        # Check the headers for appropriate tokens before we make a request
+        start = time.perf_counter()
+        token = await self._check_header_tokens()
+        auth_elapsed = time.perf_counter() - start
+        
+        policy = self._get_retry_policy(url)
+        attempt = 0
+        refreshed = False
+        
+        while True:
+            event = None
+            
+            if hooks:
+                event = RequestEvent(method, url, attempt, base_url=self._base_url)
+                event.timings['auth'] = auth_elapsed
+            
+            if self._rate_limiter:
+                start = time.perf_counter()
+                await self._rate_limiter.acquire_async()
+                if event: event.timings['throttle'] = time.perf_counter() - start
+            
+            if hooks: hooks.before_request(event)
+            start = time.perf_counter()
+            
+            try:
+                response = await self._do_request(method, url, data, headers, token=token, event=event, **kwargs)
+            except (OSError, httpx.TransportError) as e: # connection errors and timeouts
+                if hooks:
+                    event.set_error(e, time.perf_counter() - start)
+                    hooks.after_request(event)
+                
+                if not policy or not policy.should_retry(method, attempt): raise
+                await asyncio.sleep(policy.get_delay(attempt))
+                attempt += 1
+                auth_elapsed = 0.0
+                continue
+            
+            if hooks: event.set_response(response, time.perf_counter() - start)
+            status = response.status_code
+            
+            if status == HTTPStatus.UNAUTHORIZED and not refreshed:
+                if hooks: hooks.after_request(event)
+                
+                start = time.perf_counter()
+                token = await self._refresh_header_tokens(token)
+                auth_elapsed = time.perf_counter() - start
+                refreshed = True
+                attempt += 1
+                continue
+            
+            if policy and policy.should_retry(method, attempt, status):
+                delay = policy.get_delay(attempt, response.headers.get('Retry-After'))
+                if status == HTTPStatus.TOO_MANY_REQUESTS and self._rate_limiter: self._rate_limiter.pause(delay)
+                if hooks: hooks.after_request(event)
+                
+                await asyncio.sleep(delay)
+                attempt += 1
+                auth_elapsed = 0.0
+                continue
+            
+            return response, event
+
+    async def _request(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ Carries out the request. Returns the status code, returned headers and content in JSON format. """
+        
+        response, event = await self._send(method, url, data, headers, **kwargs)
+        return self._read(response, event)
+    
+    def _read(self, response: 'httpx.Response', event: Optional[RequestEvent] = None) -> Tuple[int, dict, dict]:
+        """ Decodes the body of a response. Returns the status code, returned headers and content in JSON format. """
+        
+        start = time.perf_counter()
+        response_type = response.headers.get('Content-Type', '')
+        resp_content = self._codec.loads(response.content) if response_type == 'application/json' else response.content
+        
+        if event:
+            event.timings['decode'] = time.perf_counter() - start
+            self._hooks.after_request(event)
+
+        return response.status_code, response.headers, resp_content
+    
+    async def _cached_get(self, endpoint: str, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ Carries out a GET request through the HTTP cache. A fresh stored response is served without a request, a stale one is served
+        while it is revalidated in a background task, otherwise a conditional request is made. """
+        
+        http_cache = self._http_cache
+        key = http_cache.make_key((self._base_url, self.accountNumber), url, data, headers)
+        entry, state = http_cache.lookup(key)
+        
+        if state == STALE and http_cache.begin_revalidation(key):
+            task = asyncio.ensure_future(self._revalidate_in_background(endpoint, key, entry, url, data, headers, **kwargs))
+            self._revalidations.add(task)
+            task.add_done_callback(self._revalidations.discard)
+        
+        if state in (FRESH, STALE): return entry.status, entry.headers, http_cache.content(entry, self._codec.loads)
+        
+        return await self._revalidate(endpoint, key, entry, url, data, headers, **kwargs)
+    
+    async def _revalidate_in_background(self, endpoint: str, key: str, entry: CachedResponse, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> None:
+        """ If the revalidation fails, the stale response stays stored and the next request revalidates it again. """
+        
+        try:
+            await self._revalidate(endpoint, key, entry, url, data, headers, **kwargs)
+        except Exception:
+            pass
+        finally:
+            self._http_cache.end_revalidation(key)
+    
+    async def _revalidate(self, endpoint: str, key: str, entry: Optional[CachedResponse], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ Carries out a GET request, conditional if a response is stored. A 304 Not Modified serves the stored response, a new response is stored. """
+        
+        http_cache = self._http_cache
+        if entry: headers = dict(headers, **entry.conditional_headers()) if headers else entry.conditional_headers()
+        
+        response, event = await self._send('GET', url, data, headers, **kwargs)
+        
+        if response.status_code == HTTPStatus.NOT_MODIFIED and entry:
+            if event: self._hooks.after_request(event)
+            
+            entry = http_cache.refresh(entry, response.headers)
+            return entry.status, entry.headers, http_cache.content(entry, self._codec.loads)
+        
+        status, response_headers, resp_content = self._read(response, event)
+        
+        if status == HTTPStatus.OK:
+            stored = http_cache.store(key, endpoint, status, response_headers, response.content)
+            if stored: http_cache.remember(stored, resp_content)
+        
+        return status, response_headers, resp_content
+    
+    async def get(self, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, cache: Optional[str] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ If "cache" is set to the name of the endpoint and a response cache is configured, the response is served from or stored in the cache.
+        If it is not cached there and an HTTP cache is configured, the response is served from the HTTP cache or revalidated against it.
+        Identical requests made while one is in flight wait for it and share its response, unless "coalesce_requests" was turned off. """
+        
+        use_cache = cache and self._response_cache is not None
+        
+        if use_cache:
+            cached = self._response_cache.get(cache, url, data, scope=(self._base_url, self.accountNumber))
+            if cached: return cached
+        
+        if cache and self._http_cache is not None:
+            request = lambda: self._cached_get(cache, url, data, headers, **kwargs)
+        else:
+            request = lambda: self._request('GET', url, data, headers, **kwargs)
+        
+        if self._coalescer:
+            status, headers, response = await self._coalescer.run(make_request_key(url, data, headers, **kwargs), request)
+        else:
+            status, headers, response = await request()
+        if use_cache and status < 400: self._response_cache.set(cache, url, data, (status, headers, response), scope=(self._base_url, self.accountNumber))
+        
+        return status, headers, response
+    
+    async def post(self, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        status, headers, response = await self._request('POST', url, data, headers, **kwargs)
+        return status, headers, response
+    
+    async def put(self, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        status, headers, response = await self._request('PUT', url, data, headers, **kwargs)
+        return status, headers, response
@@ -0,0 +1,116 @@
+from typing import Optional, AsyncIterator
+from contextlib import asynccontextmanager
+
+import asyncio
+import time
+
+from .. import config
+from ..auth_handler import AuthHandler as SyncAuthHandler
+from ..instrumentation import track_auth
+
+class AuthHandler(SyncAuthHandler):
+    """ Asyncio version of the AuthHandler. Token state and the token store are shared with the sync AuthHandler,
+    only the calls to DHL are awaited. Renewals are single-flight within the event loop, and across processes if the token store supports it. """
+    
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._lock = None # created on first use, so it belongs to the running event loop (Python < 3.10 binds it to the loop current at creation)
+    
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None: self._lock = asyncio.Lock()
+        return self._lock
+    
+    async def authenticate(self) -> dict:
+        """ Tries to authenticate to DHL Parcel. Returns the auth_tokens as dict. Follows the same flow as the sync AuthHandler. """
+        
+        auth_tokens = self._token_store.get(self.user_id)
+        
+        if auth_tokens:
+            self._apply_auth_tokens(auth_tokens)
+            
+            if self._is_token_expired('access'):
+                auth_tokens = await self._renew_auth_tokens()
+        else:
+            auth_tokens = await self._get_auth_tokens()
+        
+        return auth_tokens
+    
+    async def get_access_token(self) -> str:
+        """ Returns a valid access token. The token is refreshed when it expires within "expiry_skew" seconds.
+        Concurrent tasks share a single authentication or refresh call. Processes share one as well, if the token store supports it. """
+        
+        tokens = self._tokens
+        token = tokens.get('accessToken')
+        if token and time.time() + self.expiry_skew < (tokens['accessTokenExpiration'] or 0): return token
+        
+        async with self._get_lock(), self._store_lock():
+            # Another task or process may have renewed the token while we were waiting for the lock
+            await self.authenticate()
+            return self._auth_token
+    
+    async def refresh(self, stale_token: Optional[str] = None) -> str:
+        """ Forces new tokens, e.g. after DHL rejected "stale_token" with a 401. Returns the new access token.
+        If another task already replaced "stale_token", its token is returned instead of refreshing again. """
+        
+        async with self._get_lock(), self._store_lock():
+            auth_tokens = self._token_store.get(self.user_id)
+            if auth_tokens: self._apply_auth_tokens(auth_tokens)
+            
+            if self._auth_token and self._auth_token != stale_token and not self._is_token_expired('access'): return self._auth_token
+            
+            await self._renew_auth_tokens()
+            return self._auth_token
+    
+    async def _renew_auth_tokens(self) -> dict:
+        """ Renews the tokens by the refresh token if it is still valid, else by user_id and key. """
+        
+        if self._refresh_token and not self._is_token_expired('refresh'):
+            try:
+                return await self._get_auth_tokens_from_refresh_token()
+            except ValueError:
+                pass # refresh token was rejected, fall back to the user_id and key
+        
+        return await self._get_auth_tokens()
+    
+    async def _get_auth_tokens(self) -> dict:
+        """ Retrieves the access and refresh tokens for a given user_id and key. """
+        with track_auth(self._api._hooks, 'api-key', self.user_id) as event:
+            response = await self._api._do_request('POST', config.AUTH_PATH, self._api_key_payload())
+            resp_content = self._parse_auth_response(response, event)
+        
+        self._set_auth_tokens(resp_content)
+        
+        return resp_content
+    
+    async def _get_auth_tokens_from_refresh_token(self) -> dict:
+        """ Tries to retrieve new tokens from the refresh token. """
+        
+        payload = self._refresh_token_payload()
+        
+        with track_auth(self._api._hooks, 'refresh-token', self.user_id) as event:
+            response = await self._api._do_request('POST', config.REFRESH_TOKEN_PATH, payload)
+            resp_content = self._parse_auth_response(response, event)
+        
+        self._set_auth_tokens(resp_content)
+        
+        return resp_content
+    
+    @asynccontextmanager
+    async def _store_lock(self) -> AsyncIterator[None]:
+        """ Holds the lock of the token store, so processes sharing the store renew the token once, as the sync handler does.
+        Taking it may block (e.g. on a file lock), so it is taken in a worker thread. """
+        
+        lock = self._token_store.lock(self.user_id)
+        acquire = asyncio.get_running_loop().run_in_executor(None, lock.__enter__)
+        
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # the worker thread still takes the lock, release it once it has
+            acquire.add_done_callback(lambda future: lock.__exit__(None, None, None) if not future.cancelled() and future.exception() is None else None)
+            raise
+        
+        try:
+            yield
+        finally:
+            lock.__exit__(None, None, None)
@@ -0,0 +1,55 @@
+from typing import Union
+from dhlparcel.models.base import BaseModel, ObjectListModel
+from dhlparcel.models.lazy import LazyModel, LazyObjectListModel
+from dhlparcel.models.rows import RowListModel
+from dhlparcel.instrumentation import ModelEvent
+
+import time
+
+
+
+class APIEndpoint:
+
+    def __init__(self, api: object, endpoint: str) -> None:
+
+        self.api = api
+        self.endpoint = endpoint
+        
+    async def get(self,
+        id: str
+    ) -> BaseModel:
+        
+        url = f'{self.endpoint}/{id}'
+        status, headers, resp_json = await self.api.get(url)
+        if status > 399: return BaseModel().set_error(returned_content=str(resp_json), status=status)
+        
+        return self._model(resp_json)
+    
+    def _model(self, resp_data: dict) -> BaseModel:
+        """ Constructs an object from the response data. With "lazy_models" set on the connection, a LazyModel is returned. """
+        
+        start = time.perf_counter()
+        model = LazyModel() if self.api._lazy_models else BaseModel()
+        model = model.construct_from_response(resp_data)
+        
+        if self.api._hooks: self.api._hooks.on_model_build(ModelEvent(self.endpoint, type(model).__name__, 1, time.perf_counter() - start))
+        return model
+    
+    def _model_list(self, resp_data: Union[dict, list]) -> ObjectListModel:
+        """ Constructs a list of objects from the response data. With "row_lists" set on the connection, a RowListModel is returned,
+        with "lazy_models" set a LazyObjectListModel. """
+        
+        start = time.perf_counter()
+        if self.api._row_lists: model_list = RowListModel()
+        else: model_list = LazyObjectListModel() if self.api._lazy_models else ObjectListModel()
+        model_list = model_list.construct_from_response(resp_data)
+        
+        if self.api._hooks: self.api._hooks.on_model_build(ModelEvent(self.endpoint, type(model_list).__name__, len(resp_data) if isinstance(resp_data, list) else 1, time.perf_counter() - start))
+        return model_list
+    
+    def list(self):
+        raise NotImplementedError('List is not implemented for this endpoint.')
+    
+    def create(self):
+        raise NotImplementedError('Create is not implemented for this endpoint.')
+    
\ No newline at end of file
@@ -0,0 +1,57 @@
+from typing import Optional, Union, Literal
+
+
+
+from .base import APIEndpoint
+from dhlparcel.models.base import ObjectListModel, BaseModel
+
+class LabelMethods(APIEndpoint):
+    
+    def __init__(self, api: object) -> None:
+        super().__init__(api, 'labels')
+        
+    async def get(self,
+        id: str,
+        data_format: Literal['pdf', 'json'] = 'pdf'
+    ) -> Union[BaseModel, bytes]:
+        headers = { 'Accept' : 'application/pdf' } if data_format == 'pdf' else {}
+        
+        """ Get a specific label by id. Get the returned content in json or pdf (bytes). """
+        
+        url = f'{self.endpoint}/{id}'
+        status, headers, resp = await self.api.get(url, headers=headers)
+        if status > 399: return BaseModel().set_error(returned_content=str(resp), status=status)
+        
+        if data_format == 'pdf':
+            return resp
+        elif data_format == 'json':
+            return self._model(resp)
+    
+    async def list(self,
+        trackerCodeFilter: Optional[str] = None,
+        orderReferenceFilter: Optional[str] = None,
+        shipmentId: Optional[str] = None
+    ) -> ObjectListModel:
+        
+        """ Lists all labels given by the choosen filter. """
+        
+        data = self._list_query(trackerCodeFilter, orderReferenceFilter, shipmentId)
+        
+        status, headers, resp_json = await self.api.get(self.endpoint, data)
+        if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
+        
+        return self._model_list(resp_json)
+    
+    def _list_query(self, trackerCodeFilter: Optional[str], orderReferenceFilter: Optional[str], shipmentId: Optional[str]) -> dict:
+        if not trackerCodeFilter and not orderReferenceFilter and not shipmentId:
+            raise ValueError('You must use at least one of the following filters: "trackerCodeFilter", "orderReferenceFilter", "shipmentId". ')
+        
+        data = {}
+        if trackerCodeFilter: data['trackerCodeFilter'] = trackerCodeFilter
+        if orderReferenceFilter: data['orderReferenceFilter'] = orderReferenceFilter
+        if shipmentId: data['shipmentId'] = shipmentId
+        
+        return data
+    
+    def create(self) -> DeprecationWarning:
+        raise DeprecationWarning('Create on the Label endpoint is deprecated. Use the Shipment endpoint to create a label. See: https://api-gw.dhlparcel.nl/docs/#/Shipments/createShipment')
\ No newline at end of file
@@ -0,0 +1,32 @@
+from typing import Optional, Literal
+
+
+from .base import APIEndpoint
+from dhlparcel.models.base import ObjectListModel
+
+class ProductMethods(APIEndpoint):
+    
+    def __init__(self, api: object) -> None:
+        super().__init__(api, 'products')
+    
+    async def list(self,
+        businessUnit: Optional[str] = None,
+        fromCountry: Optional[str] = None,
+        toCountry: Optional[str] = None,
+        businessProduct: Optional[bool] = None,
+        carrier: Optional[Literal['DHL-PARCEL', 'DHL-EXPRESS', 'SPEEDPACK']] = None
+    ) -> ObjectListModel:
+        
+        """ List all products. """
+        
+        data = {}
+        if businessUnit: data['businessUnit'] = businessUnit
+        if fromCountry: data['fromCountry'] = fromCountry
+        if toCountry: data['toCountry'] = toCountry
+        if businessProduct: data['businessProduct'] = businessProduct
+        if carrier: data['carrier'] = carrier
+        
+        status, headers, resp_json = await self.api.get(self.endpoint, data, cache=self.endpoint)
+        if status > 399: return ObjectListModel().set_error(returned_content=resp_json, status=status)
+        
+        return self._model_list(resp_json)
\ No newline at end of file
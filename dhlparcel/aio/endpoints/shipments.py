@@ -0,0 +1,165 @@
+from typing import Optional, Iterable, AsyncIterator, Union, Literal
+from collections import deque
+
+import asyncio
+import time
+
+from .base import APIEndpoint
+from dhlparcel.models.base import BaseModel, ObjectListModel
+from dhlparcel.models.bulk import BulkResult
+from dhlparcel.shipment_builder import Shipment
+from dhlparcel.validation import ShipmentValidator
+
+class ShipmentMethods(APIEndpoint):
+    
+    def __init__(self, api: object) -> None:
+        super().__init__(api, 'shipments')
+        self._validator = None
+        self._validator_lock = None # created on first use, inside the running event loop
+        
+    async def get_options(self,
+        senderType: Literal['business', 'consumer', 'parcelShop'],
+        fromCountry: Optional[str] = None,
+        toBusiness: Optional[bool] = None,
+        carrier: Optional[Literal['DHL-PARCEL', 'DHL-EXPRESS', 'SPEEDPACK']] = None,
+        businessUnit: Optional[str] = None,
+        whitelistRequired: Optional[bool] = None,
+        accountNumber: Optional[str] = None
+    ) -> ObjectListModel:
+        
+        """ Retrieves shipment options. """
+        
+        url = f'shipment-options/{senderType}'
+        
+        data = {}
+        if carrier: data['carrier'] = carrier
+        if fromCountry: data['fromCountry'] = fromCountry
+        if businessUnit: data['businessUnit'] = businessUnit
+        if whitelistRequired: data['whitelistRequired'] = whitelistRequired
+        if accountNumber: data['accountNumber'] = accountNumber
+        if toBusiness: data['toBusiness'] = toBusiness
+        
+        status, headers, resp_json = await self.api.get(url, data, cache='shipment-options')
+        if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
+
+        return self._model_list(resp_json)
+
+    
+    async def create(self,
+        shipmentId: str,
+        pieces: list,
+        receiver: dict,
+        shipper: dict,
+        options: list, 
+        accountId: Optional[str] = None,
+        orderReference: Optional[str] = None,
+        onBehalfOf: Optional[dict] = None,
+        product: Optional[str] = None,
+        customsDeclaration: Optional[dict] = None,
+        returnLabel: Optional[bool] = None
+    ) -> BaseModel:
+        
+        """ Creates a new shipment. With a "shipment_validator" set on the connection, the shipment is checked locally first;
+        an invalid shipment is not sent and returned with an error (status None) listing the problems. """
+        
+        accountId = accountId if accountId else self.api.accountNumber
+    
+        data = {
+            'shipmentId' : shipmentId,
+            'accountId' : accountId,
+            'pieces' : pieces,
+            'receiver' : receiver,
+            'shipper': shipper
+        }
+        
+        if orderReference: data['orderReference'] = orderReference
+        if options: data['options'] = options
+        if onBehalfOf: data['onBehalfOf'] = onBehalfOf
+        if product: data['product'] = product
+        if customsDeclaration: data['customsDeclaration'] = customsDeclaration
+        if returnLabel: data['returnLabel'] = returnLabel
+        
+        validator = await self._get_validator()
+        
+        if validator:
+            errors = validator.validate(data)
+            if errors: return BaseModel().set_error(returned_content='Invalid shipment: ' + '; '.join(errors), status=None)
+        
+        status, headers, resp_json = await self.api.post(self.endpoint, data)
+        if status > 399: return BaseModel().set_error(returned_content=str(resp_json), status=status)
+        
+        return self._model(resp_json)
+    
+    async def create_many(self,
+        shipments: Iterable[Union[dict, Shipment]],
+        max_in_flight: int = 32,
+        ordered: bool = True
+    ) -> AsyncIterator[BulkResult]:
+        
+        """ Creates many shipments, with at most "max_in_flight" requests running at the same time.
+        Shipments: iterable of dicts with the same keys as the arguments of ".create()", or Shipment builders. It is consumed lazily.
+        Ordered: yield the results in input order (default) or in completion order.
+        Yields a BulkResult per shipment. A failing shipment does not abort the batch, check "has_error" on each result.
+        """
+        
+        if max_in_flight < 1: raise ValueError('"max_in_flight" must be at least 1.')
+        
+        # Authenticate once up front, so the tasks don't all wait on the auth lock
+        await self.api._check_header_tokens()
+        
+        shipments = iter(enumerate(shipments))
+        pending = deque() if ordered else set()
+        
+        def submit_next() -> bool:
+            item = next(shipments, None)
+            if item is None: return False
+            
+            index, shipment = item
+            task = asyncio.ensure_future(self._create_one(index, shipment))
+            if ordered:
+                pending.append(task)
+            else:
+                pending.add(task)
+            
+            return True
+        
+        try:
+            while len(pending) < max_in_flight and submit_next(): pass
+            
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    pending.difference_update(done)
+                
+                for task in done:
+                    submit_next()
+                    yield await task
+        finally:
+            for task in pending: task.cancel()
+    
+    async def _create_one(self, index: int, shipment: dict) -> BulkResult:
+        """ Creates a single shipment for "create_many". Exceptions are turned into an error result so the batch can continue. """
+        
+        start = time.perf_counter()
+        
+        try:
+            result = await self.create(**(shipment.to_dict() if isinstance(shipment, Shipment) else shipment))
+        except Exception as e:
+            result = BaseModel().set_error(returned_content=str(e), status=None)
+        
+        return BulkResult(index=index, request=shipment, result=result, elapsed=time.perf_counter() - start)
+    
+    async def _get_validator(self) -> Optional[ShipmentValidator]:
+        """ Returns the validator set on the connection. If it is set to True, a validator is built once from the business shipment options. """
+        
+        validator = self.api._shipment_validator
+        if validator is not True: return validator or None
+        
+        if self._validator_lock is None: self._validator_lock = asyncio.Lock()
+        
+        async with self._validator_lock:
+            if self._validator is None: self._validator = await ShipmentValidator.from_async_api(self.api)
+        
+        return self._validator
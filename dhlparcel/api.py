@@ -1,75 +1,162 @@
-import requests
-import json
-from typing import Tuple, Optional
-from typing_extensions import Literal
+from http import HTTPStatus
+from typing import Tuple, Optional, Union, List, TYPE_CHECKING, Literal
+
+import importlib
+import time
 
 from . import config
-from .auth_handler import AuthHandler
+from .token_store import TokenStore
+from .response_cache import ResponseCache
+from .http_cache import HTTPCache, CachedResponse, FRESH, STALE
+from .codecs import JSONCodec, get_codec, copy_response
+from .transports import Transport, RequestsTransport
+from .throttling import RateLimiter, RetryPolicy, ConcurrencyLimiter
+from .instrumentation import Instrumentation, RequestEvent, get_hooks, get_endpoint
+from .coalescing import RequestCoalescer, make_request_key
+
+if TYPE_CHECKING:
+    from .auth_handler import AuthHandler
+    from .validation import ShipmentValidator
+    from .endpoints.capabilities import CapabilityMethods
+    from .endpoints.shipments import ShipmentMethods
+    from .endpoints.labels import LabelMethods
+    from .endpoints.parcel_types import ParcelTypeMethods
+    from .endpoints.products import ProductMethods
+    from .endpoints.pickup_availability import PickupAvailabilityMethods
+    from .endpoints.parcelshops import ParcelShopMethods
 
-from .endpoints.capabilities import CapabilityMethods
-from .endpoints.shipments import ShipmentMethods
-from .endpoints.labels import LabelMethods
-from .endpoints.parcel_types import ParcelTypeMethods
-from .endpoints.products import ProductMethods
-from .endpoints.pickup_availability import PickupAvailabilityMethods
-from .endpoints.parcelshops import ParcelShopMethods
+# Endpoints are created on first access, so only the modules of the endpoints that are used get imported
+ENDPOINTS = {
+    'capabilities' : ('.endpoints.capabilities', 'CapabilityMethods'),
+    'shipments' : ('.endpoints.shipments', 'ShipmentMethods'),
+    'labels' : ('.endpoints.labels', 'LabelMethods'),
+    'parcel_types' : ('.endpoints.parcel_types', 'ParcelTypeMethods'),
+    'products' : ('.endpoints.products', 'ProductMethods'),
+    'pickup_availability' : ('.endpoints.pickup_availability', 'PickupAvailabilityMethods'),
+    'parcelshops' : ('.endpoints.parcelshops', 'ParcelShopMethods'),
+}
 
 class DHLParcel_API:
 
-    def __init__(self, user_id: str, key: str, accountNumber: str) -> None:
+    capabilities: 'CapabilityMethods'
+    shipments: 'ShipmentMethods'
+    labels: 'LabelMethods'
+    parcel_types: 'ParcelTypeMethods'
+    products: 'ProductMethods'
+    pickup_availability: 'PickupAvailabilityMethods'
+    parcelshops: 'ParcelShopMethods'
+
+    def __init__(self,
+        user_id: str,
+        key: str,
+        accountNumber: str,
+        pool_connections: int = config.POOL_CONNECTIONS,
+        pool_maxsize: int = config.POOL_MAXSIZE,
+        pool_block: bool = config.POOL_BLOCK,
+        timeout: Union[float, Tuple[float, float], None] = (config.CONNECT_TIMEOUT, config.READ_TIMEOUT),
+        session: Optional['requests.Session'] = None,
+        token_expiry_skew: float = config.TOKEN_EXPIRY_SKEW,
+        token_store: Optional[TokenStore] = None,
+        response_cache: Optional[ResponseCache] = None,
+        http_cache: Optional[HTTPCache] = None,
+        lazy_models: bool = False,
+        row_lists: bool = False,
+        json_codec: Union[str, JSONCodec, None] = None,
+        base_url: Optional[str] = None,
+        transport: Optional[Transport] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency_limiter: Optional[ConcurrencyLimiter] = None,
+        retry: Union[RetryPolicy, bool] = True,
+        retry_policies: Optional[dict] = None,
+        coalesce_requests: bool = True,
+        instrumentation: Union[Instrumentation, List[Instrumentation], None] = None,
+        shipment_validator: Union['ShipmentValidator', bool, None] = None
+    ) -> None:
         self.user_id = user_id
         self.key = key
         self.accountNumber = accountNumber
         
-        self._base_url = config.BASE_URL
-        self._headers = { 'Content-Type' : 'application/json', 'Accept' : 'application/json' }
-        self._auth_handler = AuthHandler(self, user_id, key)
-        self._access_token = None
+        self._base_url = base_url.rstrip('/') if base_url else config.BASE_URL
+        self._timeout = timeout
+        self._transport = transport if transport else RequestsTransport(pool_connections, pool_maxsize, pool_block, session=session)
+        self._auth_settings = (token_expiry_skew, token_store) # the AuthHandler, and so the default token store, is created on first use
+        self._response_cache = response_cache
+        self._http_cache = http_cache
+        self._lazy_models = lazy_models
+        self._row_lists = row_lists
+        self._codec = get_codec(json_codec)
+        self._rate_limiter = rate_limiter
+        self._concurrency_limiter = concurrency_limiter
+        self._retry_policy = (RetryPolicy() if retry is True else retry) or None
+        self._retry_policies = retry_policies if retry_policies else {}
+        self._coalescer = RequestCoalescer(copy_response) if coalesce_requests else None
+        self._hooks = get_hooks(instrumentation)
+        self._shipment_validator = shipment_validator
+    
+    def __getattr__(self, name: str) -> object:
+        """ Creates an endpoint, or the AuthHandler, on its first access, importing its module then. Only called for attributes that are not set yet. """
+        
+        if name == '_auth_handler': return self.__dict__.setdefault(name, self._create_auth_handler())
+        if name not in ENDPOINTS: raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        
+        module_name, class_name = ENDPOINTS[name]
+        endpoint = getattr(importlib.import_module(module_name, __package__), class_name)(self)
         
-        self.capabilities = CapabilityMethods(self)
-        self.shipments = ShipmentMethods(self)
-        self.labels = LabelMethods(self)
-        self.parcel_types = ParcelTypeMethods(self)
-        self.products = ProductMethods(self)
-        self.pickup_availability = PickupAvailabilityMethods(self)
-        self.parcelshops = ParcelShopMethods(self)
+        # threads racing on the first access all get the endpoint that was stored first
+        return self.__dict__.setdefault(name, endpoint)
+    
+    def _create_auth_handler(self) -> 'AuthHandler':
+        from .auth_handler import AuthHandler
+        
+        expiry_skew, token_store = self._auth_settings
+        return AuthHandler(self, self.user_id, self.key, expiry_skew=expiry_skew, token_store=token_store)
+    
+    def close(self) -> None:
+        """ Closes the transport and all pooled connections. """
+        self._transport.close()
+    
+    def __enter__(self) -> 'DHLParcel_API':
+        return self
+    
+    def __exit__(self, *args) -> None:
+        self.close()
         
-    def _set_token_header(self, token: str) -> None:
-        """ Sets the Authorization Bearer token for the next requests. """
+    def _check_header_tokens(self) -> str:
+        """ Returns a valid access token, requesting or refreshing one if needed.
+        The token is refreshed before it expires, see "token_expiry_skew". Concurrent threads share one auth call. """
         
-        self._access_token = token
-        self._headers.update({'Authorization' : f'Bearer {token}' })
+        return self._auth_handler.get_access_token()
     
-    def _check_header_tokens(self) -> None:
-        """ Checks if a token is present in the headers. If not, request one and add to the headers."""
+    def _refresh_header_tokens(self, stale_token: str) -> str:
+        """ Replaces a token that was rejected by DHL with a new one. Returns the new token. """
         
-        if not self._access_token or not 'Authorization' in self._headers:
-            auth_tokens = self._auth_handler.authenticate()
-            self._set_token_header(auth_tokens.get('accessToken'))
+        return self._auth_handler.refresh(stale_token)
 
     def _prepare_data_for_request(self, data: dict) -> dict:
-        """ Gets data to be sent in a request and converts them to the way the DHL API expects. """
+        """ Gets data to be sent in a request and converts them to the way the DHL API expects. Returns a new dict. """
         if not data: return None
         
-        for key, value in data.items():
-            if type(value) == bool:
-                data[key] = 'true' if value else 'false' # bool variables need to be converted to strings
-        
-        return data
+        # bool variables need to be converted to strings; the data of the caller is left untouched
+        return { key : ('true' if value else 'false') if type(value) == bool else value for key, value in data.items() }
 
-    def _update_headers(self, headers: dict) -> dict:
-        """ Takes the initial headers and updates it with the given headers. Returns the updated headers. """
+    def _build_headers(self, token: Optional[str] = None, headers: Optional[dict] = None) -> dict:
+        """ Builds the headers of a single request from the default headers, the access token and the given headers.
+        The shared default headers are never changed, so one connection can be used by many threads at once. """
         
-        tmp_headers = self._headers.copy()
-        tmp_headers.update(headers)
-        return tmp_headers
+        request_headers = { 'Content-Type' : 'application/json', 'Accept' : 'application/json' }
+        if token: request_headers['Authorization'] = f'Bearer {token}'
+        if headers: request_headers.update(headers)
+        
+        return request_headers
 
-    def _do_request(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, prepend_base_to_url: Optional[bool] = True) -> requests.Response:
+    def _do_request(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, token: Optional[str] = None, prepend_base_to_url: Optional[bool] = True, stream: Optional[bool] = False, event: Optional[RequestEvent] = None) -> object:
         """ Makes a request to the given url, with the given method and data; updates headers with new values if given.
-        By default, the BASE_URL is prepended to the URL. If the arg "prepend_base_to_url" is set to False, it will not be prepended.
+        By default, the base url (BASE_URL, unless "base_url" is given) is prepended to the URL. If the arg "prepend_base_to_url" is set to False, it will not be prepended.
+        If "stream" is set to True, the body is not read up front and the response must be closed by the caller.
+        The access "token" is sent as Authorization Bearer header. If an "event" is given, the size of the sent body is recorded on it.
         """
         
-        headers = self._update_headers(headers) if headers else self._headers
+        headers = self._build_headers(token, headers)
 
         if prepend_base_to_url:
             request_url = f'{self._base_url}/{url}'
@@ -79,30 +166,186 @@ class DHLParcel_API:
         data = self._prepare_data_for_request(data)
         
         if method == 'GET':
-            response = requests.get(request_url, params=data, headers=headers)
-        elif method == 'POST':
-            response = requests.post(request_url, data=json.dumps(data), headers=headers)
-        elif method == 'PUT':
-            response = requests.put(request_url, data=json.dumps(data), headers=headers)
+            response = self._transport.request(method, request_url, params=data, headers=headers, timeout=self._timeout, stream=stream)
+        elif method in ('POST', 'PUT'):
+            content = self._codec.dumps(data)
+            if event: event.request_bytes = len(content)
+            response = self._transport.request(method, request_url, content=content, headers=headers, timeout=self._timeout, stream=stream)
         
         return response
 
 
-    def _request(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
-        """ Checks the header tokens and then carries out the request.
-        Returns the status code, returned headers and content in JSON format. """
+    def _get_retry_policy(self, url: str) -> Optional[RetryPolicy]:
+        """ Returns the retry policy of the endpoint of the url, e.g. "shipments" for "shipments/<id>", or the default policy. """
+        return self._retry_policies.get(get_endpoint(url, self._base_url), self._retry_policy)
+    
+    def _send(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, stream: bool = False, **kwargs: dict) -> Tuple[object, Optional[RequestEvent]]:
+        """ Checks the header tokens and then carries out the request, through the rate limiter and concurrency limiter if they are set.
+        A 401 means the token was rejected, e.g. during a token rollover: the token is refreshed and the request is retried once.
+        Failed requests are retried according to the retry policy of the endpoint.
+        Returns the response and, with instrumentation set, the event of the last request; the caller passes it to "after_request". """
+        hooks = self._hooks
+        
         # Check the headers for appropriate tokens before we make a request
-        self._check_header_tokens()
+        start = time.perf_counter()
+        token = self._check_header_tokens()
+        auth_elapsed = time.perf_counter() - start
+        
+        policy = self._get_retry_policy(url)
+        attempt = 0
+        refreshed = False
+        
+        while True:
+            event = None
+            
+            if hooks:
+                event = RequestEvent(method, url, attempt, base_url=self._base_url)
+                event.timings['auth'] = auth_elapsed
+            
+            if self._rate_limiter:
+                start = time.perf_counter()
+                self._rate_limiter.acquire()
+                if event: event.timings['throttle'] = time.perf_counter() - start
+            
+            if hooks: hooks.before_request(event)
+            start = time.perf_counter()
+            
+            # the slot is released by the "finally" below, so nothing that can raise may run between taking it and the "try"
+            if self._concurrency_limiter: self._concurrency_limiter.acquire()
+            
+            try:
+                if self._concurrency_limiter:
+                    if event: event.timings['throttle'] = event.timings.get('throttle', 0.0) + time.perf_counter() - start
+                    start = time.perf_counter()
+                
+                response = self._do_request(method, url, data, headers, token=token, stream=stream, event=event, **kwargs)
+            except OSError as e: # connection errors and timeouts
+                if hooks:
+                    event.set_error(e, time.perf_counter() - start)
+                    hooks.after_request(event)
+                
+                if not policy or not policy.should_retry(method, attempt): raise
+                time.sleep(policy.get_delay(attempt))
+                attempt += 1
+                auth_elapsed = 0.0
+                continue
+            finally:
+                # a streamed body is read after the slot is released
+                if self._concurrency_limiter: self._concurrency_limiter.release()
+            
+            if hooks: event.set_response(response, time.perf_counter() - start, stream)
+            status = response.status_code
+            
+            if status == HTTPStatus.UNAUTHORIZED and not refreshed:
+                response.close()
+                if hooks: hooks.after_request(event)
+                
+                start = time.perf_counter()
+                token = self._refresh_header_tokens(token)
+                auth_elapsed = time.perf_counter() - start
+                refreshed = True
+                attempt += 1
+                continue
+            
+            if policy and policy.should_retry(method, attempt, status):
+                delay = policy.get_delay(attempt, response.headers.get('Retry-After'))
+                if status == HTTPStatus.TOO_MANY_REQUESTS and self._rate_limiter: self._rate_limiter.pause(delay)
+                
+                response.close()
+                if hooks: hooks.after_request(event)
+                
+                time.sleep(delay)
+                attempt += 1
+                auth_elapsed = 0.0
+                continue
+            
+            return response, event
 
-        # Make the request
-        response = self._do_request(method, url, data, headers, **kwargs)
+    def _request(self, method: Literal['GET', 'POST', 'PUT'], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ Carries out the request. Returns the status code, returned headers and content in JSON format. """
+        
+        response, event = self._send(method, url, data, headers, **kwargs)
+        return self._read(response, event)
+    
+    def _read(self, response: object, event: Optional[RequestEvent] = None) -> Tuple[int, dict, dict]:
+        """ Reads and decodes the body of a response. Returns the status code, returned headers and content in JSON format. """
+        
+        start = time.perf_counter()
         response_type = response.headers.get('Content-Type', '')
-        resp_content = response.json() if response_type == 'application/json' else response.content
+        resp_content = self._codec.loads(response.content) if response_type == 'application/json' else response.content
+        
+        if event:
+            event.timings['decode'] = time.perf_counter() - start
+            self._hooks.after_request(event)
 
         return response.status_code, response.headers, resp_content
     
-    def get(self, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
-        status, headers, response = self._request('GET', url, data, headers, **kwargs)
+    def _cached_get(self, endpoint: str, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ Carries out a GET request through the HTTP cache. A fresh stored response is served without a request, a stale one is served
+        while it is revalidated in the background, otherwise a conditional request is made. """
+        
+        http_cache = self._http_cache
+        key = http_cache.make_key((self._base_url, self.accountNumber), url, data, headers)
+        entry, state = http_cache.lookup(key)
+        
+        if state == STALE: http_cache.revalidate_in_background(key, lambda: self._revalidate(endpoint, key, entry, url, data, headers, **kwargs))
+        if state in (FRESH, STALE): return entry.status, entry.headers, http_cache.content(entry, self._codec.loads)
+        
+        return self._revalidate(endpoint, key, entry, url, data, headers, **kwargs)
+    
+    def _revalidate(self, endpoint: str, key: str, entry: Optional[CachedResponse], url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ Carries out a GET request, conditional if a response is stored. A 304 Not Modified serves the stored response, a new response is stored. """
+        
+        http_cache = self._http_cache
+        if entry: headers = dict(headers, **entry.conditional_headers()) if headers else entry.conditional_headers()
+        
+        response, event = self._send('GET', url, data, headers, **kwargs)
+        
+        if response.status_code == HTTPStatus.NOT_MODIFIED and entry:
+            response.close()
+            if event: self._hooks.after_request(event)
+            
+            entry = http_cache.refresh(entry, response.headers)
+            return entry.status, entry.headers, http_cache.content(entry, self._codec.loads)
+        
+        status, response_headers, resp_content = self._read(response, event)
+        
+        if status == HTTPStatus.OK:
+            stored = http_cache.store(key, endpoint, status, response_headers, response.content)
+            if stored: http_cache.remember(stored, resp_content)
+        
+        return status, response_headers, resp_content
+    
+    def _stream(self, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> object:
+        """ Carries out a GET request without reading the body. Returns the response, which must be closed by the caller. """
+        
+        response, event = self._send('GET', url, data, headers, stream=True, **kwargs)
+        if event: self._hooks.after_request(event)
+        
+        return response
+    
+    def get(self, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, cache: Optional[str] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
+        """ If "cache" is set to the name of the endpoint and a response cache is configured, the response is served from or stored in the cache.
+        If it is not cached there and an HTTP cache is configured, the response is served from the HTTP cache or revalidated against it.
+        Identical requests made while one is in flight wait for it and share its response, unless "coalesce_requests" was turned off. """
+        
+        use_cache = cache and self._response_cache is not None
+        
+        if use_cache:
+            cached = self._response_cache.get(cache, url, data, scope=(self._base_url, self.accountNumber))
+            if cached: return cached
+        
+        if cache and self._http_cache is not None:
+            request = lambda: self._cached_get(cache, url, data, headers, **kwargs)
+        else:
+            request = lambda: self._request('GET', url, data, headers, **kwargs)
+        
+        if self._coalescer:
+            status, headers, response = self._coalescer.run(make_request_key(url, data, headers, **kwargs), request)
+        else:
+            status, headers, response = request()
+        if use_cache and status < 400: self._response_cache.set(cache, url, data, (status, headers, response), scope=(self._base_url, self.accountNumber))
+        
         return status, headers, response
     
     def post(self, url: str, data: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Tuple[int, dict, dict]:
@@ -1,59 +1,105 @@
-from typing import Type
-from typing_extensions import Literal
+from typing import Type, Optional, Literal
 from http import HTTPStatus
 
-import datetime
+import threading
+import time
 import json
 
-from .cache_handler import CacheHandler
+from .token_store import TokenStore, FileTokenStore
+from .instrumentation import track_auth
 from . import config
 
 class AuthHandler:
 
-    def __init__(self, api: object, user_id: str, key: str = None) -> None:
+    def __init__(self, api: object, user_id: str, key: str = None, expiry_skew: float = config.TOKEN_EXPIRY_SKEW, token_store: Optional[TokenStore] = None) -> None:
         self.user_id = user_id
         self.key = key
+        self.expiry_skew = expiry_skew
         
         self._api = api
-        self._cache_handler = CacheHandler(fail_silently=True)
-        self._auth_token = None
-        self._auth_token_exp = None
-        self._refresh_token = None
-        self._refresh_token_exp = None
+        self._token_store = token_store if token_store else FileTokenStore()
+        self._lock = threading.Lock()
+        self._tokens = {} # replaced as a whole under the lock, never changed in place, so readers always see a consistent set
+    
+    @property
+    def _auth_token(self) -> Optional[str]:
+        return self._tokens.get('accessToken')
+    
+    @property
+    def _auth_token_exp(self) -> Optional[float]:
+        return self._tokens.get('accessTokenExpiration')
+    
+    @property
+    def _refresh_token(self) -> Optional[str]:
+        return self._tokens.get('refreshToken')
+    
+    @property
+    def _refresh_token_exp(self) -> Optional[float]:
+        return self._tokens.get('refreshTokenExpiration')
     
     def authenticate(self) -> dict:
         """ Tries to authenticate to DHL Parcel. Returns the auth_tokens as dict. It has the following flow:
-        1. Check if there are tokens in cache, if so, use them. If not, get new auth tokens by using user_id and key.
-        2. If there are tokens in cache, check if the access token has expired;
+        1. Check if there are tokens in the token store, if so, use them. If not, get new auth tokens by using user_id and key.
+        2. If there are tokens in the token store, check if the access token has expired (or expires within "expiry_skew" seconds);
         3. If the access token is expired, but the refresh token is still valid: retrieve new token by refresh token;
         4. If the access token is not expired; use this token;
         4. else, retrieve new auth tokens using user_id and key."""
         
-        auth_tokens = self._cache_handler.get(self.user_id)
+        auth_tokens = self._token_store.get(self.user_id)
         
         if auth_tokens:
-            self._set_auth_tokens(auth_tokens)
+            self._apply_auth_tokens(auth_tokens)
             
             if self._is_token_expired('access'):
-                if not self._is_token_expired('refresh'):
-                    self._get_auth_tokens_from_refresh_token()
-                else:
-                    self._get_auth_tokens()
+                auth_tokens = self._renew_auth_tokens()
         else:
             auth_tokens = self._get_auth_tokens()
         
         return auth_tokens
+    
+    def get_access_token(self) -> str:
+        """ Returns a valid access token. The token is refreshed when it expires within "expiry_skew" seconds.
+        Concurrent threads share a single authentication or refresh call. Processes share one as well, if the token store supports it. """
+        
+        tokens = self._tokens
+        token = tokens.get('accessToken')
+        if token and time.time() + self.expiry_skew < (tokens['accessTokenExpiration'] or 0): return token
+        
+        with self._lock, self._token_store.lock(self.user_id):
+            # Another thread or process may have renewed the token while we were waiting for the lock
+            self.authenticate()
+            return self._auth_token
+    
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """ Forces new tokens, e.g. after DHL rejected "stale_token" with a 401. Returns the new access token.
+        If another thread already replaced "stale_token", its token is returned instead of refreshing again. """
+        
+        with self._lock, self._token_store.lock(self.user_id):
+            auth_tokens = self._token_store.get(self.user_id)
+            if auth_tokens: self._apply_auth_tokens(auth_tokens)
+            
+            if self._auth_token and self._auth_token != stale_token and not self._is_token_expired('access'): return self._auth_token
             
+            self._renew_auth_tokens()
+            return self._auth_token
+    
+    def _renew_auth_tokens(self) -> dict:
+        """ Renews the tokens by the refresh token if it is still valid, else by user_id and key. """
+        
+        if self._refresh_token and not self._is_token_expired('refresh'):
+            try:
+                return self._get_auth_tokens_from_refresh_token()
+            except ValueError:
+                pass # refresh token was rejected, fall back to the user_id and key
+        
+        return self._get_auth_tokens()
     
     def _get_auth_tokens(self) -> dict:
         """ Retrieves the access and refresh tokens for a given user_id and key. """
-        response = self._api._do_request('POST', config.AUTH_URL, { 'userId' : self.user_id, 'key' : self.key }, prepend_base_to_url = False)
-        resp_content = self.decode_json_or_none(response.content)
-        status = response.status_code
+        with track_auth(self._api._hooks, 'api-key', self.user_id) as event:
+            response = self._api._do_request('POST', config.AUTH_PATH, self._api_key_payload())
+            resp_content = self._parse_auth_response(response, event)
         
-        if status == HTTPStatus.UNAUTHORIZED: raise ValueError('The request received a status 401 UNAUTHORIZED. Do you have the correct user_id and key set?')
-        if not resp_content: raise ValueError('The request did not return valid JSON.')
-        if status > 399: raise ValueError('An error occured during authentication: ' + json.dumps(resp_content))
         self._set_auth_tokens(resp_content)
         
         return resp_content
@@ -61,22 +107,42 @@ class AuthHandler:
     def _get_auth_tokens_from_refresh_token(self) -> dict:
         """ Tries to retrieve new tokens from the refresh token. """
         
+        payload = self._refresh_token_payload()
+        
+        with track_auth(self._api._hooks, 'refresh-token', self.user_id) as event:
+            response = self._api._do_request('POST', config.REFRESH_TOKEN_PATH, payload)
+            resp_content = self._parse_auth_response(response, event)
+        
+        self._set_auth_tokens(resp_content)
+        
+        return resp_content
+    
+    def _api_key_payload(self) -> dict:
+        return { 'userId' : self.user_id, 'key' : self.key }
+    
+    def _refresh_token_payload(self) -> dict:
+        """ Returns the body of a refresh request. Raises a ValueError if there is no valid refresh token. """
+        
         if not self._refresh_token: raise ValueError('No refresh token found. Init the auth flow manually.')
         if self._is_token_expired('refresh'): raise ValueError('Refresh token has expired. Init the auth flow manually.')
         
-        response = self._api._do_request('POST', config.REFRESH_TOKEN_URL, { 'refreshToken' : self._refresh_token }, prepend_base_to_url = False)
+        return { 'refreshToken' : self._refresh_token }
+    
+    def _parse_auth_response(self, response: object, event: object) -> dict:
+        """ Returns the tokens of an auth response and records its status on the auth event. Raises a ValueError if authentication failed.
+        Shared by the sync and async handlers, which only differ in how the request is made. """
+        
         resp_content = self.decode_json_or_none(response.content)
-        status = response.status_code
+        status = event.status = response.status_code
         
         if status == HTTPStatus.UNAUTHORIZED: raise ValueError('The request received a status 401 UNAUTHORIZED. Do you have the correct user_id and key set?')
         if not resp_content: raise ValueError('The request did not return valid JSON.')
         if status > 399: raise ValueError('An error occured during authentication: ' + json.dumps(resp_content))
-        self._set_auth_tokens(resp_content)
         
         return resp_content
     
     def _is_token_expired(self, type: Literal['access', 'refresh'] = 'access') -> bool:
-        """ Checks if the access OR request token has expired. Returns True if expired, False if not.
+        """ Checks if the access OR request token has expired, or expires within "expiry_skew" seconds. Returns True if expired, False if not.
         Type: either 'access' or 'refresh', given the token you want to check. Default is 'access'.
         """
         
@@ -87,24 +153,27 @@ class AuthHandler:
             if not self._refresh_token_exp: raise ValueError('"refresh_token_exp" is empty. Did you retrieve the auth tokens first?')
             token_exp_timestamp = self._refresh_token_exp
         
-        today = datetime.datetime.today()
-        expires_at = datetime.datetime.fromtimestamp(token_exp_timestamp)
-        
-        return True if today > expires_at else False
+        return time.time() + self.expiry_skew >= token_exp_timestamp
     
     def _set_auth_tokens(self, auth_tokens: dict) -> None:
-        """ Sets the returned auth tokens and writes it to cache. """
+        """ Sets the returned auth tokens and writes it to the token store. """
         
-        self._cache_handler.write(self.user_id, auth_tokens)
-
-        self._auth_token = auth_tokens.get('accessToken')
-        self._auth_token_exp = auth_tokens.get('accessTokenExpiration')
-        self._refresh_token = auth_tokens.get('refreshToken')
-        self._refresh_token_exp = auth_tokens.get('refreshTokenExpiration')
+        self._token_store.set(self.user_id, auth_tokens)
+        self._apply_auth_tokens(auth_tokens)
+    
+    def _apply_auth_tokens(self, auth_tokens: dict) -> None:
+        """ Sets the auth tokens on the handler, without writing them to the token store. Must be called while holding the lock. """
+        
+        self._tokens = {
+            'accessToken' : auth_tokens.get('accessToken'),
+            'accessTokenExpiration' : auth_tokens.get('accessTokenExpiration'),
+            'refreshToken' : auth_tokens.get('refreshToken'),
+            'refreshTokenExpiration' : auth_tokens.get('refreshTokenExpiration')
+        }
         
     def decode_json_or_none(self, json_value):
         try:
-            json_dict = json.loads(json_value)
+            json_dict = self._api._codec.loads(json_value)
             return json_dict
         except ValueError:
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,239 @@
+from typing import Optional, Iterable, List, Tuple, Literal
+
+import os
+import itertools
+import gzip
+import json
+import time
+import tempfile
+import threading
+
+from . import config
+from .models.base import ObjectListModel, BaseModel
+from .endpoints import run_bulk
+
+class CapabilityTable:
+    """ Local table of capabilities, to choose a product, parcel type and options for a shipment without calling DHL.
+    The table is filled by sweeping "api.capabilities.get" over all combinations of sender type, countries and business/consumer receiver,
+    and stored gzipped on disk. Products, parcel types and options are stored once and referenced by every row that uses them.
+    Path: file to store the table in. If not given, the table only lives in memory.
+    Max_age: seconds after which a swept combination is stale. Stale or missing combinations are looked up live and added to the table.
+    """
+
+    def __init__(self, api: object, path: Optional[str] = None, max_age: float = config.CAPABILITY_TABLE_MAX_AGE) -> None:
+        self.api = api
+        self.path = path
+        self.max_age = max_age
+
+        self._values = [] # products, parcel types and option lists, referenced by their position
+        self._positions = {} # serialized value: position in "_values"
+        self._lanes = {} # key: { 'synced_at' : timestamp, 'rows' : [[rank, fromCountryCode, toCountryCode, product, parcelType, options], ...] }
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path): self.load()
+
+    def sweep(self,
+        senderTypes: Iterable[Literal['business', 'consumer', 'parcelShop']],
+        fromCountries: Iterable[str],
+        toCountries: Iterable[str],
+        toBusiness: Iterable[bool] = (True, False),
+        parcelTypes: Iterable[Optional[str]] = (None,),
+        max_in_flight: int = 4
+    ) -> int:
+
+        """ Retrieves the capabilities of every combination of the given values and adds them to the table. Combinations that were swept before are replaced.
+        With the default "parcelTypes", every combination is retrieved once for all parcel types; "resolve" filters the parcel type locally.
+        Returns the number of swept combinations. Raises a ValueError if one of the lookups fails, the table is not changed then.
+        """
+
+        keys = list(itertools.product(senderTypes, fromCountries, toCountries, toBusiness, parcelTypes))
+        lanes = {}
+
+        lookup = lambda key: self._get_live(*key)
+        for item in run_bulk(self.api, lookup, keys, max_in_flight):
+            if item.has_error: raise ValueError(f'Sweeping capabilities failed on {item.request}: {item.error.returned_content}')
+            lanes[item.request] = item.result
+
+        with self._lock:
+            for key, capabilities in lanes.items():
+                self._set_lane(key, capabilities)
+
+        if self.path: self.save()
+        return len(keys)
+
+    def resolve(self,
+        senderType: Literal['business', 'consumer', 'parcelShop'],
+        fromCountry: str,
+        toCountry: str,
+        toBusiness: bool,
+        parcelType: Optional[str] = None,
+        weight: Optional[float] = None,
+        options: Optional[List[str]] = None,
+        product: Optional[str] = None,
+        cheapest: bool = False
+    ) -> ObjectListModel:
+
+        """ Returns the allowed capabilities for a shipment, in the same form as "api.capabilities.get", best first.
+        The table is used when the combination was swept and is not stale, otherwise the capabilities are retrieved live and added to the table.
+        If the live call fails, stale capabilities are used if there are any, else the error is returned (or raised, if DHL can't be reached).
+        Weight: only parcel types that allow this weight, in kg. Options: only capabilities that offer all these option keys. Product: only this product key.
+        Cheapest: order by price without tax, instead of by the rank DHL gives.
+        """
+
+        key = (senderType, fromCountry, toCountry, toBusiness, parcelType)
+        rows = self._get_rows(key)
+
+        if rows is None:
+            rows = self._resolve_live(key)
+            if isinstance(rows, ObjectListModel): return rows # the error of the live call
+
+        values = self._values
+        found = []
+
+        for row in rows:
+            rank, fromCountryCode, toCountryCode, product_position, parcel_type_position, options_position = row
+            row_product, row_parcel_type, row_options = values[product_position], values[parcel_type_position], values[options_position]
+
+            if parcelType and row_parcel_type.get('key') != parcelType: continue
+            if product and row_product.get('key') != product: continue
+            if weight is not None and not row_parcel_type.get('minWeightKg', 0) <= weight <= row_parcel_type.get('maxWeightKg', weight): continue
+            if options and not set(options).issubset(option.get('key') for option in row_options): continue
+
+            found.append({ 'rank' : rank, 'fromCountryCode' : fromCountryCode, 'toCountryCode' : toCountryCode, 'product' : row_product, 'parcelType' : row_parcel_type, 'options' : list(row_options) })
+
+        if cheapest: found.sort(key=_price)
+
+        return self.api.capabilities._model_list(found)
+
+    def best(self, *args, **kwargs) -> BaseModel:
+        """ Returns the best capability for a shipment, or an empty object if none is allowed. Takes the same arguments as "resolve". """
+
+        capabilities = self.resolve(*args, **kwargs)
+        if capabilities.has_error: return BaseModel().set_error(returned_content=capabilities.error.returned_content, status=capabilities.error.status)
+
+        for capability in capabilities.items(): return capability
+        return BaseModel()
+
+    def save(self) -> None:
+        """ Writes the table to "path". The file is replaced atomically. """
+
+        if not self.path: raise ValueError('No path set to save the table to.')
+
+        with self._lock:
+            lanes = { '|'.join(_key_to_strings(key)) : lane for key, lane in self._lanes.items() }
+            content = json.dumps({ 'version' : 1, 'values' : self._values, 'lanes' : lanes }, separators=(',', ':')).encode()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'wb') as table_file:
+                table_file.write(gzip.compress(content))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+
+    def load(self) -> None:
+        """ Reads the table from "path". """
+
+        with open(self.path, 'rb') as table_file:
+            content = json.loads(gzip.decompress(table_file.read()))
+
+        values = content.get('values', [])
+
+        with self._lock:
+            self._values = values
+            self._positions = { _serialize(value) : position for position, value in enumerate(values) }
+            self._lanes = { _key_from_string(key) : lane for key, lane in content.get('lanes', {}).items() }
+
+    def combinations(self) -> dict:
+        """ Returns the combinations in the table, as (senderType, fromCountry, toCountry, toBusiness, parcelType), with the timestamp of their last sweep. """
+        return { key : lane['synced_at'] for key, lane in self._lanes.items() }
+
+    def __len__(self) -> int:
+        return len(self._lanes)
+
+    def _get_rows(self, key: tuple, stale: bool = False) -> Optional[list]:
+        """ Returns the rows of a combination, or None if it is missing or stale (unless "stale" is set).
+        A combination with a parcel type is also answered from the combination swept for all parcel types. """
+
+        lane = self._lanes.get(key) or self._lanes.get(key[:4] + (None,))
+        if lane is None: return None
+        if not stale and time.time() - lane['synced_at'] > self.max_age: return None
+
+        return lane['rows']
+
+    def _resolve_live(self, key: tuple) -> object:
+        """ Retrieves the capabilities of a combination live and stores them. Returns the rows, the stale rows if the call failed,
+        or the failed result if there are no stale rows. Connection errors are raised if there are no stale rows. """
+
+        try:
+            capabilities = self._get_live(*key)
+        except OSError: # DHL can't be reached
+            rows = self._get_rows(key, stale=True)
+            if rows is None: raise
+            return rows
+
+        if capabilities.has_error:
+            rows = self._get_rows(key, stale=True)
+            return rows if rows is not None else capabilities
+
+        with self._lock:
+            return self._set_lane(key, capabilities)
+
+    def _get_live(self, senderType: str, fromCountry: str, toCountry: str, toBusiness: bool, parcelType: Optional[str]) -> ObjectListModel:
+        return self.api.capabilities.get(senderType, fromCountry, toCountry, toBusiness, parcelType=parcelType)
+
+    def _set_lane(self, key: tuple, capabilities: ObjectListModel) -> list:
+        """ Stores the capabilities of a combination as rows, ordered by rank. Must be called while holding the lock. """
+
+        rows = []
+
+        for capability in capabilities.items():
+            capability = capability.to_dict()
+            rows.append([
+                capability.get('rank'),
+                capability.get('fromCountryCode'),
+                capability.get('toCountryCode'),
+                self._intern(capability.get('product') or {}),
+                self._intern(capability.get('parcelType') or {}),
+                self._intern(capability.get('options') or [])
+            ])
+
+        rows.sort(key=lambda row: row[0] if row[0] is not None else float('inf'))
+        self._lanes[key] = { 'synced_at' : time.time(), 'rows' : rows }
+
+        return rows
+
+    def _intern(self, value: object) -> int:
+        """ Returns the position of the value in "_values", adding it if it is new. """
+
+        serialized = _serialize(value)
+        position = self._positions.get(serialized)
+
+        if position is None:
+            position = len(self._values)
+            self._values.append(value)
+            self._positions[serialized] = position
+
+        return position
+
+def _serialize(value: object) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+def _price(capability: dict) -> Tuple[float, float]:
+    """ Sorts capabilities by price without tax, then by rank. Capabilities without a price come last. """
+
+    price = (capability['parcelType'].get('price') or {}).get('withoutTax')
+    rank = capability['rank'] if capability['rank'] is not None else float('inf')
+
+    return (price if price is not None else float('inf'), rank)
+
+def _key_to_strings(key: tuple) -> List[str]:
+    senderType, fromCountry, toCountry, toBusiness, parcelType = key
+    return [senderType, fromCountry, toCountry, 'true' if toBusiness else 'false', parcelType or '']
+
+def _key_from_string(key: str) -> tuple:
+    senderType, fromCountry, toCountry, toBusiness, parcelType = key.split('|')
+    return (senderType, fromCountry, toCountry, toBusiness == 'true', parcelType or None)
@@ -0,0 +1,85 @@
+from typing import Optional, Callable, Awaitable, Hashable
+
+import threading
+
+from .response_cache import normalize_params
+
+class _Call:
+    """ A request in flight, and the result or exception it ended with. """
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class RequestCoalescer:
+    """ Lets threads that make the same GET request at the same time share one request to DHL.
+    The first caller sends the request; callers with the same key that arrive while it is in flight wait for it and get the same response.
+    A request is only shared while it is in flight, nothing is kept afterwards.
+    Copy: called with the result for every caller that waited, so callers don't share (and can't change) each other's result.
+    """
+
+    def __init__(self, copy: Optional[Callable[[object], object]] = None) -> None:
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._copy = copy
+
+    def run(self, key: Hashable, func: Callable[[], object]) -> object:
+        """ Returns the result of "func", or of the call with the same key that is already in flight. Its exception is raised in every caller. """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader: call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None: raise call.error
+            return self._copy(call.result) if self._copy else call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+class AsyncRequestCoalescer:
+    """ Lets asyncio tasks that make the same GET request at the same time share one request to DHL.
+    The request runs in its own task, so cancelling one of the waiting callers doesn't cancel it for the others.
+    Copy: called with the result for every caller that waited, so callers don't share (and can't change) each other's result.
+    """
+
+    def __init__(self, copy: Optional[Callable[[object], object]] = None) -> None:
+        self._tasks = {}
+        self._copy = copy
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[object]]) -> object:
+        """ Returns the result of "func()", or of the call with the same key that is already in flight. Its exception is raised in every caller. """
+        import asyncio
+
+        task = self._tasks.get(key)
+        leader = task is None
+
+        if leader:
+            task = self._tasks[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda task: self._done(key, task))
+
+        result = await asyncio.shield(task)
+        return self._copy(result) if self._copy and not leader else result
+
+    def _done(self, key: Hashable, task: object) -> None:
+        if self._tasks.get(key) is task: del self._tasks[key]
+
+        # mark the exception as retrieved, in case all callers were cancelled
+        if not task.cancelled(): task.exception()
+
+def make_request_key(url: str, params: Optional[dict] = None, headers: Optional[dict] = None, **kwargs: dict) -> Hashable:
+    """ Builds the key of a GET request. Requests with the same url, query parameters (in any order), extra headers and options share a key. """
+
+    return (url, normalize_params(params), tuple(sorted(headers.items())) if headers else (), tuple(sorted(kwargs.items())))
@@ -0,0 +1,73 @@
+from typing import Union
+
+import json
+
+class JSONCodec:
+    """ Encodes request bodies and decodes responses. The default codec uses the json module of the standard library.
+    Subclass it and implement "dumps" and "loads" to use another JSON library.
+    """
+    
+    name = 'json'
+    
+    def dumps(self, value: object) -> bytes:
+        """ Encodes a value to JSON bytes, ready to be sent as request body. """
+        return json.dumps(value).encode('utf-8')
+    
+    def loads(self, data: Union[bytes, str]) -> object:
+        """ Decodes JSON from the raw response bytes. Raises a ValueError if the data is not valid JSON. """
+        return json.loads(data)
+
+class OrjsonCodec(JSONCodec):
+    """ Codec using orjson, which encodes directly to bytes and decodes from bytes without an intermediate str. """
+    
+    name = 'orjson'
+    
+    def __init__(self) -> None:
+        import orjson
+        self._orjson = orjson
+    
+    def dumps(self, value: object) -> bytes:
+        return self._orjson.dumps(value)
+    
+    def loads(self, data: Union[bytes, str]) -> object:
+        return self._orjson.loads(data)
+
+CODECS = {
+    'json' : JSONCodec,
+    'orjson' : OrjsonCodec
+}
+
+def get_codec(codec: Union[str, JSONCodec, None] = None) -> JSONCodec:
+    """ Returns a codec instance for the given name or instance.
+    Codec: 'json' (default), 'orjson', 'auto' (the fastest installed codec) or a JSONCodec instance.
+    """
+    
+    if isinstance(codec, JSONCodec): return codec
+    if codec is None: codec = 'json'
+    
+    if codec == 'auto':
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            return JSONCodec()
+    
+    if codec not in CODECS: raise ValueError(f'Unknown JSON codec "{codec}". Use one of: {", ".join(CODECS)}, auto.')
+    
+    try:
+        return CODECS[codec]()
+    except ImportError:
+        raise ImportError(f'The JSON codec "{codec}" is not installed. Install it with: pip install {codec}')
+
+def copy_json(value: object) -> object:
+    """ Returns a copy of decoded JSON content that shares no dicts or lists with it. Other values (str, numbers, bytes) can't be changed and are shared.
+    Used for content handed to more than one caller, such as cached and coalesced responses, so one caller changing it doesn't affect the others. """
+    
+    if isinstance(value, dict): return { key : copy_json(item) for key, item in value.items() }
+    if isinstance(value, list): return [copy_json(item) for item in value]
+    return value
+
+def copy_response(response: tuple) -> tuple:
+    """ Returns a copy of a (status, headers, content) response with its own content. """
+    
+    status, headers, content = response
+    return status, headers, copy_json(content)
@@ -1,4 +1,60 @@
-CACHE = {}
+import os
+
 BASE_URL = 'https://api-gw.dhlparcel.nl'
-AUTH_URL = 'https://api-gw.dhlparcel.nl/authenticate/api-key'
-REFRESH_TOKEN_URL = 'https://api-gw.dhlparcel.nl/authenticate/refresh-token'
\ No newline at end of file
+AUTH_PATH = 'authenticate/api-key'
+REFRESH_TOKEN_PATH = 'authenticate/refresh-token'
+AUTH_URL = f'{BASE_URL}/{AUTH_PATH}'
+REFRESH_TOKEN_URL = f'{BASE_URL}/{REFRESH_TOKEN_PATH}'
+
+# Connection pool settings, used by the HTTP session that is shared by all endpoints and the auth handler
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+POOL_BLOCK = False
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+ASYNC_MAX_CONNECTIONS = 100
+STREAM_CHUNK_SIZE = 64 * 1024
+TOKEN_EXPIRY_SKEW = 60
+
+# Default directory of the FileTokenStore, SQLiteTokenStore, HTTPCache and ShipmentOutbox: $DHLPARCEL_CACHE_DIR,
+# or "dhlparcel" in the user's cache directory ($XDG_CACHE_HOME or ~/.cache), so nothing is written into the installed package
+CACHE_DIR = os.environ.get('DHLPARCEL_CACHE_DIR') or os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'dhlparcel')
+TOKEN_STORE_DIR = CACHE_DIR
+
+# Defaults of the opt-in ResponseCache
+RESPONSE_CACHE_MAXSIZE = 1024
+RESPONSE_CACHE_TTL = 300
+
+# Defaults of the opt-in HTTPCache; expired responses are served for a day while they are revalidated in the background
+HTTP_CACHE_PATH = os.path.join(CACHE_DIR, 'http_cache.sqlite3')
+HTTP_CACHE_TTL = 60
+HTTP_CACHE_STALE_WHILE_REVALIDATE = 24 * 3600
+HTTP_CACHE_MEMO_SIZE = 128
+
+# Size of a grid cell of the ParcelShopIndex, in degrees
+PARCELSHOP_INDEX_CELL_SIZE = 0.05
+
+# Maximum number of connections of the HTTP/2 transport; every connection multiplexes many requests
+HTTP2_MAX_CONNECTIONS = 4
+
+# Defaults of the RateLimiter and RetryPolicy
+RATE_LIMIT = 10
+RATE_LIMIT_BURST = 10
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_MAX_BACKOFF = 30
+CAPABILITY_TABLE_MAX_AGE = 7 * 24 * 3600
+
+# Defaults of the ClientRegistry; the pool is shared by all accounts
+REGISTRY_MAX_CLIENTS = 100
+REGISTRY_IDLE_TIMEOUT = 15 * 60
+REGISTRY_MAX_CONCURRENCY = 8
+REGISTRY_POOL_MAXSIZE = 50
+
+# Defaults of the ShipmentOutbox
+OUTBOX_PATH = os.path.join(CACHE_DIR, 'outbox.sqlite3')
+OUTBOX_WORKERS = 2
+OUTBOX_RETRIES = 8
+OUTBOX_RETRY_MAX_BACKOFF = 300
+OUTBOX_LEASE_TIMEOUT = 300
+OUTBOX_POLL_INTERVAL = 1.0
@@ -1,5 +1,15 @@
-from dhlparcel.models.base import BaseModel
+from typing import Union, Optional, Callable, Iterable, Iterator
+from collections import deque
 
+import time
+
+from dhlparcel.models.base import BaseModel, ObjectListModel
+from dhlparcel.models.lazy import LazyModel, LazyObjectListModel
+from dhlparcel.models.rows import RowListModel
+from dhlparcel.instrumentation import ModelEvent
+from dhlparcel.models.bulk import BulkResult
+from dhlparcel.streaming import iter_json_items, next_link
+from dhlparcel import config
 
 
 class APIEndpoint:
@@ -17,11 +27,121 @@ class APIEndpoint:
         status, headers, resp_json = self.api.get(url)
         if status > 399: return BaseModel().set_error(returned_content=str(resp_json), status=status)
         
-        return BaseModel().construct_from_response(resp_json)
+        return self._model(resp_json)
+    
+    def _model(self, resp_data: dict) -> BaseModel:
+        """ Constructs an object from the response data. With "lazy_models" set on the connection, a LazyModel is returned. """
+        
+        start = time.perf_counter()
+        model = LazyModel() if self.api._lazy_models else BaseModel()
+        model = model.construct_from_response(resp_data)
+        
+        if self.api._hooks: self.api._hooks.on_model_build(ModelEvent(self.endpoint, type(model).__name__, 1, time.perf_counter() - start))
+        return model
+    
+    def _model_list(self, resp_data: Union[dict, list]) -> ObjectListModel:
+        """ Constructs a list of objects from the response data. With "row_lists" set on the connection, a RowListModel is returned,
+        with "lazy_models" set a LazyObjectListModel. """
+        
+        start = time.perf_counter()
+        if self.api._row_lists: model_list = RowListModel()
+        else: model_list = LazyObjectListModel() if self.api._lazy_models else ObjectListModel()
+        model_list = model_list.construct_from_response(resp_data)
+        
+        if self.api._hooks: self.api._hooks.on_model_build(ModelEvent(self.endpoint, type(model_list).__name__, len(resp_data) if isinstance(resp_data, list) else 1, time.perf_counter() - start))
+        return model_list
+    
+    def _iter_items(self, url: str, data: Optional[dict] = None) -> Iterator[BaseModel]:
+        """ Streams a list response and yields its objects one at a time, without loading the whole response in memory.
+        Paged responses are followed through the "next" link of their Link header. Raises a ValueError if DHL returns an error. """
+        
+        prepend_base_to_url = True
+        
+        while url:
+            response = self.api._stream(url, data, prepend_base_to_url=prepend_base_to_url)
+            
+            try:
+                if response.status_code > 399:
+                    raise ValueError(f'An error occured while listing "{self.endpoint}" (status {response.status_code}): {response.text}')
+                
+                for item in iter_json_items(response.iter_content(chunk_size=config.STREAM_CHUNK_SIZE)):
+                    yield self._model(item)
+                
+                url, data, prepend_base_to_url = self._next_page(next_link(response.headers))
+            finally:
+                response.close()
+    
+    def _next_page(self, link: Optional[str]) -> tuple:
+        """ Returns the url, data and "prepend_base_to_url" to request the next page. The link already holds the query, so no data is sent. """
+        
+        if not link: return None, None, True
+        
+        base_url = f'{self.api._base_url}/'
+        if link.startswith(base_url): return link[len(base_url):], None, True
+        if link.startswith('/'): return link.lstrip('/'), None, True
+        
+        return link, None, False
     
     def list(self):
         raise NotImplementedError('List is not implemented for this endpoint.')
     
     def create(self):
         raise NotImplementedError('Create is not implemented for this endpoint.')
-    
\ No newline at end of file
+    
+    def _run_bulk(self, func: Callable, items: Iterable, max_in_flight: int, ordered: bool = True) -> Iterator[BulkResult]:
+        return run_bulk(self.api, func, items, max_in_flight, ordered)
+
+def run_bulk(api: object, func: Callable, items: Iterable, max_in_flight: int, ordered: bool = True) -> Iterator[BulkResult]:
+    """ Calls "func" for every item, with at most "max_in_flight" calls running at the same time, sharing the connection "api".
+    Items are consumed lazily. Yields a BulkResult per item, in input order or in completion order.
+    A failing call does not abort the others: exceptions are turned into an error result, check "has_error" on each result.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    
+    if max_in_flight < 1: raise ValueError('"max_in_flight" must be at least 1.')
+    
+    # Authenticate once up front, so the workers don't all start their own auth flow
+    api._check_header_tokens()
+    
+    items = iter(enumerate(items))
+    
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = deque() if ordered else set()
+        
+        def submit_next() -> bool:
+            item = next(items, None)
+            if item is None: return False
+            
+            index, request = item
+            future = executor.submit(_run_one, func, index, request)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+            
+            return True
+        
+        while len(pending) < max_in_flight and submit_next(): pass
+        
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+            
+            for future in done:
+                submit_next()
+                yield future.result()
+
+def _run_one(func: Callable, index: int, request: object) -> BulkResult:
+    """ Runs a single call of a bulk operation. Exceptions are turned into an error result so the batch can continue. """
+    
+    start = time.perf_counter()
+    
+    try:
+        result = func(request)
+    except Exception as e:
+        result = BaseModel().set_error(returned_content=str(e), status=None)
+    
+    return BulkResult(index=index, request=request, result=result, elapsed=time.perf_counter() - start)
@@ -1,5 +1,4 @@
-from typing_extensions import Literal
-from typing import Optional
+from typing import Optional, Literal
 
 
 from .base import APIEndpoint
@@ -53,8 +52,8 @@ class CapabilityMethods(APIEndpoint):
         if referenceTimeStamp: data['referenceTimeStamp'] = referenceTimeStamp
         if quantity: data['quantity'] = quantity
         
-        status, headers, resp_json = self.api.get(url, data)
+        status, headers, resp_json = self.api.get(url, data, cache=self.endpoint)
         if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
         
-        return ObjectListModel().construct_from_response(resp_json)
+        return self._model_list(resp_json)
     
\ No newline at end of file
@@ -1,10 +1,12 @@
-from typing import Optional, Union
-from typing_extensions import Literal
-
+from typing import Optional, Union, BinaryIO, Iterable, Iterator, List, Literal
+from pathlib import Path
 
+import os
 
 from .base import APIEndpoint
+from dhlparcel import config
 from dhlparcel.models.base import ObjectListModel, BaseModel
+from dhlparcel.models.bulk import BulkResult
 
 class LabelMethods(APIEndpoint):
     
@@ -26,7 +28,118 @@ class LabelMethods(APIEndpoint):
         if data_format == 'pdf':
             return resp
         elif data_format == 'json':
-            return BaseModel().construct_from_response(resp)
+            return self._model(resp)
+    
+    def iter_content(self,
+        id: str,
+        chunk_size: int = config.STREAM_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        
+        """ Get a specific label by id as pdf, yielded in chunks of "chunk_size" bytes. The label is never fully loaded in memory.
+        Raises a ValueError if DHL returns an error. """
+        
+        response = self.api._stream(f'{self.endpoint}/{id}', headers={ 'Accept' : 'application/pdf' })
+        
+        try:
+            if response.status_code > 399:
+                raise ValueError(f'An error occured while downloading label "{id}" (status {response.status_code}): {response.text}')
+            
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk: yield chunk
+        finally:
+            response.close()
+    
+    def download(self,
+        id: str,
+        destination: Union[str, Path, BinaryIO],
+        chunk_size: int = config.STREAM_CHUNK_SIZE
+    ) -> BaseModel:
+        
+        """ Downloads a specific label by id as pdf and writes it in chunks to "destination", which is a path or a binary file object.
+        When writing to a path, the file is only put in place once the download is complete.
+        Returns an object with the "id", "destination" and "size" (in bytes) of the label. """
+        
+        response = self.api._stream(f'{self.endpoint}/{id}', headers={ 'Accept' : 'application/pdf' })
+        
+        try:
+            if response.status_code > 399: return BaseModel().set_error(returned_content=response.text, status=response.status_code)
+            
+            if hasattr(destination, 'write'):
+                size = self._write_chunks(response, destination, chunk_size)
+            else:
+                tmp_path = f'{destination}.part'
+                
+                try:
+                    with open(tmp_path, 'wb') as label_file:
+                        size = self._write_chunks(response, label_file, chunk_size)
+                    os.replace(tmp_path, destination)
+                except BaseException:
+                    if os.path.exists(tmp_path): os.remove(tmp_path)
+                    raise
+        finally:
+            response.close()
+        
+        return self._model({ 'id' : id, 'destination' : destination, 'size' : size })
+    
+    def get_many(self,
+        ids: Iterable[str],
+        directory: Optional[Union[str, Path]] = None,
+        zip_path: Optional[Union[str, Path]] = None,
+        max_in_flight: int = 8,
+        chunk_size: int = config.STREAM_CHUNK_SIZE
+    ) -> List[BulkResult]:
+        
+        """ Downloads many labels as pdf, with at most "max_in_flight" downloads running at the same time.
+        The labels are written to "directory" as "<id>.pdf", or added to the zip archive at "zip_path" as "<id>.pdf". One of both must be given.
+        An id that is not a plain file name (e.g. "../label") gets an error result, so no label is written outside the directory or archive.
+        Labels are streamed to disk in chunks, so memory stays bounded regardless of the number of labels.
+        Returns a BulkResult per label, in input order. A failing label does not abort the batch, check "has_error" on each result.
+        """
+        import tempfile
+        import zipfile
+        
+        if bool(directory) == bool(zip_path): raise ValueError('Use exactly one of "directory" or "zip_path".')
+        
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            download = lambda id: self.download(id, os.path.join(directory, self._file_name(id)), chunk_size)
+            return list(self._run_bulk(download, ids, max_in_flight))
+        
+        # Labels are downloaded concurrently to temporary files, and added to the archive one by one as they complete
+        results = []
+        
+        with tempfile.TemporaryDirectory() as tmp_dir, zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            download = lambda id: self.download(id, os.path.join(tmp_dir, self._file_name(id)), chunk_size)
+            
+            for item in self._run_bulk(download, ids, max_in_flight, ordered=False):
+                if not item.has_error:
+                    file_name = os.path.basename(item.result.destination)
+                    archive.write(item.result.destination, arcname=file_name)
+                    os.remove(item.result.destination)
+                    item.result.destination = f'{zip_path}:{file_name}'
+                
+                results.append(item)
+        
+        return sorted(results, key=lambda item: item.index)
+    
+    def _file_name(self, id: str) -> str:
+        """ Returns the file name of a label. Raises a ValueError if the id is not a plain file name, e.g. "../label". """
+        
+        id = str(id)
+        if id in ('', '.', '..') or '/' in id or '\\' in id or os.path.basename(id) != id: raise ValueError(f'Label id {id!r} can not be used as a file name.')
+        
+        return f'{id}.pdf'
+    
+    def _write_chunks(self, response: object, file: BinaryIO, chunk_size: int) -> int:
+        """ Writes the body of a streamed response to a file object. Returns the number of bytes written. """
+        
+        size = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if not chunk: continue
+            file.write(chunk)
+            size += len(chunk)
+        
+        return size
     
     def list(self,
         trackerCodeFilter: Optional[str] = None,
@@ -36,13 +149,33 @@ class LabelMethods(APIEndpoint):
         
         """ Lists all labels given by the choosen filter. """
         
+        data = self._list_query(trackerCodeFilter, orderReferenceFilter, shipmentId)
+        
+        status, headers, resp_json = self.api.get(self.endpoint, data)
+        if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
+        
+        return self._model_list(resp_json)
+    
+    def iter_list(self,
+        trackerCodeFilter: Optional[str] = None,
+        orderReferenceFilter: Optional[str] = None,
+        shipmentId: Optional[str] = None
+    ) -> Iterator[BaseModel]:
+        
+        """ Same as "list", but streams the response and yields the labels one at a time, so memory stays flat for large lookups. """
+        
+        return self._iter_items(self.endpoint, self._list_query(trackerCodeFilter, orderReferenceFilter, shipmentId))
+    
+    def _list_query(self, trackerCodeFilter: Optional[str], orderReferenceFilter: Optional[str], shipmentId: Optional[str]) -> dict:
         if not trackerCodeFilter and not orderReferenceFilter and not shipmentId:
             raise ValueError('You must use at least one of the following filters: "trackerCodeFilter", "orderReferenceFilter", "shipmentId". ')
         
-        status, headers, resp_json = self.api.get(self.endpoint)
-        if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
+        data = {}
+        if trackerCodeFilter: data['trackerCodeFilter'] = trackerCodeFilter
+        if orderReferenceFilter: data['orderReferenceFilter'] = orderReferenceFilter
+        if shipmentId: data['shipmentId'] = shipmentId
         
-        return ObjectListModel().construct_from_response(resp_json)
+        return data
     
     def create(self) -> DeprecationWarning:
-        raise DeprecationWarning('Create on the Label endpoint is deprecated. Use the Shipment endpoint to create a label. See: https://api-gw.dhlparcel.nl/docs/#/Shipments/createShipment')
\ No newline at end of file
+        raise DeprecationWarning('Create on the Label endpoint is deprecated. Use the Shipment endpoint to create a label. See: https://api-gw.dhlparcel.nl/docs/#/Shipments/createShipment')
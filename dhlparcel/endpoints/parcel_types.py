@@ -1,5 +1,4 @@
-from typing import Optional, List
-from typing_extensions import Literal
+from typing import Optional, List, Tuple, Iterator, Literal
 
 
 
@@ -26,6 +25,30 @@ class ParcelTypeMethods(APIEndpoint):
         
         """ Lists all parcel types given by the choosen filter. """
         
+        url, data = self._list_query(senderType, fromCountry, toCountry, toBusiness, businessUnit, fromPostalCode, toPostalCode, returnProduct, carrier, accountNumber)
+        
+        status, headers, resp_json = self.api.get(url, data, cache=self.endpoint)
+        if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
+        
+        return self._model_list(resp_json)
+    
+    def iter_list(self, *args, **kwargs) -> Iterator[BaseModel]:
+        """ Same as "list", and takes the same arguments, but streams the response and yields the parcel types one at a time. """
+        return self._iter_items(*self._list_query(*args, **kwargs))
+    
+    def _list_query(self,
+        senderType: Literal['business', 'consumer', 'parcelShop'],
+        fromCountry: str,
+        toCountry: Optional[str] = None,
+        toBusiness: Optional[bool] = None,
+        businessUnit: Optional[str] = None,
+        fromPostalCode: Optional[str] = None,
+        toPostalCode: Optional[str] = None,
+        returnProduct: Optional[bool] = None,
+        carrier: Optional[List[Literal['DHL-PARCEL', 'DHL-EXPRESS', 'SPEEDPACK']]] = None,
+        accountNumber: Optional[str] = None
+    ) -> Tuple[str, dict]:
+        
         url = f'{self.endpoint}/{senderType}/{fromCountry}'
         
         data = {}
@@ -36,9 +59,6 @@ class ParcelTypeMethods(APIEndpoint):
         if toBusiness: data['toBusiness'] = toBusiness
         if returnProduct: data['returnProduct'] = returnProduct
         if carrier: data['carrier'] = carrier
-        if accountNumber: data['toCountry'] = accountNumber
-
-        status, headers, resp_json = self.api.get(url)
-        if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
+        if accountNumber: data['accountNumber'] = accountNumber
         
-        return ObjectListModel().construct_from_response(resp_json)
\ No newline at end of file
+        return url, data
\ No newline at end of file
@@ -1,9 +1,9 @@
-from typing import Optional, List
-from typing_extensions import Literal
+from typing import Optional, List, Tuple, Iterable, Iterator, Literal
 
 
 from .base import APIEndpoint
 from dhlparcel.models.base import ObjectListModel, BaseModel
+from dhlparcel.models.parcelshop_store import ParcelShopStore, query_key
 
 class ParcelShopMethods(APIEndpoint):
     
@@ -22,7 +22,7 @@ class ParcelShopMethods(APIEndpoint):
         status, headers, resp_json = self.api.get(url)
         if status > 399: return BaseModel().set_error(returned_content=resp_json, status=status)
         
-        return BaseModel().construct_from_response(resp_json)
+        return self._model(resp_json)
         
     
     def list(self,
@@ -46,6 +46,78 @@ class ParcelShopMethods(APIEndpoint):
         
         """ Get a list of all parcelshops by country. Atleast one of the following filter needs to be used: "fuzzy", "postalCode", "street", "city", "houseNumber". """
         
+        url, data = self._list_query(countryCode, limit, longitude, latitude, radius, q, fuzzy, houseNumber, street, postalCode, city, showUnavailable, serviceType, isLocker, sameDepot, collectionTime)
+        
+        status, headers, resp_json = self.api.get(url, data)
+        if status > 399: return ObjectListModel().set_error(returned_content=resp_json, status=status)
+        
+        return self._model_list(resp_json)
+    
+    def iter_list(self, *args, **kwargs) -> Iterator[BaseModel]:
+        """ Same as "list", and takes the same arguments, but streams the response and yields the parcelshops one at a time. """
+        return self._iter_items(*self._list_query(*args, **kwargs))
+    
+    def list_many(self,
+        queries: Iterable[dict],
+        countryCode: Optional[str] = None,
+        max_in_flight: int = 8
+    ) -> ParcelShopStore:
+        
+        """ Looks up the parcelshops for many queries, with at most "max_in_flight" lookups running at the same time, and merges them into a ParcelShopStore.
+        Every query holds the arguments of "list", e.g. { 'countryCode' : 'NL', 'postalCode' : '3542AD' }; "countryCode" is used for queries without one.
+        Duplicate queries are only looked up once. Failed lookups don't abort the batch, they are kept in "failed" on the store.
+        No objects are built for the returned shops, they are added to the store as they come in.
+        """
+        
+        store = ParcelShopStore()
+        
+        def unique_queries() -> Iterator[dict]:
+            seen = set()
+            
+            for query in queries:
+                query = dict(query)
+                if countryCode and not query.get('countryCode'): query['countryCode'] = countryCode
+                
+                key = query_key(query)
+                if key in seen: continue
+                
+                seen.add(key)
+                yield query
+        
+        def lookup(query: dict) -> ObjectListModel:
+            status, headers, resp_json = self.api.get(*self._list_query(**query))
+            if status > 399: return ObjectListModel().set_error(returned_content=resp_json, status=status)
+            
+            # the decoded shops are passed on as they are, the store keeps what it needs
+            return ObjectListModel(resp_json if isinstance(resp_json, list) else [resp_json])
+        
+        for item in self._run_bulk(lookup, unique_queries(), max_in_flight, ordered=False):
+            if item.has_error:
+                store.failed.append((item.request, item.error))
+            else:
+                store.add(item.result.items(), item.request)
+        
+        return store
+    
+    def _list_query(self,
+        countryCode: str,
+        limit: Optional[int] = None,
+        longitude: Optional[float] = None,
+        latitude: Optional[float] = None,
+        radius: Optional[int] = None,
+        q: Optional[str] = None,
+        fuzzy: Optional[str] = None,
+        houseNumber: Optional[str] = None,
+        street: Optional[str] = None,
+        postalCode: Optional[str] = None,
+        city: Optional[str] = None,
+        showUnavailable: Optional[bool] = None,
+        serviceType: Optional[List[str]] = None,
+        isLocker: Optional[bool] = None,
+        sameDepot: Optional[bool] = None,
+        collectionTime: Optional[bool] = None,
+    ) -> Tuple[str, dict]:
+        
         if not fuzzy and not postalCode and not street and not city and not houseNumber:
             raise ValueError(' Atleast one of the following filter needs to be used: "fuzzy", "postalCode", "street", "city", "houseNumber"')
         
@@ -60,7 +132,6 @@ class ParcelShopMethods(APIEndpoint):
         if fuzzy: data['fuzzy'] = fuzzy
         if houseNumber: data['houseNumber'] = houseNumber
         if street: data['street'] = street
-        if zipCode: data['zipCode'] = zipCode
         if postalCode: data['postalCode'] = postalCode
         if city: data['city'] = city
         if showUnavailable: data['showUnavailable'] = showUnavailable
@@ -69,7 +140,4 @@ class ParcelShopMethods(APIEndpoint):
         if sameDepot: data['sameDepot'] = sameDepot
         if collectionTime: data['collectionTime'] = collectionTime
         
-        status, headers, resp_json = self.api.get(url, data)
-        if status > 399: return ObjectListModel().set_error(returned_content=resp_json, status=status)
-        
-        return ObjectListModel().construct_from_response(resp_json)
\ No newline at end of file
+        return url, data
\ No newline at end of file
@@ -1,7 +1,7 @@
-
+from typing import Iterator
 
 from .base import APIEndpoint
-from dhlparcel.models.base import ObjectListModel
+from dhlparcel.models.base import ObjectListModel, BaseModel
 
 class PickupAvailabilityMethods(APIEndpoint):
     
@@ -26,4 +26,13 @@ class PickupAvailabilityMethods(APIEndpoint):
         status, headers, resp_json = self.api.get(self.endpoint, data)
         if status > 399: return ObjectListModel().set_error(returned_content=resp_json, status=status)
         
-        return ObjectListModel().construct_from_response(resp_json)
\ No newline at end of file
+        return self._model_list(resp_json)
+    
+    def iter_list(self,
+        countryCode: str,
+        postalCode: str
+    ) -> Iterator[BaseModel]:
+        
+        """ Same as "list", but streams the response and yields the pickup availabilities one at a time. """
+        
+        return self._iter_items(self.endpoint, { 'countryCode' : countryCode, 'postalCode' : postalCode })
\ No newline at end of file
@@ -1,9 +1,8 @@
-from typing import Optional
-from typing_extensions import Literal
+from typing import Optional, Iterator, Literal
 
 
 from .base import APIEndpoint
-from dhlparcel.models.base import ObjectListModel
+from dhlparcel.models.base import ObjectListModel, BaseModel
 
 class ProductMethods(APIEndpoint):
     
@@ -20,6 +19,25 @@ class ProductMethods(APIEndpoint):
         
         """ List all products. """
         
+        data = self._list_query(businessUnit, fromCountry, toCountry, businessProduct, carrier)
+        
+        status, headers, resp_json = self.api.get(self.endpoint, data, cache=self.endpoint)
+        if status > 399: return ObjectListModel().set_error(returned_content=resp_json, status=status)
+        
+        return self._model_list(resp_json)
+    
+    def iter_list(self, *args, **kwargs) -> Iterator[BaseModel]:
+        """ Same as "list", and takes the same arguments, but streams the response and yields the products one at a time. """
+        return self._iter_items(self.endpoint, self._list_query(*args, **kwargs))
+    
+    def _list_query(self,
+        businessUnit: Optional[str] = None,
+        fromCountry: Optional[str] = None,
+        toCountry: Optional[str] = None,
+        businessProduct: Optional[bool] = None,
+        carrier: Optional[Literal['DHL-PARCEL', 'DHL-EXPRESS', 'SPEEDPACK']] = None
+    ) -> dict:
+        
         data = {}
         if businessUnit: data['businessUnit'] = businessUnit
         if fromCountry: data['fromCountry'] = fromCountry
@@ -27,7 +45,4 @@ class ProductMethods(APIEndpoint):
         if businessProduct: data['businessProduct'] = businessProduct
         if carrier: data['carrier'] = carrier
         
-        status, headers, resp_json = self.api.get(self.endpoint, data)
-        if status > 399: return ObjectListModel().set_error(returned_content=resp_json, status=status)
-        
-        return ObjectListModel().construct_from_response(resp_json)
\ No newline at end of file
+        return data
\ No newline at end of file
@@ -1,14 +1,19 @@
-from typing import Optional
-from typing_extensions import Literal
+from typing import Optional, Iterable, Iterator, Union, Literal
 
+import threading
 
 from .base import APIEndpoint
 from dhlparcel.models.base import BaseModel, ObjectListModel
+from dhlparcel.models.bulk import BulkResult
+from dhlparcel.shipment_builder import Shipment
+from dhlparcel.validation import ShipmentValidator
 
 class ShipmentMethods(APIEndpoint):
     
     def __init__(self, api: object) -> None:
         super().__init__(api, 'shipments')
+        self._validator = None
+        self._validator_lock = threading.Lock()
         
     def get_options(self,
         senderType: Literal['business', 'consumer', 'parcelShop'],
@@ -32,10 +37,10 @@ class ShipmentMethods(APIEndpoint):
         if accountNumber: data['accountNumber'] = accountNumber
         if toBusiness: data['toBusiness'] = toBusiness
         
-        status, headers, resp_json = self.api.get(url, data)
+        status, headers, resp_json = self.api.get(url, data, cache='shipment-options')
         if status > 399: return ObjectListModel().set_error(returned_content=str(resp_json), status=status)
 
-        return ObjectListModel().construct_from_response(resp_json)
+        return self._model_list(resp_json)
 
     
     def create(self,
@@ -52,7 +57,8 @@ class ShipmentMethods(APIEndpoint):
         returnLabel: Optional[bool] = None
     ) -> BaseModel:
         
-        """ Creates a new shipment. """
+        """ Creates a new shipment. With a "shipment_validator" set on the connection, the shipment is checked locally first;
+        an invalid shipment is not sent and returned with an error (status None) listing the problems. """
         
         accountId = accountId if accountId else self.api.accountNumber
     
@@ -71,7 +77,39 @@ class ShipmentMethods(APIEndpoint):
         if customsDeclaration: data['customsDeclaration'] = customsDeclaration
         if returnLabel: data['returnLabel'] = returnLabel
         
+        validator = self._get_validator()
+        
+        if validator:
+            errors = validator.validate(data)
+            if errors: return BaseModel().set_error(returned_content='Invalid shipment: ' + '; '.join(errors), status=None)
+        
         status, headers, resp_json = self.api.post(self.endpoint, data)
         if status > 399: return BaseModel().set_error(returned_content=str(resp_json), status=status)
         
-        return BaseModel().construct_from_response(resp_json)
\ No newline at end of file
+        return self._model(resp_json)
+    
+    def create_many(self,
+        shipments: Iterable[Union[dict, Shipment]],
+        max_in_flight: int = 8,
+        ordered: bool = True
+    ) -> Iterator[BulkResult]:
+        
+        """ Creates many shipments, with at most "max_in_flight" requests running at the same time.
+        Shipments: iterable of dicts with the same keys as the arguments of ".create()", or Shipment builders. It is consumed lazily.
+        Ordered: yield the results in input order (default) or in completion order.
+        Yields a BulkResult per shipment. A failing shipment does not abort the batch, check "has_error" on each result.
+        Keep "max_in_flight" at or below the "pool_maxsize" of the connection, so every request can reuse a pooled connection.
+        """
+        
+        return self._run_bulk(lambda shipment: self.create(**(shipment.to_dict() if isinstance(shipment, Shipment) else shipment)), shipments, max_in_flight, ordered)
+    
+    def _get_validator(self) -> Optional[ShipmentValidator]:
+        """ Returns the validator set on the connection. If it is set to True, a validator is built once from the business shipment options. """
+        
+        validator = self.api._shipment_validator
+        if validator is not True: return validator or None
+        
+        with self._validator_lock:
+            if self._validator is None: self._validator = ShipmentValidator.from_api(self.api)
+        
+        return self._validator
\ No newline at end of file
@@ -0,0 +1,260 @@
+from typing import Optional, Tuple, Callable, Iterable
+from collections import OrderedDict
+
+import os
+import json
+import threading
+import time
+
+from . import config
+from .response_cache import normalize_params
+from .transports import _Headers
+from .codecs import copy_json
+
+# States returned by "HTTPCache.lookup"
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+class CachedResponse:
+    """ A response stored by the HTTPCache, with the validators to revalidate it. """
+
+    __slots__ = ('key', 'endpoint', 'status', 'headers', 'body', 'stored_at', 'fresh_until')
+
+    def __init__(self, key: str, endpoint: str, status: int, headers: dict, body: bytes, stored_at: float, fresh_until: float) -> None:
+        self.key = key
+        self.endpoint = endpoint
+        self.status = status
+        self.headers = _Headers(headers)
+        self.body = body
+        self.stored_at = stored_at
+        self.fresh_until = fresh_until
+
+    def conditional_headers(self) -> dict:
+        """ Returns the If-None-Match and If-Modified-Since headers to revalidate the response with. """
+
+        headers = {}
+        if self.headers.get('ETag'): headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'): headers['If-Modified-Since'] = self.headers['Last-Modified']
+
+        return headers
+
+class HTTPCache:
+    """ Persistent HTTP cache for responses of reference-data endpoints (capabilities, products, parcel types, shipment options),
+    kept in a SQLite database so it survives restarts and can be shared by processes on the same host.
+    Responses are stored with their ETag and Last-Modified validators. A fresh response is served without calling DHL; an expired one is
+    revalidated with a conditional request, and a 304 Not Modified is served from disk. Within "stale_while_revalidate" seconds after
+    it expired, the stored response is served right away and revalidated in the background.
+    Responses are fresh for the max-age of their Cache-Control header, or else the TTL of their endpoint; "no-store" responses are not stored.
+    The decoded content of the most recently used responses is kept in memory, so serving them again doesn't parse the body again;
+    every caller gets its own copy of it.
+    TTL: default time to live in seconds.
+    TTLs: time to live per endpoint, e.g. { 'capabilities' : 3600 }.
+    """
+
+    def __init__(self,
+        path: Optional[str] = None,
+        ttl: float = config.HTTP_CACHE_TTL,
+        ttls: Optional[dict] = None,
+        stale_while_revalidate: float = config.HTTP_CACHE_STALE_WHILE_REVALIDATE,
+        memo_size: int = config.HTTP_CACHE_MEMO_SIZE
+    ) -> None:
+        self.path = path if path else config.HTTP_CACHE_PATH
+        self.ttl = ttl
+        self.ttls = ttls if ttls else {}
+        self.stale_while_revalidate = stale_while_revalidate
+        self.memo_size = memo_size
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._decoded = OrderedDict() # key: (stored_at, content)
+        self._revalidating = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, status INTEGER NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL, stored_at REAL NOT NULL, fresh_until REAL NOT NULL)')
+
+    def _connection(self) -> 'sqlite3.Connection':
+        """ Returns the connection of the current thread, sqlite connections can't be shared between threads. """
+        import sqlite3
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+
+        return connection
+
+    def make_key(self, scope: Iterable[str], url: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> str:
+        """ Builds the key of a request. The scope (base url and account number) keeps the responses of accounts sharing the cache apart. """
+
+        return json.dumps([list(scope), url, normalize_params(params), sorted(headers.items()) if headers else []])
+
+    def lookup(self, key: str) -> Tuple[Optional[CachedResponse], str]:
+        """ Returns the stored response of the request and its state: FRESH, STALE (may be served while it is revalidated) or EXPIRED.
+        The response is None if nothing is stored. """
+
+        row = self._connection().execute('SELECT key, endpoint, status, headers, body, stored_at, fresh_until FROM responses WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+
+        if row is None:
+            entry, state = None, EXPIRED
+        else:
+            entry = CachedResponse(*row[:3], json.loads(row[3]), *row[4:])
+            if now < entry.fresh_until: state = FRESH
+            elif now < entry.fresh_until + self.stale_while_revalidate: state = STALE
+            else: state = EXPIRED
+
+        with self._lock:
+            if state == FRESH: self.hits += 1
+            elif state == STALE: self.stale_hits += 1
+            else: self.misses += 1
+
+        return entry, state
+
+    def store(self, key: str, endpoint: str, status: int, headers: dict, body: bytes) -> Optional[CachedResponse]:
+        """ Stores a response. Returns the stored response, or None if the response may not be stored (no-store, or nothing to revalidate it with and no TTL). """
+
+        headers = { name.lower() : value for name, value in headers.items() }
+        freshness = self._freshness(endpoint, headers)
+
+        if freshness is None or (not freshness and 'etag' not in headers and 'last-modified' not in headers):
+            self.delete(key)
+            return None
+
+        now = time.time()
+        entry = CachedResponse(key, endpoint, status, headers, bytes(body), now, now + freshness)
+
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO responses (key, endpoint, status, headers, body, stored_at, fresh_until) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, endpoint, status, json.dumps(headers), entry.body, entry.stored_at, entry.fresh_until))
+
+        return entry
+
+    def refresh(self, entry: CachedResponse, headers: dict) -> CachedResponse:
+        """ Marks a stored response as fresh again after a 304 Not Modified, updating its headers with the ones of the 304. """
+
+        updated = dict(entry.headers)
+        updated.update((name.lower(), value) for name, value in headers.items() if name.lower() not in ('content-length', 'content-type', 'content-encoding', 'transfer-encoding'))
+
+        freshness = self._freshness(entry.endpoint, updated) or 0
+        entry = CachedResponse(entry.key, entry.endpoint, entry.status, updated, entry.body, entry.stored_at, time.time() + freshness)
+
+        with self._connection() as connection:
+            connection.execute('UPDATE responses SET headers = ?, fresh_until = ? WHERE key = ?', (json.dumps(updated), entry.fresh_until, entry.key))
+
+        with self._lock:
+            self.revalidated += 1
+
+        return entry
+
+    def content(self, entry: CachedResponse, loads: Callable[[bytes], object]) -> object:
+        """ Returns the decoded content of a stored response. JSON bodies are decoded with "loads" once, and kept in memory for later calls. """
+
+        with self._lock:
+            decoded = self._decoded.get(entry.key)
+            if decoded and decoded[0] == entry.stored_at:
+                self._decoded.move_to_end(entry.key)
+                return copy_json(decoded[1])
+
+        content = loads(entry.body) if entry.headers.get('Content-Type', '') == 'application/json' else entry.body
+        self.remember(entry, content)
+
+        return content
+
+    def remember(self, entry: CachedResponse, content: object) -> None:
+        """ Keeps a copy of the decoded content of a response in memory. """
+
+        if self.memo_size < 1: return
+        content = copy_json(content)
+
+        with self._lock:
+            self._decoded[entry.key] = (entry.stored_at, content)
+            self._decoded.move_to_end(entry.key)
+            while len(self._decoded) > self.memo_size: self._decoded.popitem(last=False)
+
+    def begin_revalidation(self, key: str) -> bool:
+        """ Returns True if no revalidation of the key is running yet, marking it as running. Call "end_revalidation" once it is done. """
+
+        with self._lock:
+            if key in self._revalidating: return False
+            self._revalidating.add(key)
+            return True
+
+    def end_revalidation(self, key: str) -> None:
+        with self._lock:
+            self._revalidating.discard(key)
+
+    def revalidate_in_background(self, key: str, revalidate: Callable[[], object]) -> bool:
+        """ Runs "revalidate" in a background thread, unless a revalidation of the key is already running. Returns whether it was started.
+        If it fails, the stale response stays stored and the next request revalidates it again. """
+
+        if not self.begin_revalidation(key): return False
+
+        def run() -> None:
+            try:
+                revalidate()
+            except Exception:
+                pass
+            finally:
+                self.end_revalidation(key)
+
+        threading.Thread(target=run, name='dhlparcel-revalidate', daemon=True).start()
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._connection() as connection:
+            connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+        with self._lock:
+            self._decoded.pop(key, None)
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """ Removes the stored responses of an endpoint, or all stored responses if no endpoint is given. """
+
+        with self._connection() as connection:
+            if endpoint is None:
+                connection.execute('DELETE FROM responses')
+            else:
+                connection.execute('DELETE FROM responses WHERE endpoint = ?', (endpoint,))
+
+        with self._lock:
+            self._decoded.clear()
+
+    def stats(self) -> dict:
+        """ Returns the statistics of the cache. Hits and stale hits were served from disk right away, revalidated responses after a 304. """
+
+        size = self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits' : self.hits,
+                'stale_hits' : self.stale_hits,
+                'revalidated' : self.revalidated,
+                'misses' : self.misses,
+                'size' : size,
+                'hit_rate' : (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            }
+
+    def _freshness(self, endpoint: str, headers: dict) -> Optional[float]:
+        """ Returns how long a response stays fresh, from its Cache-Control header or the TTL of the endpoint. None if it may not be stored. """
+
+        for directive in headers.get('cache-control', '').split(','):
+            name, _, value = directive.strip().lower().partition('=')
+
+            if name == 'no-store': return None
+            if name == 'no-cache': return 0
+            if name == 'max-age':
+                try:
+                    return max(int(value.strip('"')), 0)
+                except ValueError:
+                    return 0
+
+        return self.ttls.get(endpoint, self.ttl)
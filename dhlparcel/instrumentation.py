@@ -0,0 +1,278 @@
+from typing import Optional, Union, Iterable, Iterator
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import time
+
+class RequestEvent:
+    """ A single HTTP request made by a connection. Retries and the retry after a 401 are separate requests, see "attempt".
+    The same event is passed to "before_request" and "after_request".
+    Endpoint: first segment of the url below the base url, e.g. "shipments", also for absolute urls such as "next" links. Status: returned status code, None if the request failed; the exception is in "error".
+    Request_bytes / response_bytes: size of the sent and returned body. For streamed responses, the returned Content-Length is used.
+    Timings: seconds per phase:
+        - auth: getting or refreshing the access token before the request
+        - throttle: waiting for the rate limiter and the concurrency limiter
+        - send: connecting, sending and receiving the response
+        - server: time until the response headers were received (connect and server time), reported by the requests transport only
+        - decode: decoding the returned JSON
+        - total: all phases together
+    Context: free for hooks to keep state between "before_request" and "after_request", e.g. a span.
+    """
+
+    def __init__(self,
+        method=None,
+        url=None,
+        attempt=0,
+        base_url=None
+    ):
+
+        self.method = method
+        self.url = url
+        self.endpoint = get_endpoint(url, base_url)
+        self.attempt = attempt
+        self.status = None
+        self.error = None
+        self.request_bytes = 0
+        self.response_bytes = None
+        self.timings = {}
+        self.context = {}
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+    def set_response(self, response: object, elapsed: float, stream: bool = False) -> None:
+        """ Records the status, size and timings of the returned response. """
+
+        self.status = response.status_code
+        self.timings['send'] = elapsed
+
+        if stream:
+            length = response.headers.get('Content-Length')
+            self.response_bytes = int(length) if length and length.isdigit() else None
+        else:
+            self.response_bytes = len(response.content)
+
+        # requests measures the time until the response headers were parsed, httpx only the full exchange
+        if type(response).__module__ == 'requests.models': self.timings['server'] = response.elapsed.total_seconds()
+
+    def set_error(self, error: Exception, elapsed: float) -> None:
+        """ Records a request that failed without a response, e.g. a connection error or timeout. """
+
+        self.error = error
+        self.timings['send'] = elapsed
+
+    def finish(self) -> None:
+        """ Sets the total time of the request, including the time spent on authentication. """
+        self.timings['total'] = time.perf_counter() - self._start + self.timings.get('auth', 0.0)
+
+class AuthEvent:
+    """ A call to DHL to get new tokens.
+    Kind: "api-key" when authenticating with user_id and key, "refresh-token" when renewing with the refresh token.
+    Status: returned status code, None if the call failed without a response. Error: the exception if the call failed.
+    """
+
+    def __init__(self,
+        kind=None,
+        user_id=None
+    ):
+
+        self.kind = kind
+        self.user_id = user_id
+        self.status = None
+        self.error = None
+        self.elapsed = None
+        self.started_at = time.time()
+
+class ModelEvent:
+    """ Construction of the returned object(s) from the decoded response.
+    Model: class name of the constructed object. Items: number of objects constructed from the response.
+    """
+
+    def __init__(self,
+        endpoint=None,
+        model=None,
+        items=None,
+        elapsed=None
+    ):
+
+        self.endpoint = endpoint
+        self.model = model
+        self.items = items
+        self.elapsed = elapsed
+        self.started_at = time.time() - elapsed if elapsed else time.time()
+
+class Instrumentation:
+    """ Base class for instrumentation hooks. Subclass it and override the hooks you need; they are called synchronously
+    from the thread (or event loop) that makes the request, so they should be quick and must not raise.
+    """
+
+    def before_request(self, event: RequestEvent) -> None:
+        """ Called right before a request is sent. """
+        pass
+
+    def after_request(self, event: RequestEvent) -> None:
+        """ Called after a request returned a response or failed. """
+        pass
+
+    def on_auth(self, event: AuthEvent) -> None:
+        """ Called after a call to get new tokens. """
+        pass
+
+    def on_model_build(self, event: ModelEvent) -> None:
+        """ Called after the returned object(s) were constructed. """
+        pass
+
+class Hooks(Instrumentation):
+    """ Calls the hooks of several instrumentations, in order. """
+
+    def __init__(self, instrumentations: Iterable[Instrumentation]) -> None:
+        self.instrumentations = list(instrumentations)
+
+    def before_request(self, event: RequestEvent) -> None:
+        for instrumentation in self.instrumentations: instrumentation.before_request(event)
+
+    def after_request(self, event: RequestEvent) -> None:
+        event.finish()
+        for instrumentation in self.instrumentations: instrumentation.after_request(event)
+
+    def on_auth(self, event: AuthEvent) -> None:
+        for instrumentation in self.instrumentations: instrumentation.on_auth(event)
+
+    def on_model_build(self, event: ModelEvent) -> None:
+        for instrumentation in self.instrumentations: instrumentation.on_model_build(event)
+
+def get_endpoint(url: Optional[str], base_url: Optional[str] = None) -> Optional[str]:
+    """ Returns the endpoint of a url, the first segment of its path below the base url, e.g. "shipments" for "shipments/<id>".
+    Urls are relative to the base url, except the absolute "next" links of paged responses. """
+
+    if not url: return None
+
+    if '://' in url:
+        url = url[len(base_url):] if base_url and url.startswith(f'{base_url}/') else urlsplit(url).path
+
+    return url.lstrip('/').split('?', 1)[0].split('/', 1)[0]
+
+def get_hooks(instrumentation: Union[Instrumentation, Iterable[Instrumentation], None]) -> Optional[Hooks]:
+    """ Returns the hooks for the given instrumentation or list of instrumentations, or None if there is nothing to call. """
+
+    if not instrumentation: return None
+    if isinstance(instrumentation, Instrumentation): instrumentation = [instrumentation]
+
+    return Hooks(instrumentation)
+
+@contextmanager
+def track_auth(hooks: Optional[Hooks], kind: str, user_id: str) -> Iterator[AuthEvent]:
+    """ Times a call to get new tokens and passes it to the "on_auth" hooks, also when the call fails. """
+
+    event = AuthEvent(kind=kind, user_id=user_id)
+    start = time.perf_counter()
+
+    try:
+        yield event
+    except Exception as e:
+        event.error = e
+        raise
+    finally:
+        event.elapsed = time.perf_counter() - start
+        if hooks: hooks.on_auth(event)
+
+class PrometheusInstrumentation(Instrumentation):
+    """ Exposes Prometheus counters and histograms, labelled by endpoint. Requires "prometheus_client".
+    Metrics (with the default namespace):
+        - dhlparcel_requests_total: requests by endpoint, method and status ("error" when no response was returned)
+        - dhlparcel_request_duration_seconds: request timings by endpoint, method and phase
+        - dhlparcel_request_bytes_total: sent and received bytes by endpoint and direction
+        - dhlparcel_auth_total / dhlparcel_auth_duration_seconds: token calls by kind and status
+        - dhlparcel_model_build_duration_seconds: object construction time by endpoint
+    """
+
+    def __init__(self, registry: Optional[object] = None, namespace: str = 'dhlparcel', buckets: Optional[Iterable[float]] = None) -> None:
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImportError('The Prometheus instrumentation requires "prometheus_client". Install it with: pip install python-dhlparcel-api[prometheus]')
+
+        registry = registry if registry is not None else prometheus_client.REGISTRY
+        histogram_kwargs = { 'namespace' : namespace, 'registry' : registry }
+        if buckets: histogram_kwargs['buckets'] = tuple(buckets)
+
+        self.requests = prometheus_client.Counter('requests', 'Requests made to the DHL Parcel API.', ['endpoint', 'method', 'status'], namespace=namespace, registry=registry)
+        self.request_duration = prometheus_client.Histogram('request_duration_seconds', 'Time spent per phase of a request to the DHL Parcel API.', ['endpoint', 'method', 'phase'], **histogram_kwargs)
+        self.request_bytes = prometheus_client.Counter('request_bytes', 'Bytes sent to and received from the DHL Parcel API.', ['endpoint', 'direction'], namespace=namespace, registry=registry)
+        self.auth = prometheus_client.Counter('auth', 'Calls to the DHL Parcel API to get new tokens.', ['kind', 'status'], namespace=namespace, registry=registry)
+        self.auth_duration = prometheus_client.Histogram('auth_duration_seconds', 'Time spent getting new tokens from the DHL Parcel API.', ['kind'], **histogram_kwargs)
+        self.model_build_duration = prometheus_client.Histogram('model_build_duration_seconds', 'Time spent constructing objects from responses.', ['endpoint'], **histogram_kwargs)
+
+    def after_request(self, event: RequestEvent) -> None:
+        status = str(event.status) if event.status is not None else 'error'
+        self.requests.labels(event.endpoint, event.method, status).inc()
+
+        for phase, seconds in event.timings.items():
+            self.request_duration.labels(event.endpoint, event.method, phase).observe(seconds)
+
+        if event.request_bytes: self.request_bytes.labels(event.endpoint, 'sent').inc(event.request_bytes)
+        if event.response_bytes: self.request_bytes.labels(event.endpoint, 'received').inc(event.response_bytes)
+
+    def on_auth(self, event: AuthEvent) -> None:
+        status = str(event.status) if event.status is not None else 'error'
+        self.auth.labels(event.kind, status).inc()
+        self.auth_duration.labels(event.kind).observe(event.elapsed)
+
+    def on_model_build(self, event: ModelEvent) -> None:
+        self.model_build_duration.labels(event.endpoint).observe(event.elapsed)
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    """ Records an OpenTelemetry span per request, token call and object construction. Requires "opentelemetry-api".
+    Request spans are client spans with the HTTP method, url, status code, sizes and the phase timings (as "dhlparcel.timing.<phase>") as attributes.
+    Without a "tracer", one is taken from the global tracer provider.
+    """
+
+    def __init__(self, tracer: Optional[object] = None) -> None:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError('The OpenTelemetry instrumentation requires "opentelemetry-api". Install it with: pip install python-dhlparcel-api[opentelemetry]')
+
+        self._trace = trace
+        self.tracer = tracer if tracer else trace.get_tracer('dhlparcel')
+
+    def before_request(self, event: RequestEvent) -> None:
+        attributes = { 'http.request.method' : event.method, 'url.path' : event.url, 'dhlparcel.endpoint' : event.endpoint }
+        if event.attempt: attributes['http.request.resend_count'] = event.attempt
+
+        event.context['span'] = self.tracer.start_span(f'DHL {event.method} {event.endpoint}', kind=self._trace.SpanKind.CLIENT, attributes=attributes)
+
+    def after_request(self, event: RequestEvent) -> None:
+        span = event.context.pop('span', None)
+        if span is None: return
+
+        if event.status is not None: span.set_attribute('http.response.status_code', event.status)
+        if event.request_bytes: span.set_attribute('http.request.body.size', event.request_bytes)
+        if event.response_bytes is not None: span.set_attribute('http.response.body.size', event.response_bytes)
+
+        for phase, seconds in event.timings.items():
+            span.set_attribute(f'dhlparcel.timing.{phase}', seconds)
+
+        if event.error is not None:
+            span.record_exception(event.error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(event.error)))
+        elif event.status > 399:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+
+        span.end()
+
+    def on_auth(self, event: AuthEvent) -> None:
+        span = self._start_span_at(f'DHL auth {event.kind}', event.started_at, { 'dhlparcel.auth.kind' : event.kind })
+
+        if event.status is not None: span.set_attribute('http.response.status_code', event.status)
+        if event.error is not None or (event.status and event.status > 399):
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(event.error) if event.error else None))
+
+        span.end(end_time=int((event.started_at + event.elapsed) * 1e9))
+
+    def on_model_build(self, event: ModelEvent) -> None:
+        span = self._start_span_at(f'DHL build {event.endpoint}', event.started_at, { 'dhlparcel.endpoint' : event.endpoint, 'dhlparcel.model' : event.model, 'dhlparcel.items' : event.items })
+        span.end(end_time=int((event.started_at + event.elapsed) * 1e9))
+
+    def _start_span_at(self, name: str, started_at: float, attributes: dict) -> object:
+        """ Starts a span for something that already happened, at the time it started. """
+        return self.tracer.start_span(name, start_time=int(started_at * 1e9), attributes=attributes)
@@ -8,17 +8,22 @@ class BaseModel:
         self.error = None
     
     def construct_from_response(self, resp_data: dict) -> 'BaseModel':
-        """ Construct an object from the returned response data. """
+        """ Construct an object from the returned response data. Nested dicts become child objects, e.g. "shop.address.city". """
         
         for key, value in resp_data.items():
             if isinstance(value, dict):
-                sub_object = self.construct_from_response(value)
+                sub_object = BaseModel().construct_from_response(value)
                 setattr(self, key, sub_object)
             else:
                 setattr(self, key, value)
         
         return self
     
+    def to_dict(self) -> dict:
+        """ Returns the fields of the object as a dict, the reverse of "construct_from_response". """
+        
+        return { key : value.to_dict() if isinstance(value, BaseModel) else value for key, value in self.__dict__.items() if key not in ('has_error', 'error') }
+    
     def set_error(self, returned_content: str, status: int) -> 'BaseModel':
         """ Sets the error flag to True and assigns the status code to it. """
         from .errors import Error
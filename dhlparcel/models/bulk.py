@@ -0,0 +1,23 @@
+from .base import BaseModel
+
+class BulkResult(BaseModel):
+    """ Result of a single item in a bulk call.
+    Index: position of the item in the input.
+    Request: the input that was sent for this item.
+    Result: the returned object. Check "has_error" on it, as on any other returned object.
+    Elapsed: time in seconds the call took.
+    """
+
+    def __init__(self,
+        index=None,
+        request=None,
+        result=None,
+        elapsed=None
+    ):
+        
+        self.index = index
+        self.request = request
+        self.result = result
+        self.elapsed = elapsed
+        self.has_error = result.has_error if result is not None else False
+        self.error = result.error if result is not None else None
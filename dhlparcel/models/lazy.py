@@ -0,0 +1,110 @@
+from typing import Union, Optional
+
+from .base import BaseModel, ObjectListModel
+
+class LazyModel:
+    """ Compact, lazy alternative to BaseModel. It keeps the decoded response and only creates child objects when they are accessed.
+    Attribute access works as on a BaseModel: missing attributes return None, nested dicts are returned as objects,
+    and lists of dicts are returned as lists of objects.
+    """
+    
+    __slots__ = ('_data', '_children', '_error')
+    
+    def __init__(self, data: Optional[dict] = None) -> None:
+        # Slots are set through object.__setattr__, to skip the (slower) custom __setattr__
+        object.__setattr__(self, '_data', data if data is not None else {})
+        object.__setattr__(self, '_children', None)
+        object.__setattr__(self, '_error', None)
+    
+    @property
+    def has_error(self) -> bool:
+        return self._error is not None
+    
+    @property
+    def error(self) -> object:
+        return self._error
+    
+    def construct_from_response(self, resp_data: dict) -> 'LazyModel':
+        """ Wraps the returned response data. Nothing is converted until it is accessed. """
+        
+        object.__setattr__(self, '_data', resp_data)
+        object.__setattr__(self, '_children', None)
+        return self
+    
+    def set_error(self, returned_content: str, status: int) -> 'LazyModel':
+        """ Sets the error flag to True and assigns the status code to it. """
+        from .errors import Error
+        object.__setattr__(self, '_error', Error(returned_content=returned_content, status=status))
+        
+        return self
+    
+    def to_dict(self) -> dict:
+        """ Returns the fields of the object as a dict. """
+        
+        if not self._children: return dict(self._data)
+        
+        data = dict(self._data)
+        for key, value in self._children.items():
+            data[key] = _unwrap(value)
+        
+        return data
+    
+    def __getattr__(self, name: str) -> object:
+        """ Gets called when an attribute is not a slot. Returns the field from the response, wrapped on first access, or None."""
+        
+        if name[0] == '_' and (name[:2] == '__' or name in LazyModel.__slots__): raise AttributeError(name)
+        
+        children = self._children
+        if children is not None and name in children: return children[name]
+        
+        value = self._data.get(name)
+        if value.__class__ is dict or value.__class__ is list:
+            value = _wrap(value)
+            self._set_child(name, value)
+        
+        return value
+    
+    def __setattr__(self, name: str, value: object) -> None:
+        """ Fields set on the object are kept next to the response data, which is never modified. """
+        
+        if name in LazyModel.__slots__: raise AttributeError(f'"{name}" can not be set.')
+        self._set_child(name, value)
+    
+    def _set_child(self, name: str, value: object) -> None:
+        if self._children is None: object.__setattr__(self, '_children', {})
+        self._children[name] = value
+    
+    def __getstate__(self) -> tuple:
+        return (self._data, self._children, self._error)
+    
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(LazyModel.__slots__, state):
+            object.__setattr__(self, name, value)
+    
+    def __dir__(self) -> list:
+        return sorted(set(self._data) | set(self._children or ()) | {'has_error', 'error'})
+    
+    def __repr__(self) -> str:
+        return f'LazyModel({self.to_dict()!r})'
+
+class LazyObjectListModel(ObjectListModel):
+    """ List of LazyModel objects. Only a small wrapper is created per item, the fields are converted when they are accessed. """
+    
+    def construct_from_response(self, json: Union[dict, list]) -> 'LazyObjectListModel':
+        """ Construct a list of lazy objects from the returned response data. """
+        
+        if isinstance(json, dict):
+            self.add(LazyModel(json))
+        elif isinstance(json, list):
+            self.list.extend(LazyModel(item) if isinstance(item, dict) else item for item in json)
+        
+        return self
+
+def _wrap(value: Union[dict, list]) -> Union[LazyModel, list]:
+    if isinstance(value, dict): return LazyModel(value)
+    return [_wrap(item) if isinstance(item, (dict, list)) else item for item in value]
+
+def _unwrap(value: object) -> object:
+    if isinstance(value, (LazyModel, BaseModel)): return value.to_dict()
+    if isinstance(value, list): return [_unwrap(item) for item in value]
+    return value
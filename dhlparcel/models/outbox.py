@@ -0,0 +1,32 @@
+from .base import BaseModel
+
+class OutboxEntry(BaseModel):
+    """ A shipment in a ShipmentOutbox.
+    State: "pending" (waiting to be sent, or for its next attempt), "sending", "sent" or "failed".
+    Attempts: number of attempts made so far.
+    Result: the created shipment, once it was sent.
+    Label_ids: the ids of the labels of the created shipment, one per piece.
+    Last_error: the error of the last failed attempt, also while the shipment is waiting for a retry. A failed entry has "has_error" set, with the error in "error".
+    Created_at, finished_at: timestamps of the submission and of the moment it was sent or gave up.
+    """
+
+    def __init__(self,
+        shipmentId=None,
+        state=None,
+        attempts=0,
+        result=None,
+        label_ids=None,
+        last_error=None,
+        created_at=None,
+        finished_at=None
+    ):
+
+        super().__init__()
+        self.shipmentId = shipmentId
+        self.state = state
+        self.attempts = attempts
+        self.result = result
+        self.label_ids = label_ids if label_ids else []
+        self.last_error = last_error
+        self.created_at = created_at
+        self.finished_at = finished_at
@@ -0,0 +1,189 @@
+from typing import Optional, Union, Iterable, List, TextIO
+from array import array
+from pathlib import Path
+
+import math
+import sys
+
+from ..response_cache import normalize_params
+
+# Columns of the store, in the order of "to_records" and "to_csv"
+FIELDS = ('id', 'name', 'shopType', 'street', 'number', 'postalCode', 'city', 'countryCode', 'latitude', 'longitude', 'isLocker', 'serviceTypes')
+
+LOCKER = 1
+
+class ParcelShopStore:
+    """ Deduplicated, columnar set of parcelshops, as returned by "api.parcelshops.list_many".
+    Every shop is stored once, however many lookups returned it: ids and text fields in lists (repeated values such as cities are interned),
+    coordinates in arrays of doubles, the locker flag in an array of bytes and the service types as integer bitmasks. For every lookup, only the positions
+    of its shops and their distance are kept, so memory grows with the number of unique shops.
+    Failed: the lookups that failed, as (query, error).
+    """
+
+    def __init__(self) -> None:
+        self.ids = []
+        self.names = []
+        self.shop_types = []
+        self.streets = []
+        self.numbers = []
+        self.postal_codes = []
+        self.cities = []
+        self.country_codes = []
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.flags = array('B')
+        self.service_types = [] # bit n set: the shop offers "service_type_names[n]"; Python ints, so there is no limit on the number of service types
+        self.service_type_names = []
+        self.failed = []
+
+        self._positions = {} # shop id: position in the columns
+        self._service_type_bits = {}
+        self._lookups = {} # query key: (positions, distances)
+
+    def add(self, shops: Iterable[dict], query: Optional[dict] = None) -> None:
+        """ Adds the shops returned by a lookup, with the query (the arguments of "api.parcelshops.list") of the lookup.
+        Shops that are already in the store are only linked to the lookup. """
+
+        positions = array('I')
+        distances = array('i')
+
+        for shop in shops:
+            position = self._positions.get(shop.get('id'))
+            if position is None: position = self._append(shop)
+
+            positions.append(position)
+            distances.append(int(shop['distance']) if shop.get('distance') is not None else -1)
+
+        if query is not None: self._lookups[query_key(query)] = (positions, distances)
+
+    def get(self, id: str) -> Optional[dict]:
+        """ Returns a shop as a dict with the fields of FIELDS, or None if it is not in the store. """
+
+        position = self._positions.get(id)
+        return self._record(position) if position is not None else None
+
+    def shops_for(self, query: dict) -> List[dict]:
+        """ Returns the shops of a lookup, in the order DHL returned them, each with the "distance" DHL returned (in meters, -1 if none).
+        An empty list is returned for a lookup that returned no shops, failed or was not made. """
+
+        positions, distances = self._lookups.get(query_key(query), ((), ()))
+        return [dict(self._record(position), distance=distance) for position, distance in zip(positions, distances)]
+
+    def lookups(self) -> List[dict]:
+        """ Returns the queries of the lookups that succeeded. """
+        return [dict(params, countryCode=countryCode) for countryCode, params in self._lookups]
+
+    def to_records(self, fields: Optional[Iterable[str]] = None) -> List[dict]:
+        """ Returns every shop as a dict with the given fields, all fields of FIELDS by default. """
+
+        fields = self._check_fields(fields)
+        return [{ field : record[field] for field in fields } for record in map(self._record, range(len(self.ids)))]
+
+    def to_csv(self, destination: Union[str, Path, TextIO], fields: Optional[Iterable[str]] = None) -> int:
+        """ Writes every shop as a row to "destination", a path or a text file object, with a header row. Service types are joined with "|".
+        Returns the number of written shops. """
+        import csv
+
+        fields = self._check_fields(fields)
+
+        def write(csv_file: TextIO) -> None:
+            writer = csv.writer(csv_file)
+            writer.writerow(fields)
+
+            for position in range(len(self.ids)):
+                record = self._record(position)
+                record['serviceTypes'] = '|'.join(record['serviceTypes'])
+                writer.writerow([record[field] for field in fields])
+
+        if hasattr(destination, 'write'):
+            write(destination)
+        else:
+            with open(destination, 'w', newline='', encoding='utf-8') as csv_file:
+                write(csv_file)
+
+        return len(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._positions
+
+    def _append(self, shop: dict) -> int:
+        position = len(self.ids)
+        address = shop.get('address') or {}
+        location = shop.get('geoLocation') or {}
+        latitude, longitude = location.get('latitude'), location.get('longitude')
+
+        self.ids.append(shop.get('id'))
+        self.names.append(shop.get('name'))
+        self.shop_types.append(_intern(shop.get('shopType')))
+        self.streets.append(_intern(address.get('street')))
+        self.numbers.append(address.get('number'))
+        self.postal_codes.append(_intern(address.get('zipCode') or address.get('postalCode')))
+        self.cities.append(_intern(address.get('city')))
+        self.country_codes.append(_intern(address.get('countryCode')))
+        self.latitudes.append(latitude if latitude is not None else math.nan)
+        self.longitudes.append(longitude if longitude is not None else math.nan)
+        self.flags.append(LOCKER if is_locker(shop) else 0)
+        self.service_types.append(self._service_type_mask(shop.get('serviceTypes') or ()))
+
+        self._positions[shop.get('id')] = position
+        return position
+
+    def _service_type_mask(self, service_types: Iterable[str]) -> int:
+        mask = 0
+
+        for service_type in service_types:
+            bit = self._service_type_bits.get(service_type)
+
+            if bit is None:
+                bit = len(self.service_type_names)
+                self.service_type_names.append(service_type)
+                self._service_type_bits[service_type] = bit
+
+            mask |= 1 << bit
+
+        return mask
+
+    def _record(self, position: int) -> dict:
+        latitude, longitude, mask = self.latitudes[position], self.longitudes[position], self.service_types[position]
+
+        return {
+            'id' : self.ids[position],
+            'name' : self.names[position],
+            'shopType' : self.shop_types[position],
+            'street' : self.streets[position],
+            'number' : self.numbers[position],
+            'postalCode' : self.postal_codes[position],
+            'city' : self.cities[position],
+            'countryCode' : self.country_codes[position],
+            'latitude' : latitude if not math.isnan(latitude) else None,
+            'longitude' : longitude if not math.isnan(longitude) else None,
+            'isLocker' : bool(self.flags[position] & LOCKER),
+            'serviceTypes' : [name for bit, name in enumerate(self.service_type_names) if mask & (1 << bit)]
+        }
+
+    def _check_fields(self, fields: Optional[Iterable[str]]) -> tuple:
+        if fields is None: return FIELDS
+
+        fields = tuple(fields)
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown: raise ValueError(f'Unknown fields: {", ".join(unknown)}. Available fields: {", ".join(FIELDS)}.')
+
+        return fields
+
+def query_key(query: dict) -> tuple:
+    """ Returns the key of a lookup: the same for queries with the same country and filters, in any order and however booleans and lists are passed. """
+
+    params = dict(query)
+    return (params.pop('countryCode', None), normalize_params(params))
+
+def is_locker(shop: dict) -> bool:
+    """ Parcel lockers are returned as shops with shopType "packStation". """
+
+    if 'isLocker' in shop: return bool(shop['isLocker'])
+    return shop.get('shopType') == 'packStation'
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
@@ -0,0 +1,206 @@
+from typing import Union, Optional, Callable, Iterable, List, Dict
+from array import array
+
+import math
+
+from .base import ObjectListModel
+from .lazy import LazyModel
+
+class RowListModel(ObjectListModel):
+    """ Queryable list that keeps the decoded rows of the response once, instead of an object per item.
+    "filter", "sort" and "group_by" return views on the same rows (only the positions of the matching rows are stored),
+    and "project" picks the fields that are exported. Nothing is created per item until "items()" is called,
+    which returns LazyModel objects as before, so existing callers keep working.
+    Fields are keys of the rows, or paths to nested keys such as "address.city" or "parcelType.price.withoutTax".
+    """
+
+    def __init__(self, rows: Optional[list] = None, positions: Optional[array] = None, fields: Optional[tuple] = None, shared: bool = False) -> None:
+        self.has_error = False
+        self.error = None
+
+        self._rows = rows if rows is not None else []
+        self._positions = positions # None for all rows, otherwise the positions of the rows in this view
+        self._fields = fields
+        self._shared = shared # True while the rows are shared with other lists or views
+        self._items = None
+
+    @property
+    def list(self) -> list:
+        """ The objects of the rows, created on first access. """
+
+        if self._items is None: self._items = [LazyModel(row) if isinstance(row, dict) else row for row in self.rows()]
+        return self._items
+
+    def construct_from_response(self, json: Union[dict, list]) -> 'RowListModel':
+        """ Keeps the decoded response as the rows of the list. """
+
+        self._rows = json if isinstance(json, list) else [json]
+        self._positions = None
+        self._shared = False
+        self._items = None
+
+        return self
+
+    def add(self, item: object) -> list:
+        self._own_rows()
+        self._rows.append(item.to_dict() if hasattr(item, 'to_dict') else item)
+        if self._items is not None: self._items.append(item)
+
+        return self.list
+
+    def remove(self, item: object) -> list:
+        index = self.list.index(item)
+
+        self._own_rows()
+        del self._rows[index]
+        del self._items[index]
+
+        return self.list
+
+    def rows(self) -> List[dict]:
+        """ Returns the decoded rows of this view. They are shared with the list they came from, so don't change them. """
+
+        if self._positions is None: return self._rows
+        return [self._rows[position] for position in self._positions]
+
+    def filter(self, condition: Union[Callable[[dict], bool], dict]) -> 'RowListModel':
+        """ Returns a view on the rows that match the condition: a function that gets the decoded row,
+        or a dict of fields and the value they must equal, or a function the value must pass, e.g. { 'address.city' : 'Utrecht', 'distance' : lambda distance: distance < 1000 }. """
+
+        if isinstance(condition, dict):
+            checks = [(_getter(field), value) for field, value in condition.items()]
+            condition = lambda row: all(value(get(row)) if callable(value) else get(row) == value for get, value in checks)
+
+        rows = self._rows
+        return self._view(array('I', (position for position in self._iter_positions() if condition(rows[position]))))
+
+    def sort(self, *fields: str, reverse: bool = False) -> 'RowListModel':
+        """ Returns a view on the rows, sorted by the given fields. Rows without a value come last. """
+
+        if not fields: raise ValueError('Give at least one field to sort on.')
+
+        getters = [_getter(field) for field in fields]
+        rows = self._rows
+
+        def key(position: int) -> tuple:
+            row = rows[position]
+            return tuple(_sort_key(get(row), reverse) for get in getters)
+
+        return self._view(array('I', sorted(self._iter_positions(), key=key, reverse=reverse)))
+
+    def group_by(self, field: str) -> Dict[object, 'RowListModel']:
+        """ Returns a view per value of the field, in the order the values are first found. List values are turned into tuples. """
+
+        get = _getter(field)
+        rows = self._rows
+        groups = {}
+
+        for position in self._iter_positions():
+            value = get(rows[position])
+            if isinstance(value, list): value = tuple(value)
+            groups.setdefault(value, array('I')).append(position)
+
+        return { value : self._view(positions) for value, positions in groups.items() }
+
+    def project(self, *fields: str) -> 'RowListModel':
+        """ Returns a view that exports only the given fields, in this order. """
+
+        if not fields: raise ValueError('Give at least one field to project.')
+
+        self._shared = True
+        return RowListModel(self._rows, self._positions, tuple(fields), shared=True)
+
+    def values(self, field: str) -> list:
+        """ Returns the values of a single field. """
+
+        get = _getter(field)
+        return [get(row) for row in self.rows()]
+
+    def to_tuples(self, *fields: str) -> List[tuple]:
+        """ Returns a tuple per row with the given fields, or the projected fields. """
+
+        getters = [_getter(field) for field in self._export_fields(fields)]
+        return [tuple(get(row) for get in getters) for row in self.rows()]
+
+    def to_dicts(self, *fields: str) -> List[dict]:
+        """ Returns a dict per row with the given fields, or the projected fields. Without fields, copies of the rows are returned. """
+
+        fields = fields or self._fields
+        if not fields: return [dict(row) for row in self.rows()]
+
+        getters = [(field, _getter(field)) for field in fields]
+        return [{ field : get(row) for field, get in getters } for row in self.rows()]
+
+    def to_arrays(self, *fields: str) -> Dict[str, Union[array, list]]:
+        """ Returns a column per field: an array of doubles for numeric fields (missing values are NaN), a list for other fields. """
+
+        columns = {}
+
+        for field in self._export_fields(fields):
+            values = self.values(field)
+
+            if all(value is None or (type(value) in (int, float)) for value in values) and any(value is not None for value in values):
+                columns[field] = array('d', (math.nan if value is None else value for value in values))
+            else:
+                columns[field] = values
+
+        return columns
+
+    def to_dataframe(self, *fields: str) -> 'pandas.DataFrame':
+        """ Returns a pandas DataFrame with a column per field. Requires "pandas". """
+
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError('"to_dataframe" requires "pandas". Install it with: pip install python-dhlparcel-api[pandas]')
+
+        fields = self._export_fields(fields)
+        return pandas.DataFrame.from_records(self.to_tuples(*fields), columns=list(fields))
+
+    def __len__(self) -> int:
+        return len(self._rows) if self._positions is None else len(self._positions)
+
+    def __repr__(self) -> str:
+        return f'RowListModel({len(self)} rows)'
+
+    def _view(self, positions: array) -> 'RowListModel':
+        self._shared = True
+        return RowListModel(self._rows, positions, self._fields, shared=True)
+
+    def _iter_positions(self) -> Iterable[int]:
+        return range(len(self._rows)) if self._positions is None else self._positions
+
+    def _export_fields(self, fields: tuple) -> tuple:
+        fields = fields or self._fields
+        if not fields: raise ValueError('Give the fields to export, or "project" them first.')
+        return fields
+
+    def _own_rows(self) -> None:
+        """ Gives this list its own rows before it is changed, so the lists and views it shares rows with are not affected. """
+
+        if self._shared or self._positions is not None:
+            self._rows = list(self.rows())
+            self._positions = None
+            self._shared = False
+
+def _getter(field: str) -> Callable[[dict], object]:
+    """ Returns a function that gets the value of a field or path from a row, or None if it is missing. """
+
+    if '.' not in field: return lambda row: row.get(field) if isinstance(row, dict) else None
+
+    keys = field.split('.')
+
+    def get(row: dict) -> object:
+        for key in keys:
+            if not isinstance(row, dict): return None
+            row = row.get(key)
+
+        return row
+
+    return get
+
+def _sort_key(value: object, reverse: bool) -> tuple:
+    """ Puts missing values last, also when sorting in reverse. """
+
+    missing = value is None
+    return (not missing if reverse else missing, value if not missing else 0)
@@ -0,0 +1,327 @@
+from typing import Optional, Union, List
+
+import os
+import json
+import threading
+import time
+
+from . import config
+from .models.base import BaseModel
+from .models.outbox import OutboxEntry
+from .shipment_builder import Shipment
+from .throttling import RateLimiter, RetryPolicy
+
+# States of the shipments in the outbox
+PENDING = 'pending'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+
+class OutboxHandle:
+    """ Returned by "ShipmentOutbox.submit", to follow a submitted shipment. """
+
+    def __init__(self, outbox: 'ShipmentOutbox', shipmentId: str) -> None:
+        self.outbox = outbox
+        self.shipmentId = shipmentId
+
+    def entry(self) -> Optional[OutboxEntry]:
+        """ Returns the current state of the shipment. """
+        return self.outbox.get(self.shipmentId)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[OutboxEntry]:
+        """ Waits until the shipment was sent or failed, for at most "timeout" seconds. Returns its state then, check "state" on it. """
+        return self.outbox.wait(self.shipmentId, timeout)
+
+class ShipmentOutbox:
+    """ Durable queue of shipments to create, so a checkout doesn't wait for DHL. "submit" only stores the shipment in a local SQLite database
+    and returns a handle; worker threads send the stored shipments with "api.shipments.create" in the background.
+    Shipments are keyed on their shipmentId: submitting a shipment again returns the handle of the stored one. Failed attempts are retried
+    according to "retry", and an attempt after one that may have reached DHL (a timeout, a crash) first checks if the shipment exists,
+    so it is not created twice. Results, including the label ids, are stored for later retrieval.
+    Shipments that were not sent survive a crash of the process: they are picked up again by "start", or by the workers of another process
+    sharing the database once "lease_timeout" passed.
+    Rate_limiter: limits the rate at which the workers send shipments, on top of the rate limiter of the connection.
+    Retry: decides which failed attempts are retried and when, by default timeouts, connection errors, 408, 429 and 5xx responses.
+    """
+
+    def __init__(self,
+        api: object,
+        path: Optional[str] = None,
+        workers: int = config.OUTBOX_WORKERS,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        lease_timeout: float = config.OUTBOX_LEASE_TIMEOUT,
+        poll_interval: float = config.OUTBOX_POLL_INTERVAL
+    ) -> None:
+        if workers < 1: raise ValueError('"workers" must be at least 1.')
+
+        self.api = api
+        self.path = path if path else config.OUTBOX_PATH
+        self.workers = workers
+        self.rate_limiter = rate_limiter
+        self.retry = retry if retry else RetryPolicy(config.OUTBOX_RETRIES, max_backoff=config.OUTBOX_RETRY_MAX_BACKOFF, statuses=(408, 429, 500, 502, 503, 504), methods=('POST',))
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+
+        self._local = threading.local()
+        self._changed = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        with self._connection() as connection:
+            connection.execute('''CREATE TABLE IF NOT EXISTS shipments (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                shipment_id TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                claimed_at REAL,
+                result TEXT,
+                label_ids TEXT,
+                error TEXT,
+                error_status INTEGER,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )''')
+            connection.execute('CREATE INDEX IF NOT EXISTS shipments_state ON shipments (state, next_attempt_at)')
+
+    def _connection(self) -> 'sqlite3.Connection':
+        """ Returns the connection of the current thread, sqlite connections can't be shared between threads.
+        With synchronous=NORMAL, a commit doesn't wait for the disk; it survives a crash of the process, not of the host. """
+        import sqlite3
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+
+        return connection
+
+    def submit(self, shipment: Union[dict, Shipment]) -> OutboxHandle:
+        """ Stores a shipment to be sent by the workers. Shipment: a dict with the arguments of "api.shipments.create()", or a Shipment builder.
+        Returns a handle to follow the shipment. A shipment with the shipmentId of a stored one is not stored again. """
+
+        payload = shipment.to_dict() if isinstance(shipment, Shipment) else dict(shipment)
+        shipmentId = payload.get('shipmentId')
+        if not shipmentId: raise ValueError('A shipment needs a "shipmentId", the outbox and its retries are keyed on it.')
+
+        now = time.time()
+
+        with self._connection() as connection:
+            connection.execute('INSERT OR IGNORE INTO shipments (shipment_id, payload, state, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)',
+                (shipmentId, json.dumps(payload), PENDING, now, now))
+
+        self._notify()
+        return OutboxHandle(self, shipmentId)
+
+    def get(self, shipmentId: str) -> Optional[OutboxEntry]:
+        """ Returns the state of a shipment, or None if it is not in the outbox. """
+
+        row = self._connection().execute('SELECT shipment_id, state, attempts, result, label_ids, error, error_status, created_at, finished_at FROM shipments WHERE shipment_id = ?', (shipmentId,)).fetchone()
+        return _entry(row) if row else None
+
+    def entries(self, state: Optional[str] = None, limit: Optional[int] = None) -> List[OutboxEntry]:
+        """ Returns the shipments in the order they were submitted, optionally only those in the given state. """
+
+        query = 'SELECT shipment_id, state, attempts, result, label_ids, error, error_status, created_at, finished_at FROM shipments'
+        args = []
+
+        if state:
+            query += ' WHERE state = ?'
+            args.append(state)
+
+        query += ' ORDER BY seq'
+
+        if limit:
+            query += ' LIMIT ?'
+            args.append(limit)
+
+        return [_entry(row) for row in self._connection().execute(query, args)]
+
+    def wait(self, shipmentId: str, timeout: Optional[float] = None) -> Optional[OutboxEntry]:
+        """ Waits until a shipment was sent or failed, for at most "timeout" seconds. Returns its state then, or None if it is not in the outbox. """
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            entry = self.get(shipmentId)
+            if entry is None or entry.state in (SENT, FAILED): return entry
+
+            remaining = deadline - time.monotonic() if deadline is not None else self.poll_interval
+            if remaining <= 0: return entry
+
+            # other processes don't notify us, so check the database again at least every "poll_interval"
+            with self._changed:
+                self._changed.wait(min(remaining, self.poll_interval))
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """ Waits until no shipments are pending or being sent, for at most "timeout" seconds. Returns whether the outbox was drained. """
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            if not self._count(PENDING, SENDING): return True
+
+            remaining = deadline - time.monotonic() if deadline is not None else self.poll_interval
+            if remaining <= 0: return False
+
+            with self._changed:
+                self._changed.wait(min(remaining, self.poll_interval))
+
+    def stats(self) -> dict:
+        """ Returns the number of shipments per state. """
+
+        counts = dict(self._connection().execute('SELECT state, COUNT(*) FROM shipments GROUP BY state').fetchall())
+        return { state : counts.get(state, 0) for state in (PENDING, SENDING, SENT, FAILED) }
+
+    def purge(self, max_age: float = 0) -> int:
+        """ Removes the sent and failed shipments that finished more than "max_age" seconds ago. Returns the number of removed shipments. """
+
+        with self._connection() as connection:
+            return connection.execute('DELETE FROM shipments WHERE state IN (?, ?) AND finished_at <= ?', (SENT, FAILED, time.time() - max_age)).rowcount
+
+    def recover(self) -> int:
+        """ Marks the shipments that were being sent as pending again, e.g. after a crash. Their next attempt first checks if they were created.
+        Returns the number of recovered shipments. Don't call it while another process is sending shipments from the same database. """
+
+        with self._connection() as connection:
+            count = connection.execute('UPDATE shipments SET state = ?, claimed_at = NULL WHERE state = ?', (PENDING, SENDING)).rowcount
+
+        self._notify()
+        return count
+
+    def start(self, recover: bool = True) -> 'ShipmentOutbox':
+        """ Starts the worker threads. With "recover", the shipments that were being sent when the process stopped are picked up right away,
+        pass False when several processes send shipments from the same database. """
+
+        if self._threads: return self
+        if recover: self.recover()
+
+        self._stopping.clear()
+        self._threads = [threading.Thread(target=self._work, name=f'dhlparcel-outbox-{number}', daemon=True) for number in range(self.workers)]
+        for thread in self._threads: thread.start()
+
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """ Stops the worker threads once they finished the shipment they are sending. Shipments that were not sent stay in the outbox. """
+
+        self._stopping.set()
+        self._notify()
+
+        for thread in self._threads: thread.join(timeout)
+        self._threads = []
+
+    def __enter__(self) -> 'ShipmentOutbox':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            claimed = self._claim()
+
+            if claimed is None:
+                with self._changed:
+                    if not self._stopping.is_set(): self._changed.wait(self.poll_interval)
+                continue
+
+            self._send(*claimed)
+
+    def _claim(self) -> Optional[tuple]:
+        """ Takes the next due shipment, or one whose sender didn't finish within "lease_timeout", and marks it as being sent.
+        Returns (shipmentId, payload, attempt), or None. The transaction locks the database, so no two workers take the same shipment. """
+
+        now = time.time()
+        connection = self._connection()
+
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute('SELECT shipment_id, payload, attempts FROM shipments WHERE (state = ? AND next_attempt_at <= ?) OR (state = ? AND claimed_at < ?) ORDER BY seq LIMIT 1',
+                (PENDING, now, SENDING, now - self.lease_timeout)).fetchone()
+
+            if row is None: return None
+            connection.execute('UPDATE shipments SET state = ?, attempts = attempts + 1, claimed_at = ? WHERE shipment_id = ?', (SENDING, now, row[0]))
+
+        return row[0], json.loads(row[1]), row[2]
+
+    def _send(self, shipmentId: str, payload: dict, attempt: int) -> None:
+        """ Sends a shipment, "attempt" is the number of earlier attempts. After an attempt, DHL may have created the shipment even though
+        no response came back, so it is looked up before it is created again. """
+
+        if self.rate_limiter: self.rate_limiter.acquire()
+
+        try:
+            result = self._find(shipmentId) if attempt else None
+            if result is None: result = self.api.shipments.create(**payload)
+        except OSError as e: # connection errors and timeouts, the shipment may have been created
+            self._failed(shipmentId, attempt, repr(e), None)
+            return
+        except Exception as e: # e.g. a payload that doesn't match the arguments of "create", retrying won't help
+            self._finish(shipmentId, FAILED, error=repr(e))
+            return
+
+        if result.has_error and result.error.status is None: # rejected by the shipment validator, before it was sent
+            self._finish(shipmentId, FAILED, error=result.error.returned_content)
+        elif result.has_error:
+            self._failed(shipmentId, attempt, result.error.returned_content, result.error.status)
+        else:
+            result_data = result.to_dict()
+            label_ids = [piece.get('labelId') for piece in result_data.get('pieces') or () if isinstance(piece, dict) and piece.get('labelId')]
+            self._finish(shipmentId, SENT, result=json.dumps(result_data), label_ids=json.dumps(label_ids))
+
+    def _find(self, shipmentId: str) -> Optional[BaseModel]:
+        """ Returns the shipment if DHL already created it, or None if DHL doesn't know it (404).
+        Any other error of the lookup is returned as is: it doesn't tell whether the shipment exists, so the attempt is retried later. """
+
+        shipment = self.api.shipments.get(shipmentId)
+        if shipment.has_error and shipment.error.status == 404: return None
+
+        return shipment
+
+    def _failed(self, shipmentId: str, attempt: int, error: str, status: Optional[int]) -> None:
+        """ Schedules the next attempt of a shipment, or marks it as failed if the error is not retried or no retries are left. """
+
+        if not self.retry.should_retry('POST', attempt, status):
+            self._finish(shipmentId, FAILED, error=error, error_status=status)
+            return
+
+        with self._connection() as connection:
+            connection.execute('UPDATE shipments SET state = ?, claimed_at = NULL, next_attempt_at = ?, error = ?, error_status = ? WHERE shipment_id = ?',
+                (PENDING, time.time() + self.retry.get_delay(attempt), error, status, shipmentId))
+
+        self._notify()
+
+    def _finish(self, shipmentId: str, state: str, result: Optional[str] = None, label_ids: Optional[str] = None, error: Optional[str] = None, error_status: Optional[int] = None) -> None:
+        with self._connection() as connection:
+            connection.execute('UPDATE shipments SET state = ?, claimed_at = NULL, result = ?, label_ids = ?, error = ?, error_status = ?, finished_at = ? WHERE shipment_id = ?',
+                (state, result, label_ids, error, error_status, time.time(), shipmentId))
+
+        self._notify()
+
+    def _count(self, *states: str) -> int:
+        return self._connection().execute(f'SELECT COUNT(*) FROM shipments WHERE state IN ({", ".join("?" for _ in states)})', states).fetchone()[0]
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._changed.notify_all()
+
+def _entry(row: tuple) -> OutboxEntry:
+    shipmentId, state, attempts, result, label_ids, error, error_status, created_at, finished_at = row
+
+    entry = OutboxEntry(shipmentId, state, attempts,
+        result=BaseModel().construct_from_response(json.loads(result)) if result else None,
+        label_ids=json.loads(label_ids) if label_ids else None,
+        last_error=error,
+        created_at=created_at,
+        finished_at=finished_at
+    )
+
+    if state == FAILED: entry.set_error(returned_content=error, status=error_status)
+    return entry
@@ -0,0 +1,321 @@
+from typing import Optional, Iterable, List, Callable
+from array import array
+from datetime import datetime
+
+import os
+import gzip
+import heapq
+import json
+import math
+import time
+import tempfile
+import threading
+
+from . import config
+from .models.base import ObjectListModel, BaseModel
+from .models.parcelshop_store import is_locker
+from .endpoints import run_bulk
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+class ParcelShopIndex:
+    """ Offline index of parcelshops, to answer nearest-N and within-radius queries locally instead of calling DHL.
+    Shops are synced per country through "api.parcelshops.list", stored gzipped on disk and indexed in a grid of
+    "cell_size" by "cell_size" degrees.
+    Path: file to store the synced shops in. If not given, the index only lives in memory.
+    """
+    
+    def __init__(self, api: object, path: Optional[str] = None, cell_size: float = config.PARCELSHOP_INDEX_CELL_SIZE) -> None:
+        self.api = api
+        self.path = path
+        self.cell_size = cell_size
+        
+        self._countries = {} # countryCode: { 'synced_at' : timestamp, 'queries' : [...], 'shops' : [...] }
+        self._index = _GridIndex([], cell_size)
+        self._lock = threading.Lock()
+        self._timer = None
+        
+        if path and os.path.exists(path): self.load()
+    
+    def sync(self,
+        countryCode: str,
+        queries: Iterable[dict],
+        max_in_flight: int = 4
+    ) -> int:
+        
+        """ Syncs all shops of a country. DHL requires a filter per lookup, so the shops are collected by calling
+        "api.parcelshops.list(countryCode, **query)" for every query, e.g. { 'postalCode' : '1000' } for every postal code.
+        The shops of the country are replaced by the collected shops, and the queries are kept for "resync".
+        Returns the number of shops of the country. Raises a ValueError if one of the lookups fails, the previous shops are kept then.
+        """
+        
+        queries = [dict(query) for query in queries]
+        shops = {}
+        
+        lookup = lambda query: self.api.parcelshops.list(countryCode, **query)
+        for item in run_bulk(self.api, lookup, queries, max_in_flight):
+            if item.has_error: raise ValueError(f'Syncing parcelshops for "{countryCode}" failed on {item.request}: {item.error.returned_content}')
+            
+            for shop in item.result.items():
+                shop = shop.to_dict()
+                shops[shop.get('id')] = shop
+        
+        with self._lock:
+            self._countries[countryCode] = { 'synced_at' : time.time(), 'queries' : queries, 'shops' : list(shops.values()) }
+            self._rebuild()
+        
+        if self.path: self.save()
+        return len(shops)
+    
+    def resync(self, max_age: float = 0, max_in_flight: int = 4) -> List[str]:
+        """ Syncs the countries that were synced more than "max_age" seconds ago again, with their stored queries. Returns the synced countries. """
+        
+        now = time.time()
+        stale = [countryCode for countryCode, country in list(self._countries.items()) if now - country['synced_at'] >= max_age]
+        
+        for countryCode in stale:
+            self.sync(countryCode, self._countries[countryCode]['queries'], max_in_flight)
+        
+        return stale
+    
+    def start_sync_schedule(self, interval: float, max_in_flight: int = 4) -> None:
+        """ Resyncs countries older than "interval" seconds in a background thread, every "interval" seconds. Queries keep working during a sync. """
+        
+        def run() -> None:
+            try:
+                self.resync(interval, max_in_flight)
+            finally:
+                if self._timer is not None: schedule()
+        
+        def schedule() -> None:
+            self._timer = threading.Timer(interval, run)
+            self._timer.daemon = True
+            self._timer.start()
+        
+        self.stop_sync_schedule()
+        schedule()
+    
+    def stop_sync_schedule(self) -> None:
+        """ Stops the background resync. """
+        
+        timer, self._timer = self._timer, None
+        if timer: timer.cancel()
+    
+    def nearest(self,
+        latitude: float,
+        longitude: float,
+        n: int = 5,
+        countryCode: Optional[str] = None,
+        isLocker: Optional[bool] = None,
+        serviceType: Optional[str] = None,
+        open_at: Optional[datetime] = None,
+        radius: Optional[float] = None
+    ) -> ObjectListModel:
+        
+        """ Returns the "n" nearest shops that match the filters, nearest first. Each shop gets a "distance" attribute in meters.
+        Radius: only return shops within this distance, in kilometers.
+        Open_at: only return shops that are open at the given (local) datetime, based on their opening times.
+        """
+        
+        match = self._make_filter(countryCode, isLocker, serviceType, open_at)
+        found = self._index.nearest(latitude, longitude, n, radius, match)
+        
+        return self._to_list_model(found)
+    
+    def within(self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        countryCode: Optional[str] = None,
+        isLocker: Optional[bool] = None,
+        serviceType: Optional[str] = None,
+        open_at: Optional[datetime] = None
+    ) -> ObjectListModel:
+        
+        """ Returns all shops within "radius" kilometers that match the filters, nearest first. See "nearest" for the filters. """
+        
+        match = self._make_filter(countryCode, isLocker, serviceType, open_at)
+        found = self._index.nearest(latitude, longitude, None, radius, match)
+        
+        return self._to_list_model(found)
+    
+    def save(self) -> None:
+        """ Writes the synced shops to "path". The file is replaced atomically. """
+        
+        if not self.path: raise ValueError('No path set to save the index to.')
+        
+        with self._lock:
+            content = json.dumps({ 'version' : 1, 'countries' : self._countries }, separators=(',', ':')).encode()
+        
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        
+        try:
+            with os.fdopen(fd, 'wb') as index_file:
+                index_file.write(gzip.compress(content))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+    
+    def load(self) -> None:
+        """ Reads the synced shops from "path" and rebuilds the index. """
+        
+        with open(self.path, 'rb') as index_file:
+            content = json.loads(gzip.decompress(index_file.read()))
+        
+        with self._lock:
+            self._countries = content.get('countries', {})
+            self._rebuild()
+    
+    def countries(self) -> dict:
+        """ Returns the synced countries with the timestamp of their last sync. """
+        return { countryCode : country['synced_at'] for countryCode, country in self._countries.items() }
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def _rebuild(self) -> None:
+        """ Builds a new index of all shops and swaps it in, so running queries keep using the previous one. """
+        
+        shops = []
+        for countryCode, country in self._countries.items():
+            for shop in country['shops']:
+                shops.append((countryCode, shop))
+        
+        self._index = _GridIndex(shops, self.cell_size)
+    
+    def _make_filter(self, countryCode: Optional[str], isLocker: Optional[bool], serviceType: Optional[str], open_at: Optional[datetime]) -> Optional[Callable]:
+        """ Returns a function that checks if a (countryCode, shop) matches all given filters, or None if no filters are given. """
+        
+        if countryCode is None and isLocker is None and serviceType is None and open_at is None: return None
+        
+        if open_at is not None:
+            week_day = open_at.isoweekday()
+            time_of_day = open_at.strftime('%H:%M')
+        
+        def match(entry: tuple) -> bool:
+            shop_country, shop = entry
+            
+            if countryCode is not None and shop_country != countryCode: return False
+            if isLocker is not None and is_locker(shop) != isLocker: return False
+            if serviceType is not None and serviceType not in (shop.get('serviceTypes') or []): return False
+            if open_at is not None and not _is_open(shop, week_day, time_of_day): return False
+            
+            return True
+        
+        return match
+    
+    def _to_list_model(self, found: list) -> ObjectListModel:
+        shops = ObjectListModel()
+        
+        for distance, (countryCode, shop) in found:
+            shop = dict(shop)
+            shop['distance'] = int(distance * 1000)
+            shops.add(BaseModel().construct_from_response(shop))
+        
+        return shops
+
+class _GridIndex:
+    """ Grid of shop coordinates. Coordinates are kept in arrays, the grid maps a cell to the positions of its shops. """
+    
+    def __init__(self, shops: list, cell_size: float) -> None:
+        self.cell_size = cell_size
+        self.shops = []
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.cells = {}
+        
+        for entry in shops:
+            location = entry[1].get('geoLocation') or {}
+            latitude, longitude = location.get('latitude'), location.get('longitude')
+            if latitude is None or longitude is None: continue
+            
+            position = len(self.shops)
+            self.shops.append(entry)
+            self.latitudes.append(latitude)
+            self.longitudes.append(longitude)
+            self.cells.setdefault(self._cell(latitude, longitude), []).append(position)
+        
+        rows = [cell[0] for cell in self.cells] or [0]
+        columns = [cell[1] for cell in self.cells] or [0]
+        self.bounds = (min(rows), max(rows), min(columns), max(columns))
+    
+    def __len__(self) -> int:
+        return len(self.shops)
+    
+    def _cell(self, latitude: float, longitude: float) -> tuple:
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+    
+    def nearest(self, latitude: float, longitude: float, n: Optional[int], radius: Optional[float], match: Optional[Callable]) -> list:
+        """ Searches the cells in rings around the given point, until the "n" nearest shops are found or "radius" (km) is covered.
+        Returns a list of (distance in km, shop), nearest first. """
+        
+        if not self.shops or n == 0: return []
+        
+        row, column = self._cell(latitude, longitude)
+        
+        # The distance covered by a ring is the smallest, in km, along the longitude
+        km_per_ring = self.cell_size * KM_PER_DEGREE * max(math.cos(math.radians(min(abs(latitude) + self.cell_size, 89.9))), 0.01)
+        found = []
+        ring = 0
+        
+        while True:
+            for cell in _ring_cells(row, column, ring):
+                for position in self.cells.get(cell, ()):
+                    entry = self.shops[position]
+                    if match is not None and not match(entry): continue
+                    
+                    distance = _haversine(latitude, longitude, self.latitudes[position], self.longitudes[position])
+                    if radius is not None and distance > radius: continue
+                    
+                    found.append((distance, entry))
+            
+            # Everything within this distance is found, shops in further rings are always further away
+            covered = ring * km_per_ring
+            if radius is not None and covered >= radius: break
+            if n is not None and len(found) >= n and heapq.nsmallest(n, found, key=lambda item: item[0])[-1][0] <= covered: break
+            if self._covers_grid(row, column, ring): break
+            
+            ring += 1
+        
+        found.sort(key=lambda item: item[0])
+        return found[:n] if n is not None else found
+    
+    def _covers_grid(self, row: int, column: int, ring: int) -> bool:
+        """ Checks if the rings around the cell already cover all cells of the grid. """
+        
+        min_row, max_row, min_column, max_column = self.bounds
+        return row - ring <= min_row and row + ring >= max_row and column - ring <= min_column and column + ring >= max_column
+
+def _ring_cells(row: int, column: int, ring: int) -> Iterable[tuple]:
+    """ Yields the cells at exactly "ring" cells from the given cell. """
+    
+    if ring == 0:
+        yield (row, column)
+        return
+    
+    for offset in range(-ring, ring + 1):
+        yield (row - ring, column + offset)
+        yield (row + ring, column + offset)
+    
+    for offset in range(-ring + 1, ring):
+        yield (row + offset, column - ring)
+        yield (row + offset, column + ring)
+
+def _haversine(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """ Returns the distance between two points in km. """
+    
+    latitude1, longitude1, latitude2, longitude2 = map(math.radians, (latitude1, longitude1, latitude2, longitude2))
+    a = math.sin((latitude2 - latitude1) / 2) ** 2 + math.cos(latitude1) * math.cos(latitude2) * math.sin((longitude2 - longitude1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def _is_open(shop: dict, week_day: int, time_of_day: str) -> bool:
+    """ Checks the opening times of a shop. Week days go from 1 (monday) to 7 (sunday), times are formatted as "HH:MM". """
+    
+    for opening_time in shop.get('openingTimes') or []:
+        if opening_time.get('weekDay') != week_day: continue
+        if opening_time.get('timeFrom', '') <= time_of_day < opening_time.get('timeTo', ''): return True
+    
+    return False
@@ -0,0 +1,152 @@
+from typing import Optional
+from collections import OrderedDict
+
+import threading
+import time
+
+from . import config
+from .api import DHLParcel_API
+from .token_store import TokenStore, FileTokenStore
+from .response_cache import ResponseCache
+from .transports import Transport, RequestsTransport
+from .throttling import ConcurrencyLimiter
+
+class ClientRegistry:
+    """ Hands out a client per merchant account. All clients share one transport (and so one connection pool), one token store and one response cache.
+    Clients are built on first use and kept for reuse. Once "max_clients" is reached the least recently used client is dropped, and so is a client
+    that was not used for "idle_timeout" seconds. Dropping a client is cheap: its tokens stay in the token store, so rebuilding it doesn't authenticate again.
+    Max_concurrency: maximum number of requests in flight per account, so one merchant can't take all pooled connections. Can be overridden per account in "register".
+    Other keyword arguments are passed to every client, e.g. "lazy_models", "retry" or "instrumentation".
+    """
+
+    def __init__(self,
+        max_clients: int = config.REGISTRY_MAX_CLIENTS,
+        idle_timeout: Optional[float] = config.REGISTRY_IDLE_TIMEOUT,
+        max_concurrency: Optional[int] = config.REGISTRY_MAX_CONCURRENCY,
+        pool_connections: int = config.POOL_CONNECTIONS,
+        pool_maxsize: int = config.REGISTRY_POOL_MAXSIZE,
+        pool_block: bool = config.POOL_BLOCK,
+        transport: Optional[Transport] = None,
+        token_store: Optional[TokenStore] = None,
+        response_cache: Optional[ResponseCache] = None,
+        **client_kwargs: dict
+    ) -> None:
+        if max_clients < 1: raise ValueError('"max_clients" must be at least 1.')
+
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.max_concurrency = max_concurrency
+
+        self._transport = transport if transport else RequestsTransport(pool_connections, pool_maxsize, pool_block)
+        self._token_store = token_store if token_store else FileTokenStore()
+        self._response_cache = response_cache
+        self._client_kwargs = client_kwargs
+
+        self._accounts = {} # name: (user_id, key, accountNumber, concurrency limiter)
+        self._clients = OrderedDict() # name: [client, last used], least recently used first
+        self._lock = threading.Lock()
+
+    def register(self,
+        user_id: str,
+        key: str,
+        accountNumber: str,
+        name: Optional[str] = None,
+        max_concurrency: Optional[int] = None
+    ) -> str:
+
+        """ Adds an account, or replaces the credentials of an account that was registered before. Returns the name to get its client with, "accountNumber" by default. """
+
+        name = name if name else accountNumber
+        max_concurrency = max_concurrency if max_concurrency else self.max_concurrency
+        limiter = ConcurrencyLimiter(max_concurrency) if max_concurrency else None
+
+        with self._lock:
+            self._accounts[name] = (user_id, key, accountNumber, limiter)
+            self._clients.pop(name, None)
+
+        return name
+
+    def unregister(self, name: str) -> None:
+        """ Removes an account and its client. Its tokens are left in the token store. """
+
+        with self._lock:
+            self._accounts.pop(name, None)
+            self._clients.pop(name, None)
+
+    def get(self, name: str) -> DHLParcel_API:
+        """ Returns the client of an account, building it if it was not used recently. Raises a ValueError if the account is not registered. """
+
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(name)
+
+            if entry is not None:
+                entry[1] = now
+                self._clients.move_to_end(name)
+                return entry[0]
+
+            account = self._accounts.get(name)
+            if account is None: raise ValueError(f'Account "{name}" is not registered.')
+
+            user_id, key, accountNumber, limiter = account
+            client = _RegistryClient(user_id, key, accountNumber,
+                transport=self._transport,
+                token_store=self._token_store,
+                response_cache=self._response_cache,
+                concurrency_limiter=limiter,
+                **self._client_kwargs
+            )
+
+            self._clients[name] = [client, now]
+            while len(self._clients) > self.max_clients: self._clients.popitem(last=False)
+
+            return client
+
+    def evict_idle(self) -> int:
+        """ Drops the clients that were not used for "idle_timeout" seconds. Returns the number of dropped clients. """
+
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def close(self) -> None:
+        """ Drops all clients and closes the shared transport. """
+
+        with self._lock:
+            self._clients.clear()
+
+        self._transport.close()
+
+    def __enter__(self) -> 'ClientRegistry':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._accounts
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def _evict_idle(self, now: float) -> int:
+        """ Must be called while holding the lock. The clients are ordered by last use, so only the idle ones at the front are visited. """
+
+        if self.idle_timeout is None: return 0
+        evicted = 0
+
+        while self._clients:
+            name, (client, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_timeout: break
+
+            del self._clients[name]
+            evicted += 1
+
+        return evicted
+
+class _RegistryClient(DHLParcel_API):
+    """ A client handed out by a ClientRegistry. The transport is shared with the other accounts, so closing the client leaves it open; close the registry instead. """
+
+    def close(self) -> None:
+        pass
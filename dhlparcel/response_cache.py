@@ -0,0 +1,107 @@
+from typing import Optional, Tuple, Hashable
+from collections import OrderedDict
+
+import threading
+import time
+
+from . import config
+from .codecs import copy_response
+
+class ResponseCache:
+    """ In-memory cache for responses of reference-data endpoints (capabilities, products, parcel types, shipment options).
+    Responses are cached per endpoint, scope (the base url and account number of the client), url and normalized query parameters,
+    so clients of different accounts sharing a cache never get each other's responses. They expire after the TTL of their endpoint.
+    When "maxsize" is reached, the least recently used response is evicted. Only successful responses are cached.
+    Every hit gets its own copy of the content, so a caller changing it doesn't change the cached response.
+    Maxsize: maximum number of cached responses.
+    TTL: default time to live in seconds.
+    TTLs: time to live per endpoint, e.g. { 'capabilities' : 3600 }. A TTL of 0 disables caching for that endpoint.
+    """
+    
+    def __init__(self, maxsize: int = config.RESPONSE_CACHE_MAXSIZE, ttl: float = config.RESPONSE_CACHE_TTL, ttls: Optional[dict] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = ttls if ttls else {}
+        
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, endpoint: str, url: str, params: Optional[dict] = None, scope: tuple = ()) -> Optional[Tuple[int, dict, object]]:
+        """ Returns the cached (status, headers, content) for the request, or None if it is not cached or expired. """
+        
+        key = self._make_key(endpoint, url, params, scope)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None: del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            response = entry[1]
+        
+        return copy_response(response)
+    
+    def set(self, endpoint: str, url: str, params: Optional[dict], response: Tuple[int, dict, object], scope: tuple = ()) -> None:
+        """ Caches the (status, headers, content) of a request, for the TTL of the endpoint. """
+        
+        ttl = self.ttls.get(endpoint, self.ttl)
+        if not ttl or self.maxsize < 1: return
+        
+        key = self._make_key(endpoint, url, params, scope)
+        
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy_response(response))
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """ Removes the cached responses of an endpoint, or all cached responses if no endpoint is given. """
+        
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                return
+            
+            for key in [key for key in self._entries if key[0] == endpoint]:
+                del self._entries[key]
+    
+    def stats(self) -> dict:
+        """ Returns the hit/miss statistics of the cache. """
+        
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits' : self.hits,
+                'misses' : self.misses,
+                'evictions' : self.evictions,
+                'size' : len(self._entries),
+                'hit_rate' : self.hits / lookups if lookups else 0.0
+            }
+    
+    def _make_key(self, endpoint: str, url: str, params: Optional[dict], scope: tuple) -> Hashable:
+        return (endpoint, tuple(scope), url, normalize_params(params))
+
+def normalize_params(params: Optional[dict]) -> tuple:
+    """ Returns the query parameters in a form that doesn't depend on their order or on how booleans and lists are passed. """
+    
+    if not params: return ()
+    
+    normalized = []
+    for key, value in params.items():
+        if value is None: continue
+        if isinstance(value, bool): value = 'true' if value else 'false'
+        if isinstance(value, (list, tuple, set)): value = tuple(sorted(str(item) for item in value))
+        else: value = str(value)
+        normalized.append((key, value))
+    
+    return tuple(sorted(normalized))
@@ -0,0 +1,149 @@
+from typing import Optional, List, Union
+
+import uuid
+
+class Builder:
+    """ Base class of the shipment builders. "to_dict" returns the fields that are set, in the form the DHL API expects. """
+
+    def to_dict(self) -> dict:
+        return { key : _to_value(value) for key, value in self.__dict__.items() if value is not None }
+
+class Name(Builder):
+
+    def __init__(self,
+        firstName: Optional[str] = None,
+        lastName: Optional[str] = None,
+        companyName: Optional[str] = None,
+        additionalName: Optional[str] = None
+    ) -> None:
+
+        self.firstName = firstName
+        self.lastName = lastName
+        self.companyName = companyName
+        self.additionalName = additionalName
+
+class Address(Builder):
+
+    def __init__(self,
+        countryCode: str,
+        postalCode: str,
+        city: str,
+        street: str,
+        number: Optional[str] = None,
+        addition: Optional[str] = None,
+        isBusiness: Optional[bool] = None,
+        additionalAddressLine: Optional[str] = None
+    ) -> None:
+
+        self.countryCode = countryCode
+        self.postalCode = postalCode
+        self.city = city
+        self.street = street
+        self.number = number
+        self.addition = addition
+        self.isBusiness = isBusiness
+        self.additionalAddressLine = additionalAddressLine
+
+class Party(Builder):
+    """ The receiver or shipper of a shipment. """
+
+    def __init__(self,
+        name: Union[Name, dict],
+        address: Union[Address, dict],
+        email: Optional[str] = None,
+        phoneNumber: Optional[str] = None,
+        vatNumber: Optional[str] = None,
+        eoriNumber: Optional[str] = None,
+        reference: Optional[str] = None
+    ) -> None:
+
+        self.name = name
+        self.address = address
+        self.email = email
+        self.phoneNumber = phoneNumber
+        self.vatNumber = vatNumber
+        self.eoriNumber = eoriNumber
+        self.reference = reference
+
+class Dimensions(Builder):
+    """ Dimensions of a piece, in cm. """
+
+    def __init__(self,
+        length: float,
+        width: float,
+        height: float
+    ) -> None:
+
+        self.length = length
+        self.width = width
+        self.height = height
+
+class Piece(Builder):
+    """ A parcel type with its quantity, and optionally its weight (kg) and dimensions. """
+
+    def __init__(self,
+        parcelType: str,
+        quantity: int = 1,
+        weight: Optional[float] = None,
+        dimensions: Union[Dimensions, dict, None] = None
+    ) -> None:
+
+        self.parcelType = parcelType
+        self.quantity = quantity
+        self.weight = weight
+        self.dimensions = dimensions
+
+class Option(Builder):
+    """ A shipment option, e.g. Option('DOOR') or Option('PS', '8004-NL-132825'). """
+
+    def __init__(self,
+        key: str,
+        input: Optional[str] = None
+    ) -> None:
+
+        self.key = key
+        self.input = input
+
+class Shipment(Builder):
+    """ A shipment, built up step by step. "to_dict" returns the arguments of "api.shipments.create()", and "create_many" accepts Shipments as well.
+    A shipmentId is generated if none is given.
+    """
+
+    def __init__(self,
+        receiver: Union[Party, dict],
+        shipper: Union[Party, dict],
+        pieces: Optional[List[Union[Piece, dict]]] = None,
+        options: Optional[List[Union[Option, dict]]] = None,
+        shipmentId: Optional[str] = None,
+        accountId: Optional[str] = None,
+        orderReference: Optional[str] = None,
+        onBehalfOf: Optional[dict] = None,
+        product: Optional[str] = None,
+        customsDeclaration: Optional[dict] = None,
+        returnLabel: Optional[bool] = None
+    ) -> None:
+
+        self.shipmentId = shipmentId if shipmentId else str(uuid.uuid4())
+        self.receiver = receiver
+        self.shipper = shipper
+        self.pieces = list(pieces) if pieces else []
+        self.options = list(options) if options else []
+        self.accountId = accountId
+        self.orderReference = orderReference
+        self.onBehalfOf = onBehalfOf
+        self.product = product
+        self.customsDeclaration = customsDeclaration
+        self.returnLabel = returnLabel
+
+    def add_piece(self, parcelType: str, quantity: int = 1, weight: Optional[float] = None, dimensions: Union[Dimensions, dict, None] = None) -> 'Shipment':
+        self.pieces.append(Piece(parcelType, quantity, weight, dimensions))
+        return self
+
+    def add_option(self, key: str, input: Optional[str] = None) -> 'Shipment':
+        self.options.append(Option(key, input))
+        return self
+
+def _to_value(value: object) -> object:
+    if isinstance(value, Builder): return value.to_dict()
+    if isinstance(value, list): return [_to_value(item) for item in value]
+    return value
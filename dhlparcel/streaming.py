@@ -0,0 +1,119 @@
+from typing import Optional, Iterable, Iterator
+
+import codecs
+import itertools
+import json
+import re
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+LINK_NEXT = re.compile(r'<([^>]*)>\s*;[^,]*\brel="?next"?', re.IGNORECASE)
+
+def iter_json_items(chunks: Iterable[bytes]) -> Iterator[object]:
+    """ Decodes a JSON array from chunks of bytes, and yields its items one at a time as soon as they are complete.
+    Only the item that is being decoded is kept in memory. Uses ijson if it is installed, otherwise the json module of the standard library.
+    A response that is not an array is decoded as a whole and yielded as a single item.
+    """
+
+    chunks = iter(chunks)
+    head = b''
+
+    for chunk in chunks:
+        head += chunk
+        if head.strip(): break
+
+    if not head.strip(): return
+    chunks = itertools.chain([head], chunks)
+
+    if head.lstrip()[:1] != b'[':
+        yield json.loads(b''.join(chunks))
+        return
+
+    if ijson is not None:
+        yield from _iter_items_ijson(chunks)
+    else:
+        yield from _iter_items_stdlib(chunks)
+
+def _iter_items_ijson(chunks: Iterator[bytes]) -> Iterator[object]:
+    items = ijson.sendable_list()
+    coroutine = ijson.items_coro(items, 'item', use_float=True)
+
+    for chunk in chunks:
+        coroutine.send(chunk)
+        yield from items
+        del items[:]
+
+    coroutine.close()
+    yield from items
+
+def _iter_items_stdlib(chunks: Iterator[bytes]) -> Iterator[object]:
+    """ Decodes the items with JSONDecoder.raw_decode. The buffer only holds the text that is not decoded yet. """
+
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    done = False
+
+    def read_more() -> bool:
+        """ Adds the next chunk to the buffer, dropping the decoded text. Returns False if there is nothing more to read. """
+        nonlocal buffer, position, done
+
+        if done: return False
+
+        for chunk in chunks:
+            text = text_decoder.decode(chunk)
+            if not text: continue
+
+            buffer, position = buffer[position:] + text, 0
+            return True
+
+        done = True
+        text = text_decoder.decode(b'', final=True)
+        buffer, position = buffer[position:] + text, 0
+        return bool(text)
+
+    def skip(characters: str) -> Optional[str]:
+        """ Skips whitespace and the given characters. Returns the next character, or None at the end of the response. """
+        nonlocal position
+
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] in characters):
+                position += 1
+
+            if position < len(buffer): return buffer[position]
+            if not read_more(): return None
+
+    skip('')
+    position += 1 # the opening bracket
+
+    while True:
+        character = skip(',')
+        if character is None: raise ValueError('The response ended before the end of the JSON array.')
+        if character == ']': return
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if read_more(): continue
+                raise
+
+            # a number cut off by the end of a chunk, e.g. "1." of "1.5", decodes fine: only accept an item that is followed by a separator
+            if (end == len(buffer) or buffer[end] not in ' \t\r\n,]') and read_more(): continue
+
+            position = end
+            yield item
+            break
+
+def next_link(headers: dict) -> Optional[str]:
+    """ Returns the url of the next page from a Link header (RFC 8288), e.g. <https://...?page=2>; rel="next", or None on the last page. """
+
+    link = headers.get('Link')
+    if not link: return None
+
+    match = LINK_NEXT.search(link)
+    return match.group(1) if match else None
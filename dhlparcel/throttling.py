@@ -0,0 +1,127 @@
+from typing import Optional, Iterable
+
+import random
+import threading
+import time
+
+from . import config
+
+class RateLimiter:
+    """ Token bucket rate limiter, shared by all threads and asyncio tasks that use it.
+    Rate: number of requests per second. Burst: number of requests that may be sent at once after an idle period.
+    Callers reserve a slot and wait for it outside of the lock, so waiting callers are served in order.
+    """
+    
+    def __init__(self, rate: float = config.RATE_LIMIT, burst: int = config.RATE_LIMIT_BURST) -> None:
+        if rate <= 0: raise ValueError('"rate" must be greater than 0.')
+        
+        self.rate = rate
+        self.burst = max(burst, 1)
+        
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """ Takes a token and returns the number of seconds to wait before it may be used. """
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+    
+    def acquire(self) -> None:
+        """ Blocks until a request may be sent. """
+        
+        wait = self._reserve()
+        if wait > 0: time.sleep(wait)
+    
+    async def acquire_async(self) -> None:
+        """ Waits, without blocking the event loop, until a request may be sent. """
+        import asyncio
+        
+        wait = self._reserve()
+        if wait > 0: await asyncio.sleep(wait)
+    
+    def pause(self, seconds: float) -> None:
+        """ Holds back all requests for the given number of seconds, e.g. when DHL answers with a 429 and a Retry-After. """
+        
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+class ConcurrencyLimiter:
+    """ Limits the number of requests in flight at once, shared by all threads that use it. Callers over the limit wait until a request finishes. """
+    
+    def __init__(self, max_concurrency: int) -> None:
+        if max_concurrency < 1: raise ValueError('"max_concurrency" must be at least 1.')
+        
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+    
+    def acquire(self) -> None:
+        """ Blocks until a request may be sent. Every call must be followed by a call to "release". """
+        self._semaphore.acquire()
+    
+    def release(self) -> None:
+        self._semaphore.release()
+
+class RetryPolicy:
+    """ Decides if and when a failed request is retried.
+    Retries: maximum number of retries after the first attempt.
+    Backoff: base delay in seconds, doubled on every retry up to "max_backoff". With "jitter", a random delay up to that value is used.
+    Statuses: response statuses that are retried. Connection errors and timeouts are retried as well.
+    Methods: methods that are retried. Only GET by default, as retrying e.g. a POST to "shipments" may create a shipment twice.
+    A Retry-After header sent by DHL is always honored, up to "max_backoff".
+    """
+    
+    def __init__(self,
+        retries: int = config.RETRIES,
+        backoff: float = config.RETRY_BACKOFF,
+        max_backoff: float = config.RETRY_MAX_BACKOFF,
+        jitter: bool = True,
+        statuses: Iterable[int] = (429, 502, 503, 504),
+        methods: Iterable[str] = ('GET',)
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+    
+    def should_retry(self, method: str, attempt: int, status: Optional[int] = None) -> bool:
+        """ Checks if a request should be retried after the given attempt (0 for the first one). A status of None means a connection error. """
+        
+        if attempt >= self.retries or method.upper() not in self.methods: return False
+        return status is None or status in self.statuses
+    
+    def get_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """ Returns the number of seconds to wait before the next attempt. """
+        
+        delay = _parse_retry_after(retry_after)
+        if delay is not None: return min(delay, self.max_backoff)
+        
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return random.uniform(0, delay) if self.jitter else delay
+
+def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """ Parses a Retry-After header, which is either a number of seconds or an HTTP date. """
+    
+    if not retry_after: return None
+    
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    
+    from email.utils import parsedate_to_datetime
+    
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
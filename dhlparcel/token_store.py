@@ -0,0 +1,211 @@
+from typing import Optional, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import os
+import json
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+from . import config
+
+class TokenStore:
+    """ Base class for token stores. The auth tokens are stored per user_id, so all clients using the same store share one token.
+    Subclass it and implement "get", "set" and "delete" to keep tokens in another store, such as Redis.
+    Override "lock" as well to make token renewal single-flight across processes.
+    """
+    
+    def __init__(self) -> None:
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[dict]:
+        """ Returns the tokens stored under the key, or None. """
+        raise NotImplementedError('Get is not implemented for this token store.')
+    
+    def set(self, key: str, tokens: dict) -> None:
+        """ Stores the tokens under the key. """
+        raise NotImplementedError('Set is not implemented for this token store.')
+    
+    def delete(self, key: str) -> None:
+        """ Removes the tokens stored under the key. """
+        raise NotImplementedError('Delete is not implemented for this token store.')
+    
+    def get_expiry(self, key: str) -> Optional[float]:
+        """ Returns the expiration timestamp of the access token stored under the key, or None. """
+        
+        tokens = self.get(key)
+        return tokens.get('accessTokenExpiration') if tokens else None
+    
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """ Holds an exclusive lock for the key while the tokens are renewed. By default, only threads of this process are locked out. """
+        
+        with self._locks_lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            yield
+
+class MemoryTokenStore(TokenStore):
+    """ Keeps the tokens in memory. Tokens are shared by all clients in this process that use the same store. """
+    
+    def __init__(self) -> None:
+        super().__init__()
+        self._tokens = {}
+    
+    def get(self, key: str) -> Optional[dict]:
+        return self._tokens.get(key)
+    
+    def set(self, key: str, tokens: dict) -> None:
+        self._tokens[key] = tokens
+    
+    def delete(self, key: str) -> None:
+        self._tokens.pop(key, None)
+
+class FileTokenStore(TokenStore):
+    """ Keeps the tokens as JSON files in a directory, one file per key. Files are replaced atomically, and renewals are locked
+    with a file lock, so processes sharing the directory (e.g. gunicorn workers) share one token per user_id.
+    Parsed files are kept in memory and only read again when the file changes.
+    The directory is created on the first write, so a client that never authenticates doesn't touch the disk (e.g. on a read-only filesystem).
+    """
+    
+    def __init__(self, directory: Optional[str] = None) -> None:
+        super().__init__()
+        self.directory = directory if directory else config.TOKEN_STORE_DIR
+        self._parsed = {}
+        self._has_directory = False
+    
+    def _make_directory(self) -> None:
+        if self._has_directory: return
+        
+        os.makedirs(self.directory, exist_ok=True)
+        self._has_directory = True
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+    
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        
+        version = (stat.st_mtime_ns, stat.st_size)
+        parsed = self._parsed.get(key)
+        if parsed and parsed[0] == version: return parsed[1]
+        
+        try:
+            with open(path, 'r') as token_file:
+                tokens = json.load(token_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        self._parsed[key] = (version, tokens)
+        return tokens
+    
+    def set(self, key: str, tokens: dict) -> None:
+        self._make_directory()
+        
+        # Write to a temporary file first and rename it, so readers never see a partially written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f'.{key}.', suffix='.tmp')
+        
+        try:
+            with os.fdopen(fd, 'w') as token_file:
+                json.dump(tokens, token_file)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+    
+    def delete(self, key: str) -> None:
+        self._parsed.pop(key, None)
+        
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+    
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        self._make_directory()
+        
+        with super().lock(key), _file_lock(os.path.join(self.directory, f'.{key}.lock')):
+            yield
+
+class SQLiteTokenStore(TokenStore):
+    """ Keeps the tokens in a SQLite database, which can be shared by processes on the same host.
+    Renewals are locked with a file lock next to the database. """
+    
+    def __init__(self, path: Optional[str] = None) -> None:
+        super().__init__()
+        self.path = path if path else os.path.join(config.TOKEN_STORE_DIR, 'tokens.sqlite3')
+        self._local = threading.local()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)')
+    
+    def _connection(self) -> 'sqlite3.Connection':
+        """ Returns the connection of the current thread, sqlite connections can't be shared between threads. """
+        import sqlite3
+        
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        
+        return connection
+    
+    def get(self, key: str) -> Optional[dict]:
+        row = self._connection().execute('SELECT value FROM tokens WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key: str, tokens: dict) -> None:
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO tokens (key, value, expires_at) VALUES (?, ?, ?)', (key, json.dumps(tokens), tokens.get('accessTokenExpiration')))
+    
+    def delete(self, key: str) -> None:
+        with self._connection() as connection:
+            connection.execute('DELETE FROM tokens WHERE key = ?', (key,))
+    
+    def get_expiry(self, key: str) -> Optional[float]:
+        row = self._connection().execute('SELECT expires_at FROM tokens WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        self._make_directory()
+        
+        with super().lock(key), _file_lock(f'{self.path}.{key}.lock'):
+            yield
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """ Holds an exclusive lock on the given file, shared with other processes. """
+    
+    with open(path, 'a+b') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else: # pragma: no cover
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else: # pragma: no cover
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,226 @@
+from typing import Optional, Union, Tuple, Callable, Iterator, List
+from urllib.parse import urlsplit
+
+import json
+import threading
+
+from . import config
+
+Timeout = Union[float, Tuple[float, float], None]
+
+class Transport:
+    """ Base class for transports. The client and the auth handler send all requests through a transport.
+    A transport returns a response with "status_code", "headers", "content", "text", "iter_content(chunk_size)" and "close()",
+    like a requests.Response. Connection errors and timeouts are raised as an OSError (e.g. ConnectionError), so they can be retried.
+    """
+    
+    def request(self,
+        method: str,
+        url: str,
+        params: Optional[dict] = None,
+        content: Optional[bytes] = None,
+        headers: Optional[dict] = None,
+        timeout: Timeout = None,
+        stream: bool = False
+    ) -> object:
+        
+        """ Sends a request. With "stream" set to True, the body is not read up front and the response must be closed by the caller. """
+        raise NotImplementedError('Request is not implemented for this transport.')
+    
+    def close(self) -> None:
+        """ Closes all pooled connections. """
+        pass
+
+class RequestsTransport(Transport):
+    """ HTTP/1.1 transport using a keep-alive requests.Session with a connection pool.
+    The session, and "requests" itself, are only created on the first request, so a client that is built but not used (yet) costs no import time.
+    """
+    
+    def __init__(self,
+        pool_connections: int = config.POOL_CONNECTIONS,
+        pool_maxsize: int = config.POOL_MAXSIZE,
+        pool_block: bool = config.POOL_BLOCK,
+        session: Optional['requests.Session'] = None
+    ) -> None:
+        self._session = session
+        self._pool_settings = (pool_connections, pool_maxsize, pool_block)
+        self._lock = threading.Lock()
+    
+    @property
+    def session(self) -> 'requests.Session':
+        session = self._session
+        if session is not None: return session
+        
+        with self._lock:
+            if self._session is None: self._session = self._create_session(*self._pool_settings)
+            return self._session
+    
+    def _create_session(self, pool_connections: int, pool_maxsize: int, pool_block: bool) -> 'requests.Session':
+        """ Creates a keep-alive session with a connection pool, so connections to DHL are reused between requests. """
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        
+        return session
+    
+    def request(self, method: str, url: str, params: Optional[dict] = None, content: Optional[bytes] = None, headers: Optional[dict] = None, timeout: Timeout = None, stream: bool = False) -> 'requests.Response':
+        return self.session.request(method, url, params=params, data=content, headers=headers, timeout=timeout, stream=stream)
+    
+    def close(self) -> None:
+        if self._session is not None: self._session.close()
+
+class HTTP2Transport(Transport):
+    """ HTTP/2 transport using httpx. Concurrent requests are multiplexed over a few connections, instead of opening a connection per request.
+    Requires httpx with HTTP/2 support: pip install python-dhlparcel-api[http2]
+    """
+    
+    def __init__(self,
+        max_connections: int = config.HTTP2_MAX_CONNECTIONS,
+        max_keepalive_connections: int = config.HTTP2_MAX_CONNECTIONS,
+        client: Optional['httpx.Client'] = None
+    ) -> None:
+        try:
+            import httpx
+        except ImportError: # pragma: no cover
+            raise ImportError('The HTTP/2 transport requires "httpx" and "h2". Install them with: pip install python-dhlparcel-api[http2]')
+        
+        self._httpx = httpx
+        self.client = client if client else httpx.Client(http2=True, limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections))
+    
+    def request(self, method: str, url: str, params: Optional[dict] = None, content: Optional[bytes] = None, headers: Optional[dict] = None, timeout: Timeout = None, stream: bool = False) -> 'HTTPXResponse':
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            timeout = self._httpx.Timeout(read_timeout, connect=connect_timeout)
+        
+        request = self.client.build_request(method, url, params=params, content=content, headers=headers, timeout=timeout)
+        
+        try:
+            return HTTPXResponse(self.client.send(request, stream=stream))
+        except self._httpx.TransportError as e:
+            raise ConnectionError(str(e)) from e
+    
+    def close(self) -> None:
+        self.client.close()
+
+class HTTPXResponse:
+    """ Gives a httpx.Response the interface of a requests.Response. """
+    
+    def __init__(self, response: 'httpx.Response') -> None:
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.http_version = response.http_version
+    
+    @property
+    def content(self) -> bytes:
+        return self.response.read()
+    
+    @property
+    def text(self) -> str:
+        self.response.read()
+        return self.response.text
+    
+    def json(self) -> object:
+        return json.loads(self.content)
+    
+    def iter_content(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        return self.response.iter_bytes(chunk_size)
+    
+    def close(self) -> None:
+        self.response.close()
+
+class MemoryTransport(Transport):
+    """ In-memory transport for tests. Nothing is sent over the network.
+    Responses are looked up by method and path, added with "add_response", or produced by a handler that gets the MemoryRequest.
+    Every request is recorded in "requests". Requests without a response get a 404.
+    """
+    
+    def __init__(self, handler: Optional[Callable[['MemoryRequest'], 'MemoryResponse']] = None) -> None:
+        self.handler = handler
+        self.routes = {}
+        self.requests = []
+    
+    def add_response(self,
+        method: str,
+        path: str,
+        status: int = 200,
+        json_content: Optional[object] = None,
+        content: bytes = b'',
+        headers: Optional[dict] = None
+    ) -> None:
+        
+        """ Adds a response for the method and path, e.g. ('GET', '/products'). JSON content is encoded and gets an "application/json" content type. """
+        
+        headers = dict(headers) if headers else {}
+        
+        if json_content is not None:
+            content = json.dumps(json_content).encode()
+            headers.setdefault('Content-Type', 'application/json')
+        
+        self.routes[(method, '/' + path.lstrip('/'))] = MemoryResponse(status, content, headers)
+    
+    def request(self, method: str, url: str, params: Optional[dict] = None, content: Optional[bytes] = None, headers: Optional[dict] = None, timeout: Timeout = None, stream: bool = False) -> 'MemoryResponse':
+        request = MemoryRequest(method, url, params, content, dict(headers) if headers else {})
+        self.requests.append(request)
+        
+        if self.handler: return self.handler(request)
+        
+        response = self.routes.get((method, request.path))
+        if response is None: return MemoryResponse(404, b'', {})
+        
+        return MemoryResponse(response.status_code, response.content, dict(response.headers))
+
+class MemoryRequest:
+    
+    def __init__(self, method: str, url: str, params: Optional[dict], content: Optional[bytes], headers: dict) -> None:
+        self.method = method
+        self.url = url
+        self.path = urlsplit(url).path
+        self.params = params
+        self.content = content
+        self.headers = headers
+    
+    def json(self) -> object:
+        return json.loads(self.content) if self.content else None
+
+class MemoryResponse:
+    
+    def __init__(self, status_code: int = 200, content: bytes = b'', headers: Optional[dict] = None) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = _Headers(headers or {})
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+    
+    def json(self) -> object:
+        return json.loads(self.content)
+    
+    def iter_content(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        chunk_size = chunk_size or len(self.content) or 1
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+    
+    def close(self) -> None:
+        pass
+
+class _Headers(dict):
+    """ Dict with case-insensitive lookups, like the headers of a requests.Response. """
+    
+    def __init__(self, headers: dict) -> None:
+        super().__init__(headers)
+        self._lower = { key.lower() : key for key in headers }
+    
+    def __getitem__(self, key: str) -> str:
+        return super().__getitem__(self._lower.get(key.lower(), key))
+    
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key.lower() in self._lower
+    
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return super().get(self._lower.get(key.lower(), key), default)
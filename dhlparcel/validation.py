@@ -0,0 +1,222 @@
+from typing import Optional, Iterable, List
+
+import re
+
+# Compiled once per process, shared by all validators
+COUNTRY_CODE = re.compile(r'[A-Z]{2}')
+SHIPMENT_ID = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+EMAIL = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+ANY_POSTAL_CODE = re.compile(r'[A-Za-z0-9][A-Za-z0-9 \-]{1,9}')
+POSTAL_CODES = { countryCode : re.compile(pattern, re.IGNORECASE) for countryCode, pattern in {
+    'NL' : r'[1-9][0-9]{3} ?[A-Z]{2}',
+    'BE' : r'[1-9][0-9]{3}',
+    'LU' : r'(L-?)?[0-9]{4}',
+    'DE' : r'[0-9]{5}',
+    'FR' : r'[0-9]{5}',
+    'AT' : r'[0-9]{4}',
+    'CH' : r'[0-9]{4}',
+    'DK' : r'[0-9]{4}',
+    'ES' : r'[0-9]{5}',
+    'IT' : r'[0-9]{5}',
+    'PL' : r'[0-9]{2}-?[0-9]{3}',
+    'PT' : r'[0-9]{4}-?[0-9]{3}',
+    'SE' : r'[0-9]{3} ?[0-9]{2}',
+    'CZ' : r'[0-9]{3} ?[0-9]{2}',
+    'GB' : r'[A-Z]{1,2}[0-9][A-Z0-9]? ?[0-9][A-Z]{2}',
+    'IE' : r'[A-Z][0-9][0-9W] ?[A-Z0-9]{4}',
+}.items() }
+
+class ShipmentValidator:
+    """ Checks shipments locally before they are sent, so malformed shipments don't cost a round trip.
+    Checks the required fields, the shipmentId (a UUID), country codes, postal codes (per country where the format is known), e-mail addresses,
+    the pieces (quantity, weight and dimensions) and the option keys.
+    Options: the allowed options, as returned by "api.shipments.get_options" (or a list of keys). If not given, option keys are not checked.
+    Parcel_types: the allowed parcel types, as returned by "api.parcel_types.list". If given, the parcel type, weight and dimensions of every piece are checked against them.
+    """
+
+    def __init__(self, options: Optional[Iterable] = None, parcel_types: Optional[Iterable] = None) -> None:
+        self.option_keys = None
+        self.option_input_max = {}
+        self.parcel_types = None
+
+        if options is not None:
+            self.option_keys = set()
+
+            for option in _as_dicts(options):
+                self.option_keys.add(option['key'])
+                if option.get('inputMax'): self.option_input_max[option['key']] = option['inputMax']
+
+            self.option_keys = frozenset(self.option_keys)
+
+        if parcel_types is not None:
+            self.parcel_types = {}
+
+            for parcel_type in _as_dicts(parcel_types):
+                dimensions = parcel_type.get('dimensions') or {}
+                max_dimensions = (dimensions.get('maxLengthCm'), dimensions.get('maxWidthCm'), dimensions.get('maxHeightCm'))
+                self.parcel_types[parcel_type['key']] = (parcel_type.get('maxWeightKg'), sorted(max_dimensions) if None not in max_dimensions else None)
+
+    @classmethod
+    def from_api(cls, api: object, senderType: str = 'business', fromCountry: Optional[str] = None) -> 'ShipmentValidator':
+        """ Builds a validator with the shipment options of the sender type, and the parcel types if "fromCountry" is given.
+        Raises a ValueError if the options or parcel types can't be retrieved. """
+
+        options = api.shipments.get_options(senderType, fromCountry)
+        if options.has_error: raise ValueError(f'Retrieving the shipment options failed: {options.error.returned_content}')
+
+        parcel_types = None
+
+        if fromCountry:
+            parcel_types = api.parcel_types.list(senderType, fromCountry)
+            if parcel_types.has_error: raise ValueError(f'Retrieving the parcel types failed: {parcel_types.error.returned_content}')
+
+        return cls(options, parcel_types)
+
+    @classmethod
+    async def from_async_api(cls, api: object, senderType: str = 'business', fromCountry: Optional[str] = None) -> 'ShipmentValidator':
+        """ Same as "from_api", for an AsyncDHLParcel_API. """
+
+        options = await api.shipments.get_options(senderType, fromCountry)
+        if options.has_error: raise ValueError(f'Retrieving the shipment options failed: {options.error.returned_content}')
+
+        parcel_types = None
+
+        if fromCountry:
+            parcel_types = await api.parcel_types.list(senderType, fromCountry)
+            if parcel_types.has_error: raise ValueError(f'Retrieving the parcel types failed: {parcel_types.error.returned_content}')
+
+        return cls(options, parcel_types)
+
+    def validate(self, shipment: dict) -> List[str]:
+        """ Returns the problems found in the shipment, as "<field>: <problem>". An empty list means the shipment is valid.
+        Shipment: a dict with the same keys as the arguments of "api.shipments.create()", or a Shipment builder. """
+
+        if not isinstance(shipment, dict): shipment = shipment.to_dict()
+        errors = []
+
+        shipment_id = shipment.get('shipmentId')
+        if not shipment_id: errors.append('shipmentId: is required')
+        elif not isinstance(shipment_id, str) or not SHIPMENT_ID.fullmatch(shipment_id): errors.append(f'shipmentId: {shipment_id!r} is not a UUID')
+
+        if 'accountId' in shipment and not shipment['accountId']: errors.append('accountId: is required')
+
+        self._validate_party(shipment.get('receiver'), 'receiver', errors)
+        self._validate_party(shipment.get('shipper'), 'shipper', errors)
+        self._validate_pieces(shipment.get('pieces'), errors)
+        self._validate_options(shipment.get('options'), errors)
+
+        return errors
+
+    def is_valid(self, shipment: dict) -> bool:
+        return not self.validate(shipment)
+
+    def _validate_party(self, party: Optional[dict], field: str, errors: list) -> None:
+        if not party:
+            errors.append(f'{field}: is required')
+            return
+        if not isinstance(party, dict):
+            errors.append(f'{field}: must be an object')
+            return
+
+        name = party.get('name')
+        if not name: errors.append(f'{field}.name: is required')
+        elif not isinstance(name, dict): errors.append(f'{field}.name: must be an object')
+        elif not (name.get('companyName') or name.get('lastName')): errors.append(f'{field}.name: needs a lastName or companyName')
+
+        address = party.get('address')
+
+        if not address:
+            errors.append(f'{field}.address: is required')
+        elif not isinstance(address, dict):
+            errors.append(f'{field}.address: must be an object')
+        else:
+            country_code = address.get('countryCode')
+            postal_code = address.get('postalCode')
+
+            if not country_code: errors.append(f'{field}.address.countryCode: is required')
+            elif not isinstance(country_code, str) or not COUNTRY_CODE.fullmatch(country_code): errors.append(f'{field}.address.countryCode: {country_code!r} is not an ISO 3166 alpha-2 code')
+
+            if not postal_code: errors.append(f'{field}.address.postalCode: is required')
+            elif not isinstance(postal_code, str) or not POSTAL_CODES.get(country_code, ANY_POSTAL_CODE).fullmatch(postal_code): errors.append(f'{field}.address.postalCode: {postal_code!r} is not a valid postal code for {country_code}')
+
+            if not address.get('city'): errors.append(f'{field}.address.city: is required')
+            if not address.get('street'): errors.append(f'{field}.address.street: is required')
+
+        email = party.get('email')
+        if email and (not isinstance(email, str) or not EMAIL.fullmatch(email)): errors.append(f'{field}.email: {email!r} is not an e-mail address')
+
+    def _validate_pieces(self, pieces: Optional[list], errors: list) -> None:
+        if not pieces:
+            errors.append('pieces: at least one piece is required')
+            return
+        if not isinstance(pieces, list):
+            errors.append('pieces: must be a list')
+            return
+
+        parcel_types = self.parcel_types
+
+        for number, piece in enumerate(pieces):
+            field = f'pieces[{number}]'
+
+            if not isinstance(piece, dict):
+                errors.append(f'{field}: must be an object')
+                continue
+
+            parcel_type = piece.get('parcelType')
+            quantity = piece.get('quantity', 1)
+            weight = piece.get('weight')
+            dimensions = piece.get('dimensions')
+            limits = None
+
+            if not parcel_type: errors.append(f'{field}.parcelType: is required')
+            elif not isinstance(parcel_type, str): errors.append(f'{field}.parcelType: must be a string')
+            elif parcel_types is not None:
+                limits = parcel_types.get(parcel_type)
+                if limits is None: errors.append(f'{field}.parcelType: {parcel_type!r} is not one of {", ".join(sorted(parcel_types))}')
+
+            if type(quantity) is not int or quantity < 1: errors.append(f'{field}.quantity: must be a whole number of at least 1')
+
+            if weight is not None:
+                if not _is_positive(weight): errors.append(f'{field}.weight: must be a positive number')
+                elif limits and limits[0] is not None and weight > limits[0]: errors.append(f'{field}.weight: {weight} kg is above the {limits[0]} kg of {parcel_type}')
+
+            if dimensions is not None and not isinstance(dimensions, dict):
+                errors.append(f'{field}.dimensions: must be an object')
+            elif dimensions is not None:
+                sizes = (dimensions.get('length'), dimensions.get('width'), dimensions.get('height'))
+
+                if not all(_is_positive(size) for size in sizes): errors.append(f'{field}.dimensions: length, width and height must be positive numbers')
+                elif limits and limits[1] is not None and any(size > limit for size, limit in zip(sorted(sizes), limits[1])): errors.append(f'{field}.dimensions: {"x".join(str(size) for size in sizes)} cm does not fit {parcel_type}')
+
+    def _validate_options(self, options: Optional[list], errors: list) -> None:
+        if not options: return
+        if not isinstance(options, list):
+            errors.append('options: must be a list')
+            return
+
+        option_keys = self.option_keys
+
+        for number, option in enumerate(options):
+            if not isinstance(option, dict):
+                errors.append(f'options[{number}]: must be an object')
+                continue
+
+            key = option.get('key')
+
+            if not key: errors.append(f'options[{number}].key: is required')
+            elif not isinstance(key, str): errors.append(f'options[{number}].key: must be a string')
+            elif option_keys is not None and key not in option_keys: errors.append(f'options[{number}].key: {key!r} is not an available option')
+            elif key in self.option_input_max and len(str(option.get('input') or '')) > self.option_input_max[key]: errors.append(f'options[{number}].input: is longer than {self.option_input_max[key]} characters')
+
+def _is_positive(value: object) -> bool:
+    return type(value) in (int, float) and value > 0
+
+def _as_dicts(values: Iterable) -> Iterable[dict]:
+    """ Accepts a list model, models, dicts or plain keys. """
+
+    if hasattr(values, 'items') and not isinstance(values, dict): values = values.items()
+
+    for value in values:
+        if isinstance(value, str): yield { 'key' : value }
+        elif isinstance(value, dict): yield value
+        else: yield value.to_dict()
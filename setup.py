@@ -8,7 +8,7 @@ with open(path.join(this_directory, 'README.md'), encoding='utf-8') as f:
 
 setup(
   name = 'python-dhlparcel-api',         
-  packages=['dhlparcel', 'dhlparcel.models', 'dhlparcel.cache', 'dhlparcel.endpoints'],
+  packages=['dhlparcel', 'dhlparcel.models', 'dhlparcel.endpoints', 'dhlparcel.aio', 'dhlparcel.aio.endpoints'],
   version = '0.0.3',
   license='GPL-3.0-or-later',
   description = 'Wrapper for the DHL Parcel API endpoints',
@@ -19,9 +19,20 @@ setup(
   url = 'https://github.com/alexander-schillemans/python-dhlparcel-api',
   download_url = 'https://github.com/alexander-schillemans/python-dhlparcel-api/archive/refs/tags/0.0.3.tar.gz',
   keywords = ['dhl', 'dhl parcel'],
+  python_requires='>=3.8',
   install_requires=[
           'requests'
       ],
+  extras_require={
+          'async': ['httpx'],
+          'fast': ['orjson'],
+          'http2': ['httpx[http2]'],
+          'prometheus': ['prometheus_client'],
+          'opentelemetry': ['opentelemetry-api'],
+          'stream': ['ijson'],
+          'pandas': ['pandas'],
+          'test': ['pytest'],
+      },
   classifiers=[
     'Development Status :: 3 - Alpha',
     'Intended Audience :: Developers',
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import json
+import threading
+import time
+
+import asyncio
+
+import pytest
+
+from dhlparcel.api import DHLParcel_API
+from dhlparcel.transports import MemoryTransport, MemoryResponse
+from dhlparcel.token_store import MemoryTokenStore
+
+OPTIONS = [{ 'key' : 'DOOR' }, { 'key' : 'REFERENCE', 'inputMax' : 15 }]
+PARCEL_TYPES = [{ 'key' : 'SMALL', 'maxWeightKg' : 2 }]
+
+def json_response(status: int, content: object, headers: dict = None) -> MemoryResponse:
+    response_headers = { 'Content-Type' : 'application/json' }
+    if headers: response_headers.update(headers)
+    
+    return MemoryResponse(status, json.dumps(content).encode(), response_headers)
+
+def auth_response(request: object) -> MemoryResponse:
+    """ Hands out a token per user, so tests can see which user a request was made for. """
+    
+    user_id = (request.json() or {}).get('userId', 'refreshed')
+    now = time.time()
+    time.sleep(0.02) # slow enough for concurrent callers to pile up behind it
+    
+    return json_response(200, {
+        'accessToken' : f'token-{user_id}',
+        'accessTokenExpiration' : now + 900,
+        'refreshToken' : f'refresh-{user_id}',
+        'refreshTokenExpiration' : now + 9000
+    })
+
+class FakeDHL:
+    """ Stand-in for the DHL API: answers the auth endpoints itself and passes other requests to "handler". Counts and keeps all requests. """
+    
+    def __init__(self, handler) -> None:
+        self.handler = handler
+        self.requests = []
+        self.auth_calls = 0
+        self._lock = threading.Lock()
+        self.transport = MemoryTransport(self._handle)
+    
+    def _handle(self, request: object) -> MemoryResponse:
+        with self._lock:
+            if request.path.startswith('/authenticate'): self.auth_calls += 1
+            else: self.requests.append(request)
+        
+        if request.path.startswith('/authenticate'): return auth_response(request)
+        return self.handler(request)
+    
+    def client(self, user_id: str = 'user', key: str = 'key', accountNumber: str = '123456', **kwargs: dict) -> DHLParcel_API:
+        kwargs.setdefault('token_store', MemoryTokenStore())
+        return DHLParcel_API(user_id, key, accountNumber, transport=self.transport, **kwargs)
+
+class AsyncFakeDHL:
+    """ Stand-in for the DHL API for the async client, through a httpx.MockTransport. Answers shipment options, parcel types and shipments. """
+    
+    def __init__(self) -> None:
+        self.paths = []
+        self.auth_calls = 0
+    
+    async def handle(self, request):
+        import httpx
+        
+        if request.url.path.startswith('/authenticate'):
+            self.auth_calls += 1
+            now = time.time()
+            await asyncio.sleep(0.02)
+            return httpx.Response(200, json={ 'accessToken' : 'token', 'accessTokenExpiration' : now + 900, 'refreshToken' : 'refresh', 'refreshTokenExpiration' : now + 9000 })
+        
+        self.paths.append(request.url.path)
+        await asyncio.sleep(0.01)
+        
+        if request.url.path.startswith('/shipment-options'): return httpx.Response(200, json=OPTIONS)
+        if request.url.path.startswith('/parcel-types'): return httpx.Response(200, json=PARCEL_TYPES)
+        if request.method == 'GET': return httpx.Response(200, json=[])
+        return httpx.Response(200, json={ 'shipmentId' : json.loads(request.content)['shipmentId'] })
+    
+    def client(self, **kwargs):
+        import httpx
+        from dhlparcel.aio.api import AsyncDHLParcel_API
+        
+        kwargs.setdefault('shipment_validator', True)
+        kwargs.setdefault('token_store', MemoryTokenStore())
+        return AsyncDHLParcel_API('user', 'key', '123456', client=httpx.AsyncClient(transport=httpx.MockTransport(self.handle)), **kwargs)
+
+def run_threads(func, count=16):
+    """ Calls func(index) from "count" threads that start at the same time. Returns the results in index order. """
+    
+    barrier = threading.Barrier(count)
+    
+    def call(index):
+        barrier.wait()
+        return func(index)
+    
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(call, range(count)))
+
+@pytest.fixture
+def fake_dhl():
+    """ Returns a function that builds a FakeDHL from a request handler. """
+    return FakeDHL
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from conftest import AsyncFakeDHL
+
+def test_client_built_outside_the_event_loop_can_authenticate():
+    dhl = AsyncFakeDHL()
+    client = dhl.client(shipment_validator=None, coalesce_requests=False)
+    
+    async def main():
+        # concurrent tasks contend for the auth lock, which must belong to this loop
+        return await asyncio.gather(*(client.get('products') for _ in range(10)))
+    
+    results = asyncio.run(main())
+    
+    assert all(status == 200 for status, headers, content in results)
+    assert dhl.auth_calls == 1
+
+def test_renewal_waits_for_the_token_store_lock():
+    """ Another process renewing the token holds the lock of the store; the async client must wait and use its token. """
+    
+    from dhlparcel.token_store import MemoryTokenStore
+    
+    store = MemoryTokenStore()
+    now = time.time()
+    store.set('user', { 'accessToken' : 'expired', 'accessTokenExpiration' : now - 1, 'refreshToken' : 'refresh', 'refreshTokenExpiration' : now + 9000 })
+    
+    dhl = AsyncFakeDHL()
+    client = dhl.client(shipment_validator=None, token_store=store)
+    locked = threading.Event()
+    
+    def other_process():
+        with store.lock('user'):
+            locked.set()
+            time.sleep(0.1)
+            store.set('user', { 'accessToken' : 'renewed', 'accessTokenExpiration' : time.time() + 900, 'refreshToken' : 'refresh', 'refreshTokenExpiration' : time.time() + 9000 })
+    
+    thread = threading.Thread(target=other_process)
+    thread.start()
+    locked.wait()
+    
+    token = asyncio.run(client._check_header_tokens())
+    thread.join()
+    
+    assert token == 'renewed'
+    assert dhl.auth_calls == 0
@@ -0,0 +1,57 @@
+import asyncio
+import uuid
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+
+from dhlparcel.validation import ShipmentValidator
+
+from conftest import json_response, AsyncFakeDHL, OPTIONS, PARCEL_TYPES
+
+def shipment(**changes):
+    party = { 'name' : { 'lastName' : 'Jansen' }, 'address' : { 'countryCode' : 'NL', 'postalCode' : '3542AD', 'city' : 'Utrecht', 'street' : 'Reactorweg' } }
+    data = { 'shipmentId' : str(uuid.uuid4()), 'receiver' : party, 'shipper' : party, 'pieces' : [{ 'parcelType' : 'SMALL', 'quantity' : 1 }], 'options' : [{ 'key' : 'DOOR' }] }
+    data.update(changes)
+    return data
+
+def test_concurrent_creates_build_the_validator_once():
+    dhl = AsyncFakeDHL()
+    
+    async def main():
+        async with dhl.client(coalesce_requests=False) as client:
+            return await asyncio.gather(*(client.shipments.create(**shipment()) for _ in range(20)))
+    
+    results = asyncio.run(main())
+    
+    assert not any(result.has_error for result in results)
+    assert sum(path.startswith('/shipment-options') for path in dhl.paths) == 1
+
+def test_async_and_sync_validators_agree(fake_dhl):
+    invalid = shipment(options=[{ 'key' : 'UNKNOWN' }])
+    sync_client = fake_dhl(lambda request: json_response(200, OPTIONS)).client(shipment_validator=True)
+    
+    async def main():
+        async with AsyncFakeDHL().client() as client:
+            return await client.shipments.create(**invalid)
+    
+    async_result = asyncio.run(main())
+    sync_result = sync_client.shipments.create(**invalid)
+    
+    assert async_result.has_error and async_result.error.status is None
+    assert async_result.error.returned_content == sync_result.error.returned_content
+
+def test_async_validator_is_built_like_from_api(fake_dhl):
+    def handler(request):
+        return json_response(200, PARCEL_TYPES if request.path.startswith('/parcel-types') else OPTIONS)
+    
+    heavy = shipment(pieces=[{ 'parcelType' : 'SMALL', 'quantity' : 1, 'weight' : 5 }])
+    sync_validator = ShipmentValidator.from_api(fake_dhl(handler).client(), fromCountry='NL')
+    
+    async def main():
+        async with AsyncFakeDHL().client() as client:
+            return await ShipmentValidator.from_async_api(client, fromCountry='NL')
+    
+    async_validator = asyncio.run(main())
+    
+    assert async_validator.validate(heavy) == sync_validator.validate(heavy) != []
@@ -0,0 +1,72 @@
+import time
+
+from conftest import json_response, run_threads
+from dhlparcel.token_store import MemoryTokenStore
+
+def rejecting(*tokens):
+    """ Answers 401 for requests made with one of the tokens, as DHL does for a token it revoked early. """
+    
+    def handler(request):
+        if request.headers['Authorization'] in [f'Bearer {token}' for token in tokens]: return json_response(401, { 'message' : 'token expired' })
+        return json_response(200, [{ 'key' : 'PARCEL' }])
+    
+    return handler
+
+def stored_tokens(access_token='stale', expires_in=900):
+    store = MemoryTokenStore()
+    now = time.time()
+    store.set('user', { 'accessToken' : access_token, 'accessTokenExpiration' : now + expires_in, 'refreshToken' : 'refresh-user', 'refreshTokenExpiration' : now + 9000 })
+    return store
+
+def auth_paths(dhl):
+    return [request.path for request in dhl.transport.requests if request.path.startswith('/authenticate')]
+
+def test_rejected_token_is_refreshed_and_the_request_retried_once(fake_dhl):
+    dhl = fake_dhl(rejecting('stale'))
+    client = dhl.client(token_store=stored_tokens())
+    
+    products = client.products.list()
+    
+    assert not products.has_error
+    assert auth_paths(dhl) == ['/authenticate/refresh-token']
+    assert [request.headers['Authorization'] for request in dhl.requests] == ['Bearer stale', 'Bearer token-refreshed']
+
+def test_request_is_not_retried_again_when_the_new_token_is_rejected(fake_dhl):
+    dhl = fake_dhl(rejecting('stale', 'token-refreshed'))
+    client = dhl.client(token_store=stored_tokens())
+    
+    products = client.products.list()
+    
+    assert products.has_error and products.error.status == 401
+    assert len(dhl.requests) == 2
+    assert dhl.auth_calls == 1
+
+def test_token_is_refreshed_before_it_expires(fake_dhl):
+    dhl = fake_dhl(rejecting())
+    client = dhl.client(token_store=stored_tokens('almost-expired', expires_in=30), token_expiry_skew=60)
+    
+    client.products.list()
+    
+    assert auth_paths(dhl) == ['/authenticate/refresh-token']
+    assert dhl.requests[0].headers['Authorization'] == 'Bearer token-refreshed'
+
+def test_expired_refresh_token_falls_back_to_the_api_key(fake_dhl):
+    store = MemoryTokenStore()
+    store.set('user', { 'accessToken' : 'old', 'accessTokenExpiration' : time.time() - 10, 'refreshToken' : 'old', 'refreshTokenExpiration' : time.time() - 1 })
+    dhl = fake_dhl(rejecting())
+    client = dhl.client(token_store=store)
+    
+    client.products.list()
+    
+    assert auth_paths(dhl) == ['/authenticate/api-key']
+    assert store.get('user')['accessToken'] == 'token-user'
+
+def test_threads_rejected_with_the_same_token_share_one_refresh(fake_dhl):
+    dhl = fake_dhl(rejecting('stale'))
+    client = dhl.client(token_store=stored_tokens(), coalesce_requests=False)
+    
+    results = run_threads(lambda index: client.products.list())
+    
+    assert not any(result.has_error for result in results)
+    assert auth_paths(dhl) == ['/authenticate/refresh-token']
+    assert sum(request.headers['Authorization'] == 'Bearer token-refreshed' for request in dhl.requests) == len(results)
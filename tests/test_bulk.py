@@ -0,0 +1,31 @@
+import threading
+import time
+
+from dhlparcel.endpoints import run_bulk
+from dhlparcel.models.base import BaseModel
+
+def test_run_bulk_bounds_the_calls_in_flight_and_keeps_going_after_errors(fake_dhl):
+    client = fake_dhl(lambda request: None).client()
+    running = []
+    peak = []
+    lock = threading.Lock()
+    
+    def call(item):
+        with lock:
+            running.append(item)
+            peak.append(len(running))
+        
+        time.sleep(0.005)
+        
+        with lock:
+            running.remove(item)
+        
+        if item == 3: raise ValueError('odd item')
+        return BaseModel().construct_from_response({ 'double' : item * 2 })
+    
+    results = list(run_bulk(client, call, range(10), max_in_flight=3))
+    
+    assert [item.index for item in results] == list(range(10))
+    assert [item.result.double for item in results if not item.has_error] == [0, 2, 4, 8, 10, 12, 14, 16, 18]
+    assert results[3].has_error and results[3].error.returned_content == 'odd item'
+    assert max(peak) <= 3
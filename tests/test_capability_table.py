@@ -0,0 +1,84 @@
+import pytest
+
+from conftest import json_response
+from dhlparcel.capability_table import CapabilityTable
+
+SMALL = { 'key' : 'SMALL', 'minWeightKg' : 0, 'maxWeightKg' : 2, 'price' : { 'withoutTax' : 5.5 } }
+LARGE = { 'key' : 'LARGE', 'minWeightKg' : 0, 'maxWeightKg' : 20, 'price' : { 'withoutTax' : 4.0 } }
+
+class CapabilitiesDHL:
+    """ Answers the capabilities endpoint, or fails with "status" or a connection error once "down" is set. """
+    
+    def __init__(self):
+        self.calls = 0
+        self.down = None
+    
+    def __call__(self, request):
+        self.calls += 1
+        if self.down == 'unreachable': raise ConnectionError('unreachable')
+        if self.down: return json_response(self.down, { 'message' : 'unavailable' })
+        
+        params = request.params
+        return json_response(200, [
+            { 'rank' : 2, 'fromCountryCode' : params['fromCountry'], 'toCountryCode' : params['toCountry'], 'product' : { 'key' : 'DFY-B2C' }, 'parcelType' : LARGE, 'options' : [{ 'key' : 'DOOR' }] },
+            { 'rank' : 1, 'fromCountryCode' : params['fromCountry'], 'toCountryCode' : params['toCountry'], 'product' : { 'key' : 'DFY-B2C' }, 'parcelType' : SMALL, 'options' : [{ 'key' : 'DOOR' }, { 'key' : 'EVE' }] }
+        ])
+
+def table_for(fake_dhl, **kwargs):
+    dhl = CapabilitiesDHL()
+    client = fake_dhl(dhl).client(retry=False)
+    return dhl, CapabilityTable(client, **kwargs)
+
+def test_sweep_and_resolve_locally(fake_dhl):
+    dhl, table = table_for(fake_dhl)
+    
+    assert table.sweep(['business'], ['NL'], ['NL', 'BE']) == 4
+    calls = dhl.calls
+    
+    assert [capability.parcelType.key for capability in table.resolve('business', 'NL', 'BE', False).items()] == ['SMALL', 'LARGE']
+    assert [capability.parcelType.key for capability in table.resolve('business', 'NL', 'BE', False, cheapest=True).items()] == ['LARGE', 'SMALL']
+    assert [capability.parcelType.key for capability in table.resolve('business', 'NL', 'BE', False, weight=5).items()] == ['LARGE']
+    assert table.best('business', 'NL', 'NL', True, options=['EVE']).parcelType.key == 'SMALL'
+    assert table.best('business', 'NL', 'NL', True, parcelType='LARGE').rank == 2
+    assert dhl.calls == calls
+
+def test_missing_combinations_are_added_live(fake_dhl):
+    dhl, table = table_for(fake_dhl)
+    
+    assert table.best('consumer', 'NL', 'DE', False).parcelType.key == 'SMALL'
+    assert table.best('consumer', 'NL', 'DE', False).parcelType.key == 'SMALL'
+    assert dhl.calls == 1
+    assert list(table.combinations()) == [('consumer', 'NL', 'DE', False, None)]
+
+def test_table_is_saved_and_loaded(fake_dhl, tmp_path):
+    path = str(tmp_path / 'capabilities.json.gz')
+    dhl, table = table_for(fake_dhl, path=path)
+    table.sweep(['business'], ['NL'], ['NL', 'BE'], toBusiness=[False])
+    
+    loaded = CapabilityTable(None, path=path)
+    
+    assert len(loaded) == 2
+    assert loaded.combinations() == table.combinations()
+    assert loaded._values == table._values
+    assert loaded._get_rows(('business', 'NL', 'BE', False, 'SMALL')) == table._get_rows(('business', 'NL', 'BE', False, None))
+
+@pytest.mark.parametrize('down', [503, 'unreachable'])
+def test_stale_rows_are_used_when_dhl_fails(fake_dhl, down):
+    dhl, table = table_for(fake_dhl, max_age=0)
+    table.sweep(['business'], ['NL'], ['BE'], toBusiness=[False])
+    dhl.down = down
+    
+    assert table.best('business', 'NL', 'BE', False).parcelType.key == 'SMALL'
+    assert dhl.calls == 2
+
+def test_errors_without_stale_rows(fake_dhl):
+    dhl, table = table_for(fake_dhl)
+    dhl.down = 503
+    
+    assert table.resolve('business', 'NL', 'BE', False).error.status == 503
+    assert table.best('business', 'NL', 'BE', False).has_error
+    
+    dhl.down = 'unreachable'
+    
+    with pytest.raises(ConnectionError):
+        table.resolve('business', 'NL', 'BE', False)
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+
+from dhlparcel.coalescing import AsyncRequestCoalescer
+from dhlparcel.codecs import copy_response
+from dhlparcel.response_cache import ResponseCache
+
+from conftest import json_response
+
+SHOPS = [{ 'id' : 'shop-1', 'serviceTypes' : ['parcel-last-mile'], 'address' : { 'city' : 'Utrecht' } }]
+
+def slow_shops(request):
+    time.sleep(0.05)
+    return json_response(200, SHOPS)
+
+def test_coalesced_callers_do_not_see_each_others_changes(fake_dhl):
+    dhl = fake_dhl(slow_shops)
+    client = dhl.client()
+    barrier = threading.Barrier(2)
+    results = [None, None]
+    
+    def lookup(index):
+        barrier.wait()
+        results[index] = client.parcelshops.list('NL', postalCode='3542AD')
+    
+    threads = [threading.Thread(target=lookup, args=(index,)) for index in range(2)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    
+    assert len(dhl.requests) == 1
+    
+    first, second = results
+    first.items()[0].serviceTypes.append('changed')
+    first.items()[0].address.city = 'Amsterdam'
+    first.items().append('extra')
+    
+    assert second.items()[0].serviceTypes == ['parcel-last-mile']
+    assert second.items()[0].address.city == 'Utrecht'
+    assert len(second.items()) == 1
+
+def test_response_cache_hits_do_not_see_earlier_changes(fake_dhl):
+    dhl = fake_dhl(slow_shops)
+    client = dhl.client(response_cache=ResponseCache())
+    
+    status, headers, content = client.get('products', cache='products')
+    content[0]['serviceTypes'].append('changed')
+    
+    status, headers, cached = client.get('products', cache='products')
+    cached[0]['address']['city'] = 'Amsterdam'
+    
+    status, headers, again = client.get('products', cache='products')
+    
+    assert len(dhl.requests) == 1
+    assert again == SHOPS
+
+def test_async_coalesced_callers_get_their_own_copy():
+    coalescer = AsyncRequestCoalescer(copy_response)
+    
+    async def request():
+        await asyncio.sleep(0.01)
+        return 200, {}, [{ 'items' : [1, 2] }]
+    
+    async def main():
+        return await asyncio.gather(*(coalescer.run('key', request) for _ in range(3)))
+    
+    results = asyncio.run(main())
+    results[0][2][0]['items'].append(3)
+    
+    assert [result[2] for result in results[1:]] == [[{ 'items' : [1, 2] }]] * 2
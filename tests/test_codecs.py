@@ -0,0 +1,62 @@
+import sys
+
+import pytest
+
+from conftest import json_response
+from dhlparcel.codecs import JSONCodec, OrjsonCodec, get_codec, copy_json
+
+def test_codec_selection():
+    assert type(get_codec()) is JSONCodec
+    assert type(get_codec('json')) is JSONCodec
+    
+    codec = JSONCodec()
+    assert get_codec(codec) is codec
+    
+    with pytest.raises(ValueError):
+        get_codec('simplejson')
+
+def test_orjson_codec():
+    pytest.importorskip('orjson')
+    
+    assert type(get_codec('orjson')) is OrjsonCodec
+    assert type(get_codec('auto')) is OrjsonCodec
+    assert get_codec('orjson').loads(get_codec('orjson').dumps({ 'a' : [1, 2.5, None, 'é'] })) == { 'a' : [1, 2.5, None, 'é'] }
+
+def test_auto_falls_back_to_json_without_orjson(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'orjson', None) # makes "import orjson" raise an ImportError
+    
+    assert type(get_codec('auto')) is JSONCodec
+    
+    with pytest.raises(ImportError, match='pip install orjson'):
+        get_codec('orjson')
+
+def test_client_encodes_and_decodes_with_its_codec(fake_dhl):
+    class CountingCodec(JSONCodec):
+        def __init__(self):
+            self.dumped = self.loaded = 0
+        
+        def dumps(self, value):
+            self.dumped += 1
+            return super().dumps(value)
+        
+        def loads(self, data):
+            self.loaded += 1
+            return super().loads(data)
+    
+    codec = CountingCodec()
+    dhl = fake_dhl(lambda request: json_response(200, { 'shipmentId' : request.json()['shipmentId'] }))
+    client = dhl.client(json_codec=codec)
+    
+    shipment = client.shipments.create('id-1', [{ 'parcelType' : 'SMALL' }], { 'name' : {} }, { 'name' : {} }, [])
+    
+    assert shipment.shipmentId == 'id-1'
+    assert codec.dumped == 2 # auth and create
+    assert codec.loaded == 2
+
+def test_copy_json_shares_no_containers():
+    content = { 'shops' : [{ 'id' : 1, 'tags' : ['a'] }], 'count' : 1 }
+    copy = copy_json(content)
+    copy['shops'][0]['tags'].append('b')
+    
+    assert copy != content
+    assert content == { 'shops' : [{ 'id' : 1, 'tags' : ['a'] }], 'count' : 1 }
@@ -0,0 +1,100 @@
+import threading
+import time
+
+from conftest import json_response
+from dhlparcel.http_cache import HTTPCache
+from dhlparcel.transports import MemoryResponse
+
+PRODUCTS = [{ 'key' : 'PARCEL-CONNECT' }]
+
+class Server:
+    """ Serves the products with an ETag, and answers a matching If-None-Match with a 304. """
+    
+    def __init__(self, cache_control, etag='"v1"'):
+        self.cache_control = cache_control
+        self.etag = etag
+        self.conditional = []
+    
+    def __call__(self, request):
+        headers = { 'Cache-Control' : self.cache_control }
+        if self.etag: headers['ETag'] = self.etag
+        
+        self.conditional.append(request.headers.get('If-None-Match'))
+        if self.etag and request.headers.get('If-None-Match') == self.etag: return MemoryResponse(304, b'', headers)
+        
+        return json_response(200, PRODUCTS, headers)
+
+def build_cache(tmp_path, **kwargs):
+    return HTTPCache(str(tmp_path / 'http-cache.sqlite'), **kwargs)
+
+def test_fresh_responses_are_served_without_a_request(fake_dhl, tmp_path):
+    dhl = fake_dhl(Server('max-age=60'))
+    client = dhl.client(http_cache=build_cache(tmp_path))
+    
+    first, second = client.products.list(), client.products.list()
+    
+    assert first.items()[0].key == second.items()[0].key == 'PARCEL-CONNECT'
+    assert len(dhl.requests) == 1
+    assert client._http_cache.stats()['hits'] == 1
+
+def test_expired_responses_are_revalidated_and_a_304_is_served_from_the_cache(fake_dhl, tmp_path):
+    server = Server('max-age=0')
+    dhl = fake_dhl(server)
+    cache = build_cache(tmp_path, stale_while_revalidate=0)
+    
+    dhl.client(http_cache=cache).products.list()
+    products = dhl.client(http_cache=cache).products.list() # a new client: the response comes from disk
+    
+    assert products.items()[0].key == 'PARCEL-CONNECT'
+    assert server.conditional == [None, '"v1"']
+    assert cache.stats()['revalidated'] == 1 and cache.stats()['size'] == 1
+
+def test_stale_responses_are_served_while_they_are_revalidated(fake_dhl, tmp_path):
+    server = Server('max-age=0')
+    revalidating, release = threading.Event(), threading.Event()
+    
+    def handler(request):
+        if request.headers.get('If-None-Match'):
+            revalidating.set()
+            release.wait(5)
+        return server(request)
+    
+    dhl = fake_dhl(handler)
+    cache = build_cache(tmp_path, stale_while_revalidate=60)
+    client = dhl.client(http_cache=cache, coalesce_requests=False)
+    
+    client.products.list()
+    stale = client.products.list()
+    
+    assert stale.items()[0].key == 'PARCEL-CONNECT'
+    assert revalidating.wait(5) and not release.is_set() # served while the revalidation is still waiting for DHL
+    key, = cache._revalidating
+    assert not cache.revalidate_in_background(key, lambda: None) # one revalidation per key at a time
+    
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache._revalidating and time.monotonic() < deadline: time.sleep(0.01)
+    
+    assert server.conditional == [None, '"v1"']
+    assert cache.stats()['stale_hits'] == 1 and cache.stats()['revalidated'] == 1
+
+def test_no_store_responses_are_not_stored(fake_dhl, tmp_path):
+    dhl = fake_dhl(Server('no-store'))
+    client = dhl.client(http_cache=build_cache(tmp_path))
+    
+    client.products.list()
+    client.products.list()
+    
+    assert len(dhl.requests) == 2
+    assert client._http_cache.stats()['size'] == 0
+
+def test_accounts_sharing_a_cache_do_not_share_responses(fake_dhl, tmp_path):
+    dhl = fake_dhl(Server('max-age=60'))
+    cache = build_cache(tmp_path)
+    
+    dhl.client('user-a', accountNumber='111', http_cache=cache).products.list()
+    dhl.client('user-b', accountNumber='222', http_cache=cache).products.list()
+    dhl.client('user-c', accountNumber='111', http_cache=cache).products.list()
+    
+    assert len(dhl.requests) == 2
+    assert cache.stats()['size'] == 2
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+from conftest import json_response
+from dhlparcel import token_store
+
+def imported_modules(code):
+    """ Runs "code" in a fresh interpreter, so modules imported by other tests don't count. Returns the modules it imported. """
+    
+    script = f'import sys\n{code}\nprint(" ".join(sys.modules))'
+    return subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout.split()
+
+def test_building_a_client_imports_nothing_it_does_not_use():
+    modules = imported_modules("from dhlparcel.api import DHLParcel_API\nDHLParcel_API('user', 'key', '123456')")
+    
+    assert 'requests' not in modules
+    assert 'dhlparcel.auth_handler' not in modules
+    assert not any(module.startswith('dhlparcel.endpoints') for module in modules)
+
+def test_auth_handler_and_default_token_store_are_built_on_first_use(fake_dhl, monkeypatch):
+    built = []
+    
+    class RecordingStore(token_store.MemoryTokenStore):
+        def __init__(self):
+            super().__init__()
+            built.append(self)
+    
+    monkeypatch.setattr('dhlparcel.auth_handler.FileTokenStore', RecordingStore)
+    
+    dhl = fake_dhl(lambda request: json_response(200, []))
+    client = dhl.client(token_store=None)
+    
+    assert '_auth_handler' not in vars(client) and built == []
+    
+    client.labels.list(shipmentId='id')
+    client.labels.list(shipmentId='id')
+    
+    assert client._auth_handler._token_store is built[0] and len(built) == 1
+    assert dhl.auth_calls == 1
@@ -0,0 +1,88 @@
+import pytest
+
+from conftest import json_response
+from dhlparcel import config
+from dhlparcel.instrumentation import Instrumentation, get_endpoint
+from dhlparcel.throttling import RetryPolicy
+
+class Recorder(Instrumentation):
+    
+    def __init__(self):
+        self.calls = []
+    
+    def before_request(self, event):
+        self.calls.append(('before', event))
+    
+    def after_request(self, event):
+        self.calls.append(('after', event))
+    
+    def on_auth(self, event):
+        self.calls.append(('auth', event))
+    
+    def on_model_build(self, event):
+        self.calls.append(('build', event))
+    
+    def events(self, kind):
+        return [event for call, event in self.calls if call == kind]
+
+def test_get_endpoint():
+    assert get_endpoint('shipments/123') == 'shipments'
+    assert get_endpoint('products?page=2') == 'products'
+    assert get_endpoint(f'{config.BASE_URL}/labels?page=2', config.BASE_URL) == 'labels'
+    assert get_endpoint('https://other.example/parcel-shop-locations/NL', config.BASE_URL) == 'parcel-shop-locations'
+    assert get_endpoint(None) is None
+
+def test_request_events_carry_timings_and_sizes(fake_dhl):
+    recorder = Recorder()
+    dhl = fake_dhl(lambda request: json_response(200, { 'shipmentId' : 'id' }))
+    client = dhl.client(instrumentation=recorder)
+    
+    client.shipments.create('id', [{ 'parcelType' : 'SMALL' }], { 'name' : {} }, { 'name' : {} }, [])
+    
+    assert [call for call, event in recorder.calls] == ['auth', 'before', 'after', 'build']
+    
+    auth, = recorder.events('auth')
+    event, = recorder.events('after')
+    
+    assert auth.kind == 'api-key' and auth.status == 200 and auth.elapsed > 0
+    assert recorder.events('before') == [event]
+    assert (event.method, event.endpoint, event.status, event.attempt) == ('POST', 'shipments', 200, 0)
+    assert event.request_bytes == len(dhl.requests[0].content)
+    assert event.response_bytes == len(b'{"shipmentId": "id"}')
+    assert set(event.timings) == { 'auth', 'send', 'decode', 'total' }
+    assert event.timings['total'] >= event.timings['send']
+    assert recorder.events('build')[0].endpoint == 'shipments'
+
+def test_every_attempt_is_an_event(fake_dhl):
+    statuses = [503, 200]
+    recorder = Recorder()
+    dhl = fake_dhl(lambda request: json_response(statuses.pop(0), []))
+    
+    dhl.client(instrumentation=recorder, retry=RetryPolicy(backoff=0)).products.list()
+    
+    assert [(event.attempt, event.status) for event in recorder.events('after')] == [(0, 503), (1, 200)]
+    assert recorder.events('after')[1].timings['auth'] == 0
+
+def test_failed_requests_are_reported(fake_dhl):
+    def handler(request):
+        raise ConnectionError('connection reset')
+    
+    recorder = Recorder()
+    client = fake_dhl(handler).client(instrumentation=recorder, retry=False)
+    
+    with pytest.raises(ConnectionError):
+        client.products.list()
+    
+    event, = recorder.events('after')
+    assert event.status is None and isinstance(event.error, ConnectionError)
+
+def test_next_pages_are_labelled_with_their_endpoint(fake_dhl):
+    def handler(request):
+        if 'page=2' in request.url: return json_response(200, [{ 'labelId' : 'b' }])
+        return json_response(200, [{ 'labelId' : 'a' }], { 'Link' : '<https://pages.example/labels?shipmentId=s&page=2>; rel="next"' })
+    
+    recorder = Recorder()
+    client = fake_dhl(handler).client(instrumentation=recorder)
+    
+    assert [label.labelId for label in client.labels.iter_list(shipmentId='s')] == ['a', 'b']
+    assert [event.endpoint for event in recorder.events('after')] == ['labels', 'labels']
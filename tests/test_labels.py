@@ -0,0 +1,85 @@
+import io
+import os
+import zipfile
+
+from dhlparcel.transports import MemoryResponse
+
+def label(id):
+    return f'%PDF-{id}-'.encode() * 1000
+
+class BrokenResponse(MemoryResponse):
+    """ A response whose connection drops after the first chunk. """
+    
+    def iter_content(self, chunk_size=None):
+        yield self.content[:chunk_size]
+        raise ConnectionError('connection dropped')
+
+def handler(request):
+    id = request.path.rsplit('/', 1)[1]
+    
+    if id == 'missing': return MemoryResponse(404, b'{"message": "not found"}', { 'Content-Type' : 'application/json' })
+    if id == 'broken': return BrokenResponse(200, label(id), { 'Content-Type' : 'application/pdf' })
+    return MemoryResponse(200, label(id), { 'Content-Type' : 'application/pdf' })
+
+def test_download_writes_the_label_in_chunks(fake_dhl, tmp_path):
+    client = fake_dhl(handler).client()
+    path = tmp_path / 'label.pdf'
+    
+    result = client.labels.download('abc', str(path), chunk_size=1024)
+    file = io.BytesIO()
+    
+    assert not result.has_error
+    assert result.size == len(label('abc'))
+    assert path.read_bytes() == label('abc')
+    assert client.labels.download('abc', file).size == len(label('abc'))
+    assert file.getvalue() == label('abc')
+    assert b''.join(client.labels.iter_content('abc', chunk_size=1024)) == label('abc')
+
+def test_failed_download_leaves_no_file(fake_dhl, tmp_path):
+    client = fake_dhl(handler).client(retry=False)
+    
+    try:
+        client.labels.download('broken', str(tmp_path / 'broken.pdf'), chunk_size=1024)
+        assert False, 'the download should fail'
+    except ConnectionError:
+        pass
+    
+    missing = client.labels.download('missing', str(tmp_path / 'missing.pdf'))
+    
+    assert missing.has_error and missing.error.status == 404
+    assert os.listdir(tmp_path) == []
+
+def test_get_many_writes_a_zip_archive(fake_dhl, tmp_path):
+    client = fake_dhl(handler).client()
+    zip_path = tmp_path / 'labels.zip'
+    
+    results = client.labels.get_many(['a', 'missing', 'b', 'broken'], zip_path=str(zip_path), max_in_flight=2)
+    
+    assert [item.has_error for item in results] == [False, True, False, True]
+    assert results[0].result.destination == f'{zip_path}:a.pdf'
+    
+    with zipfile.ZipFile(zip_path) as archive:
+        assert sorted(archive.namelist()) == ['a.pdf', 'b.pdf']
+        assert archive.read('b.pdf') == label('b')
+
+def test_get_many_writes_to_a_directory(fake_dhl, tmp_path):
+    client = fake_dhl(handler).client()
+    
+    results = client.labels.get_many(['a', 'b'], directory=str(tmp_path / 'labels'))
+    
+    assert not any(item.has_error for item in results)
+    assert sorted(os.listdir(tmp_path / 'labels')) == ['a.pdf', 'b.pdf']
+
+def test_get_many_rejects_ids_that_are_not_file_names(fake_dhl, tmp_path):
+    dhl = fake_dhl(handler)
+    client = dhl.client()
+    directory = tmp_path / 'labels'
+    
+    results = client.labels.get_many(['../escaped', 'a/b', '..', 'ok'], directory=str(directory))
+    zipped = client.labels.get_many(['../escaped', 'ok'], zip_path=str(tmp_path / 'labels.zip'))
+    
+    assert [item.has_error for item in results] == [True, True, True, False]
+    assert [item.has_error for item in zipped] == [True, False]
+    assert sorted(os.listdir(tmp_path)) == ['labels', 'labels.zip']
+    assert os.listdir(directory) == ['ok.pdf']
+    assert [request.path for request in dhl.requests] == ['/labels/ok', '/labels/ok']
@@ -0,0 +1,54 @@
+import pickle
+
+from conftest import json_response
+from dhlparcel.models.base import BaseModel
+from dhlparcel.models.lazy import LazyModel, LazyObjectListModel
+
+SHOPS = [
+    { 'id' : 'shop-1', 'name' : 'Shop', 'address' : { 'city' : 'Utrecht', 'geo' : { 'latitude' : 52.1 } }, 'openingTimes' : [{ 'weekDay' : 1, 'timeFrom' : '09:00' }], 'serviceTypes' : ['parcel-reception'] },
+    { 'id' : 'shop-2', 'name' : 'Locker', 'address' : None, 'isLocker' : True }
+]
+
+def test_attribute_access_matches_base_model():
+    lazy = LazyModel().construct_from_response(SHOPS[0])
+    eager = BaseModel().construct_from_response(SHOPS[0])
+    
+    for field in ('id', 'name', 'serviceTypes', 'missing'):
+        assert getattr(lazy, field) == getattr(eager, field)
+    
+    assert lazy.address.city == eager.address.city == 'Utrecht'
+    assert lazy.address.geo.latitude == eager.address.geo.latitude
+    assert lazy.address.missing is None
+    assert lazy.openingTimes[0].weekDay == 1
+    assert not lazy.has_error and lazy.error is None
+    assert lazy.to_dict() == eager.to_dict() == SHOPS[0]
+
+def test_children_are_created_once_and_the_response_is_not_changed():
+    data = { 'address' : { 'city' : 'Utrecht' } }
+    lazy = LazyModel(data)
+    
+    assert lazy.address is lazy.address
+    
+    lazy.address.city = 'Breda'
+    lazy.note = 'set by the caller'
+    
+    assert data == { 'address' : { 'city' : 'Utrecht' } }
+    assert lazy.to_dict() == { 'address' : { 'city' : 'Breda' }, 'note' : 'set by the caller' }
+
+def test_errors_and_pickling():
+    lazy = LazyModel().set_error(returned_content='not found', status=404)
+    copy = pickle.loads(pickle.dumps(LazyModel(SHOPS[0])))
+    
+    assert lazy.has_error and lazy.error.status == 404
+    assert copy.to_dict() == SHOPS[0]
+    assert copy.address.city == 'Utrecht'
+
+def test_lazy_models_option_returns_the_same_data(fake_dhl):
+    dhl = fake_dhl(lambda request: json_response(200, SHOPS))
+    lazy = dhl.client(lazy_models=True).parcelshops.list('NL', postalCode='3542AD')
+    eager = dhl.client().parcelshops.list('NL', postalCode='3542AD')
+    
+    assert isinstance(lazy, LazyObjectListModel)
+    assert all(isinstance(shop, LazyModel) for shop in lazy.items())
+    assert [shop.to_dict() for shop in lazy.items()] == [shop.to_dict() for shop in eager.items()] == SHOPS
+    assert [shop.address.city if shop.address else None for shop in lazy.items()] == ['Utrecht', None]
@@ -0,0 +1,17 @@
+from dhlparcel.models.base import BaseModel, ObjectListModel
+
+SHOP = { 'id' : 'shop-1', 'name' : 'Shop', 'address' : { 'city' : 'Utrecht', 'zipCode' : '3542AD', 'geo' : { 'latitude' : 52.1 } }, 'openingTimes' : [{ 'weekDay' : 1 }] }
+
+def test_nested_fields_become_child_objects():
+    shop = BaseModel().construct_from_response(SHOP)
+    
+    assert shop.name == 'Shop'
+    assert shop.address.city == 'Utrecht'
+    assert shop.address.geo.latitude == 52.1
+    assert shop.address is not shop
+    assert shop.city is None
+    assert shop.missing is None
+
+def test_to_dict_returns_the_response_data():
+    assert BaseModel().construct_from_response(SHOP).to_dict() == SHOP
+    assert [shop.to_dict() for shop in ObjectListModel().construct_from_response([SHOP, SHOP]).items()] == [SHOP, SHOP]
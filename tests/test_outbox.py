@@ -0,0 +1,141 @@
+import threading
+import uuid
+
+from conftest import json_response, OPTIONS
+
+from dhlparcel.outbox import ShipmentOutbox, PENDING, SENDING, SENT, FAILED
+from dhlparcel.throttling import RetryPolicy
+from dhlparcel.validation import ShipmentValidator
+
+class ShipmentsDHL:
+    """ Answers the shipments endpoint and keeps the created shipments. "lookups" are the statuses to answer the next lookups with, before the real one. """
+    
+    def __init__(self, timeout_after_create=False):
+        self.created = {}
+        self.creates = 0
+        self.lookups = []
+        self.timeout_after_create = timeout_after_create
+        self._lock = threading.Lock()
+    
+    def __call__(self, request):
+        path = request.path.strip('/').split('/')
+        
+        if request.method == 'POST':
+            shipment = request.json()
+            
+            with self._lock:
+                self.creates += 1
+                self.created[shipment['shipmentId']] = { 'shipmentId' : shipment['shipmentId'], 'pieces' : [{ 'labelId' : f'{shipment["shipmentId"]}-label' }] }
+                timeout, self.timeout_after_create = self.timeout_after_create, False
+            
+            if timeout: raise TimeoutError('read timed out') # created, but the response never arrives
+            return json_response(200, self.created[shipment['shipmentId']])
+        
+        if self.lookups: return json_response(self.lookups.pop(0), { 'message' : 'unavailable' })
+        if path[1] in self.created: return json_response(200, self.created[path[1]])
+        return json_response(404, { 'message' : 'not found' })
+
+def shipment(shipmentId=None):
+    return {
+        'shipmentId' : shipmentId or str(uuid.uuid4()),
+        'receiver' : { 'name' : { 'lastName' : 'Jansen' }, 'address' : { 'countryCode' : 'NL', 'postalCode' : '3542AD', 'city' : 'Utrecht', 'street' : 'Reactorweg' } },
+        'shipper' : { 'name' : { 'companyName' : 'Shop' }, 'address' : { 'countryCode' : 'NL', 'postalCode' : '3542AD', 'city' : 'Utrecht', 'street' : 'Reactorweg' } },
+        'pieces' : [{ 'parcelType' : 'SMALL', 'quantity' : 1 }],
+        'options' : [{ 'key' : 'DOOR' }]
+    }
+
+def outbox(client, tmp_path, **kwargs):
+    kwargs.setdefault('retry', RetryPolicy(3, backoff=0, jitter=False, statuses=(429, 503), methods=('POST',)))
+    kwargs.setdefault('poll_interval', 0.05)
+    return ShipmentOutbox(client, str(tmp_path / 'outbox.sqlite3'), workers=1, **kwargs)
+
+def test_submitted_shipment_is_sent_once(fake_dhl, tmp_path):
+    dhl = ShipmentsDHL()
+    client = fake_dhl(dhl).client(retry=False)
+    
+    with outbox(client, tmp_path) as box:
+        handle = box.submit(shipment())
+        assert box.submit(shipment(handle.shipmentId)).shipmentId == handle.shipmentId
+        entry = handle.wait(timeout=5)
+    
+    assert entry.state == SENT
+    assert entry.label_ids == [f'{handle.shipmentId}-label']
+    assert dhl.creates == 1
+
+def test_shipment_created_before_a_timeout_is_not_created_again(fake_dhl, tmp_path):
+    dhl = ShipmentsDHL(timeout_after_create=True)
+    client = fake_dhl(dhl).client(retry=False)
+    
+    with outbox(client, tmp_path) as box:
+        entry = box.submit(shipment()).wait(timeout=5)
+    
+    assert entry.state == SENT
+    assert entry.attempts == 2
+    assert dhl.creates == 1
+
+def test_failed_lookup_is_retried_instead_of_creating_again(fake_dhl, tmp_path):
+    dhl = ShipmentsDHL(timeout_after_create=True)
+    dhl.lookups = [503, 429]
+    client = fake_dhl(dhl).client(retry=False)
+    
+    with outbox(client, tmp_path) as box:
+        entry = box.submit(shipment()).wait(timeout=5)
+    
+    assert entry.state == SENT
+    assert entry.attempts == 4
+    assert dhl.creates == 1
+
+def crash_after_sending(client, tmp_path):
+    """ Claims and sends a shipment like a worker does, then stops without recording the result, as if the process was killed. """
+    
+    box = outbox(client, tmp_path)
+    handle = box.submit(shipment())
+    shipmentId, payload, attempt = box._claim()
+    client.shipments.create(**payload)
+    
+    assert box.get(shipmentId).state == SENDING
+    return handle.shipmentId
+
+def test_shipment_of_a_crashed_worker_is_recovered_on_start(fake_dhl, tmp_path):
+    dhl = ShipmentsDHL()
+    client = fake_dhl(dhl).client(retry=False)
+    shipmentId = crash_after_sending(client, tmp_path)
+    
+    with outbox(client, tmp_path) as box:
+        entry = box.wait(shipmentId, timeout=5)
+    
+    assert entry.state == SENT
+    assert entry.label_ids == [f'{shipmentId}-label']
+    assert dhl.creates == 1
+
+def test_shipment_of_a_crashed_process_is_taken_over_after_the_lease(fake_dhl, tmp_path):
+    dhl = ShipmentsDHL()
+    client = fake_dhl(dhl).client(retry=False)
+    shipmentId = crash_after_sending(client, tmp_path)
+    
+    box = outbox(client, tmp_path, lease_timeout=0.2).start(recover=False)
+    
+    try:
+        assert box.wait(shipmentId, timeout=0.1).state == SENDING
+        entry = box.wait(shipmentId, timeout=5)
+    finally:
+        box.stop()
+    
+    assert entry.state == SENT
+    assert dhl.creates == 1
+
+def test_shipment_rejected_by_the_validator_fails_right_away(fake_dhl, tmp_path):
+    dhl = ShipmentsDHL()
+    client = fake_dhl(dhl).client(retry=False, shipment_validator=ShipmentValidator(OPTIONS))
+    invalid = shipment()
+    invalid['receiver']['address']['postalCode'] = 'nope'
+    
+    with outbox(client, tmp_path) as box:
+        entry = box.submit(invalid).wait(timeout=5)
+    
+    assert entry.state == FAILED
+    assert entry.attempts == 1
+    assert entry.has_error and entry.error.status is None
+    assert 'receiver.address.postalCode' in entry.error.returned_content
+    assert dhl.creates == 0
+    assert box.stats() == { PENDING : 0, SENDING : 0, SENT : 0, FAILED : 1 }
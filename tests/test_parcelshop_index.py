@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import random
+
+from conftest import json_response
+from dhlparcel.parcelshop_index import ParcelShopIndex, _haversine
+
+def make_shops(count=300, seed=1):
+    """ Shops spread over the Netherlands, grouped per 2-digit postal code area. """
+    
+    rng = random.Random(seed)
+    shops = []
+    
+    for number in range(count):
+        shops.append({
+            'id' : f'shop-{number}',
+            'name' : f'Shop {number}',
+            'postalArea' : str(10 + number % 10),
+            'shopType' : 'packStation' if number % 5 == 0 else 'parcelShop',
+            'serviceTypes' : ['parcel-reception'] if number % 2 else ['parcel-reception', 'parcel-last-mile'],
+            'openingTimes' : [{ 'weekDay' : 1, 'timeFrom' : '09:00', 'timeTo' : '17:00' }] if number % 3 else [],
+            'geoLocation' : { 'latitude' : rng.uniform(50.8, 53.4), 'longitude' : rng.uniform(3.4, 7.2) }
+        })
+    
+    return shops
+
+def index_for(fake_dhl, shops, **kwargs):
+    def handler(request):
+        return json_response(200, [shop for shop in shops if shop['postalArea'] == request.params['postalCode']])
+    
+    index = ParcelShopIndex(fake_dhl(handler).client(), **kwargs)
+    index.sync('NL', [{ 'postalCode' : str(area) } for area in range(10, 20)])
+    return index
+
+def brute_force(shops, latitude, longitude, match=lambda shop: True):
+    return sorted((_haversine(latitude, longitude, shop['geoLocation']['latitude'], shop['geoLocation']['longitude']), shop['id']) for shop in shops if match(shop))
+
+def test_nearest_matches_a_full_scan(fake_dhl):
+    shops = make_shops()
+    rng = random.Random(2)
+    
+    for cell_size in (0.05, 0.25, 5):
+        index = index_for(fake_dhl, shops, cell_size=cell_size)
+        assert len(index) == len(shops)
+        
+        for _ in range(20):
+            latitude, longitude = rng.uniform(50, 54), rng.uniform(3, 8)
+            nearest = index.nearest(latitude, longitude, n=7)
+            
+            assert [shop.id for shop in nearest.items()] == [id for distance, id in brute_force(shops, latitude, longitude)[:7]]
+            assert nearest.items()[0].distance == int(brute_force(shops, latitude, longitude)[0][0] * 1000)
+
+def test_within_returns_every_shop_in_the_radius(fake_dhl):
+    shops = make_shops()
+    index = index_for(fake_dhl, shops, cell_size=0.1)
+    
+    within = index.within(52.09, 5.12, radius=25)
+    expected = [id for distance, id in brute_force(shops, 52.09, 5.12) if distance <= 25]
+    
+    assert expected
+    assert [shop.id for shop in within.items()] == expected
+    assert [shop.id for shop in index.nearest(52.09, 5.12, n=1000, radius=25).items()] == expected
+
+def test_filters(fake_dhl):
+    shops = make_shops()
+    index = index_for(fake_dhl, shops, cell_size=0.1)
+    monday_noon = datetime(2026, 10, 19, 12, 0)
+    
+    lockers = index.nearest(52.09, 5.12, n=5, isLocker=True)
+    open_shops = index.nearest(52.09, 5.12, n=5, open_at=monday_noon, serviceType='parcel-last-mile')
+    
+    assert [shop.id for shop in lockers.items()] == [id for distance, id in brute_force(shops, 52.09, 5.12, lambda shop: shop['shopType'] == 'packStation')[:5]]
+    assert [shop.id for shop in open_shops.items()] == [id for distance, id in brute_force(shops, 52.09, 5.12, lambda shop: shop['openingTimes'] and 'parcel-last-mile' in shop['serviceTypes'])[:5]]
+    assert index.nearest(52.09, 5.12, countryCode='BE').items() == []
+
+def test_index_is_saved_and_loaded(fake_dhl, tmp_path):
+    path = str(tmp_path / 'shops.json.gz')
+    shops = make_shops(50)
+    index = index_for(fake_dhl, shops, path=path)
+    
+    loaded = ParcelShopIndex(None, path=path)
+    
+    assert len(loaded) == 50
+    assert list(loaded.countries()) == ['NL']
+    assert [shop.id for shop in loaded.nearest(52, 5, n=3).items()] == [shop.id for shop in index.nearest(52, 5, n=3).items()]
@@ -0,0 +1,73 @@
+import csv
+import io
+
+from conftest import json_response
+from dhlparcel.models.parcelshop_store import ParcelShopStore
+
+def shop(id, city='Utrecht', distance=100, **fields):
+    data = { 'id' : id, 'name' : f'Shop {id}', 'shopType' : 'parcelShop', 'distance' : distance, 'serviceTypes' : ['DROPOFF'],
+        'address' : { 'street' : 'Reactorweg', 'number' : '25', 'zipCode' : '3542AD', 'city' : city, 'countryCode' : 'NL' },
+        'geoLocation' : { 'latitude' : 52.1, 'longitude' : 5.0 } }
+    data.update(fields)
+    return data
+
+SHOPS = {
+    '3542AD' : [shop('A'), shop('B', distance=250)],
+    '3511AA' : [shop('B', distance=50), shop('C', shopType='packStation')],
+}
+
+def handler(request):
+    postal_code = request.params['postalCode']
+    if postal_code not in SHOPS: return json_response(500, { 'message' : 'broken' })
+    return json_response(200, SHOPS[postal_code])
+
+def test_list_many_keeps_every_shop_once(fake_dhl):
+    dhl = fake_dhl(handler)
+    queries = [{ 'postalCode' : '3542AD' }, { 'postalCode' : '3511AA' }, { 'postalCode' : '3542AD', 'countryCode' : 'NL' }]
+    
+    store = dhl.client(retry=False).parcelshops.list_many(queries, countryCode='NL', max_in_flight=2)
+    
+    assert len(dhl.requests) == 2 # the duplicate query is looked up once
+    assert len(store) == 3 and store.ids.count('B') == 1
+    assert [(shop['id'], shop['distance']) for shop in store.shops_for({ 'countryCode' : 'NL', 'postalCode' : '3511AA' })] == [('B', 50), ('C', 100)]
+    assert store.get('C')['isLocker'] and not store.get('A')['isLocker']
+    assert store.cities[0] is store.cities[1] # repeated values are interned
+    assert store.failed == []
+
+def test_failed_lookups_do_not_abort_the_batch(fake_dhl):
+    store = fake_dhl(handler).client(retry=False).parcelshops.list_many([{ 'postalCode' : '9999ZZ' }, { 'postalCode' : '3542AD' }], countryCode='NL')
+    
+    (query, error), = store.failed
+    assert query == { 'postalCode' : '9999ZZ', 'countryCode' : 'NL' } and error.status == 500
+    assert sorted(store.ids) == ['A', 'B']
+    assert store.lookups() == [{ 'postalCode' : '3542AD', 'countryCode' : 'NL' }]
+
+def test_any_number_of_service_types():
+    store = ParcelShopStore()
+    service_types = [f'SERVICE-{number}' for number in range(100)]
+    
+    store.add([shop('A', serviceTypes=service_types), shop('B', serviceTypes=['SERVICE-99', 'SERVICE-0'])])
+    
+    assert store.get('A')['serviceTypes'] == service_types
+    assert store.get('B')['serviceTypes'] == ['SERVICE-0', 'SERVICE-99']
+
+def test_to_csv_and_records():
+    store = ParcelShopStore()
+    store.add([shop('A', serviceTypes=['DROPOFF', 'PICKUP']), shop('B', geoLocation=None)])
+    destination = io.StringIO()
+    
+    assert store.to_csv(destination, ['id', 'city', 'latitude', 'serviceTypes']) == 2
+    assert list(csv.reader(io.StringIO(destination.getvalue()))) == [
+        ['id', 'city', 'latitude', 'serviceTypes'],
+        ['A', 'Utrecht', '52.1', 'DROPOFF|PICKUP'],
+        ['B', 'Utrecht', '', 'DROPOFF'],
+    ]
+    assert store.to_records(['id', 'postalCode', 'longitude']) == [{ 'id' : 'A', 'postalCode' : '3542AD', 'longitude' : 5.0 }, { 'id' : 'B', 'postalCode' : '3542AD', 'longitude' : None }]
+
+def test_to_csv_writes_to_a_path(tmp_path):
+    store = ParcelShopStore()
+    store.add([shop('A', name='Café Ünter')])
+    
+    store.to_csv(tmp_path / 'shops.csv', ['id', 'name'])
+    
+    assert (tmp_path / 'shops.csv').read_text(encoding='utf-8').splitlines() == ['id,name', 'A,Café Ünter']
@@ -0,0 +1,99 @@
+import pytest
+
+from conftest import json_response
+from dhlparcel import registry
+from dhlparcel.registry import ClientRegistry
+from dhlparcel.token_store import MemoryTokenStore
+
+class Clock:
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(registry.time, 'monotonic', clock)
+    return clock
+
+def build_registry(dhl, **kwargs):
+    kwargs.setdefault('token_store', MemoryTokenStore())
+    clients = ClientRegistry(transport=dhl.transport, **kwargs)
+    
+    for number in range(1, 4): clients.register(f'user-{number}', 'key', f'10000{number}')
+    return clients
+
+def test_clients_per_account_share_transport_and_token_store(fake_dhl):
+    dhl = fake_dhl(lambda request: json_response(200, []))
+    clients = build_registry(dhl)
+    
+    first, second = clients.get('100001'), clients.get('100002')
+    first.labels.list(shipmentId='id')
+    second.labels.list(shipmentId='id')
+    
+    assert first is clients.get('100001') and first is not second
+    assert first._transport is second._transport is dhl.transport
+    assert first._auth_handler._token_store is second._auth_handler._token_store is clients._token_store
+    assert [request.headers['Authorization'] for request in dhl.requests] == ['Bearer token-user-1', 'Bearer token-user-2']
+    assert len(clients) == 3 and '100003' in clients
+
+def test_unknown_and_unregistered_accounts(fake_dhl):
+    clients = build_registry(fake_dhl(lambda request: json_response(200, [])))
+    clients.get('100001')
+    clients.unregister('100001')
+    
+    with pytest.raises(ValueError, match='not registered'):
+        clients.get('100001')
+    
+    with pytest.raises(ValueError):
+        ClientRegistry(max_clients=0, transport=clients._transport)
+
+def test_least_recently_used_client_is_dropped(fake_dhl, clock):
+    clients = build_registry(fake_dhl(lambda request: json_response(200, [])), max_clients=2)
+    
+    first = clients.get('100001')
+    clients.get('100002')
+    clock.now += 1
+    assert clients.get('100001') is first # now the most recently used
+    clients.get('100003')
+    
+    assert list(clients._clients) == ['100001', '100003']
+    assert clients.get('100001') is first
+
+def test_idle_clients_are_dropped_and_rebuilt_without_authenticating(fake_dhl, clock):
+    dhl = fake_dhl(lambda request: json_response(200, []))
+    clients = build_registry(dhl, idle_timeout=60)
+    
+    first = clients.get('100001')
+    first.labels.list(shipmentId='id')
+    clients.get('100002')
+    clock.now += 30
+    clients.get('100002')
+    clock.now += 40
+    
+    assert clients.evict_idle() == 1
+    assert list(clients._clients) == ['100002']
+    
+    rebuilt = clients.get('100001')
+    rebuilt.labels.list(shipmentId='id')
+    
+    assert rebuilt is not first
+    assert dhl.auth_calls == 1
+
+def test_accounts_get_their_own_concurrency_limit(fake_dhl):
+    clients = build_registry(fake_dhl(lambda request: json_response(200, [])), max_concurrency=4)
+    clients.register('user-9', 'key', '100009', max_concurrency=1)
+    
+    assert clients.get('100001')._concurrency_limiter is not clients.get('100002')._concurrency_limiter
+    assert clients.get('100001')._concurrency_limiter.max_concurrency == 4
+    assert clients.get('100009')._concurrency_limiter.max_concurrency == 1
+
+def test_closing_a_client_leaves_the_shared_transport_open(fake_dhl):
+    dhl = fake_dhl(lambda request: json_response(200, []))
+    
+    with build_registry(dhl) as clients:
+        clients.get('100001').close()
+        assert not clients.get('100002').labels.list(shipmentId='id').has_error
@@ -0,0 +1,39 @@
+from dhlparcel.response_cache import ResponseCache
+from dhlparcel.registry import ClientRegistry
+from dhlparcel.token_store import MemoryTokenStore
+
+from conftest import json_response
+
+def products_per_token(request):
+    return json_response(200, [{ 'key' : request.headers['Authorization'] }])
+
+def test_clients_of_different_accounts_do_not_share_entries(fake_dhl):
+    dhl = fake_dhl(products_per_token)
+    cache = ResponseCache()
+    client_a = dhl.client('user-a', accountNumber='111', response_cache=cache)
+    client_b = dhl.client('user-b', accountNumber='222', response_cache=cache)
+    
+    assert client_a.products.list().items()[0].key == 'Bearer token-user-a'
+    assert client_b.products.list().items()[0].key == 'Bearer token-user-b'
+    assert client_a.products.list().items()[0].key == 'Bearer token-user-a'
+    assert len(dhl.requests) == 2
+    assert cache.stats()['hits'] == 1
+
+def test_registry_clients_do_not_share_entries(fake_dhl):
+    dhl = fake_dhl(products_per_token)
+    
+    with ClientRegistry(transport=dhl.transport, token_store=MemoryTokenStore(), response_cache=ResponseCache()) as registry:
+        registry.register('user-a', 'key', '111')
+        registry.register('user-b', 'key', '222')
+        
+        assert registry.get('111').products.list().items()[0].key == 'Bearer token-user-a'
+        assert registry.get('222').products.list().items()[0].key == 'Bearer token-user-b'
+
+def test_same_account_shares_entries(fake_dhl):
+    dhl = fake_dhl(products_per_token)
+    cache = ResponseCache()
+    
+    dhl.client(response_cache=cache).products.list()
+    dhl.client(response_cache=cache).products.list()
+    
+    assert len(dhl.requests) == 1
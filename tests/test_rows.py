@@ -0,0 +1,45 @@
+from dhlparcel.models.rows import RowListModel
+
+ROWS = [{ 'id' : 'a', 'distance' : 300, 'address' : { 'city' : 'Utrecht' } }, { 'id' : 'b', 'distance' : 100, 'address' : { 'city' : 'Utrecht' } }, { 'id' : 'c', 'distance' : None, 'address' : { 'city' : 'Breda' } }]
+
+def rows():
+    return RowListModel().construct_from_response([dict(row) for row in ROWS])
+
+def test_views_filter_sort_and_group():
+    shops = rows()
+    
+    assert shops.filter({ 'address.city' : 'Utrecht' }).values('id') == ['a', 'b']
+    assert shops.sort('distance').values('id') == ['b', 'a', 'c']
+    assert shops.sort('distance', reverse=True).values('id') == ['a', 'b', 'c']
+    assert { city : view.values('id') for city, view in shops.group_by('address.city').items() } == { 'Utrecht' : ['a', 'b'], 'Breda' : ['c'] }
+    assert shops.project('id', 'address.city').to_tuples() == [('a', 'Utrecht'), ('b', 'Utrecht'), ('c', 'Breda')]
+
+def test_changing_a_projection_leaves_its_parent_alone():
+    shops = rows()
+    projection = shops.project('id')
+    
+    projection.add({ 'id' : 'd' })
+    
+    assert len(shops) == 3
+    assert len(projection) == 4
+
+def test_changing_a_parent_leaves_its_views_alone():
+    shops = rows()
+    projection = shops.project('id')
+    view = shops.filter(lambda row: row['id'] != 'b')
+    
+    shops.add({ 'id' : 'd' })
+    shops.remove(shops.items()[0])
+    
+    assert projection.values('id') == ['a', 'b', 'c']
+    assert view.values('id') == ['a', 'c']
+    assert shops.values('id') == ['b', 'c', 'd']
+
+def test_changing_a_view_leaves_its_parent_alone():
+    shops = rows()
+    view = shops.sort('distance')
+    
+    view.remove(view.items()[0])
+    
+    assert view.values('id') == ['a', 'c']
+    assert shops.values('id') == ['a', 'b', 'c']
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from conftest import json_response
+from dhlparcel import config, streaming
+from dhlparcel.streaming import iter_json_items, next_link
+from dhlparcel.transports import MemoryResponse
+
+ITEMS = [{ 'name' : 'Café Überweg', 'weight' : 1.5, 'tags' : ['a', 'b'] }, 12.25, 'text, with ] and [', None, { 'nested' : [[1], { 'x' : -3e2 }] }]
+
+def chunked(content, size):
+    return [content[start:start + size] for start in range(0, len(content), size)]
+
+@pytest.fixture(autouse=True)
+def stdlib_parser(monkeypatch):
+    monkeypatch.setattr(streaming, 'ijson', None)
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 1000])
+def test_items_survive_any_chunk_split(size):
+    content = json.dumps(ITEMS, indent=1, ensure_ascii=False).encode()
+    
+    assert list(iter_json_items(chunked(content, size))) == ITEMS
+
+def test_items_are_yielded_before_the_response_ends():
+    def chunks():
+        yield b'[{"a": 1}, '
+        yield b'{"b": 2}'
+        raise AssertionError('read past the items that were asked for')
+    
+    items = iter_json_items(chunks())
+    
+    assert next(items) == { 'a' : 1 }
+
+def test_non_array_and_empty_responses():
+    assert list(iter_json_items(chunked(b' {"key": "value"}', 3))) == [{ 'key' : 'value' }]
+    assert list(iter_json_items([b'[', b' ', b']'])) == []
+    assert list(iter_json_items([b'', b'  '])) == []
+
+def test_truncated_responses_raise():
+    with pytest.raises(ValueError):
+        list(iter_json_items([b'[{"a": 1}, {"b"']))
+    
+    with pytest.raises(ValueError):
+        list(iter_json_items([b'[1, 2']))
+
+def test_next_link():
+    assert next_link({ 'Link' : '<https://api.example/labels?page=2>; rel="next", <https://api.example/labels?page=9>; rel="last"' }) == 'https://api.example/labels?page=2'
+    assert next_link({ 'Link' : '<https://api.example/labels?page=1>; rel=prev' }) is None
+    assert next_link({}) is None
+
+def test_iter_list_follows_the_pages(fake_dhl):
+    pages = {
+        None : ([{ 'labelId' : '1' }, { 'labelId' : '2' }], f'<{config.BASE_URL}/labels?page=2>; rel="next"'),
+        '2' : ([{ 'labelId' : '3' }], '</labels?page=3>; rel="next"'),
+        '3' : ([], None),
+    }
+    
+    def handler(request):
+        page = request.url.partition('page=')[2] or None
+        content, link = pages[page]
+        return json_response(200, content, { 'Link' : link } if link else None)
+    
+    dhl = fake_dhl(handler)
+    labels = dhl.client().labels.iter_list(orderReferenceFilter='order-1')
+    
+    assert [label.labelId for label in labels] == ['1', '2', '3']
+    assert dhl.requests[0].params == { 'orderReferenceFilter' : 'order-1' }
+    assert [request.params for request in dhl.requests[1:]] == [None, None]
+
+def test_iter_list_raises_on_errors(fake_dhl):
+    dhl = fake_dhl(lambda request: MemoryResponse(500, b'broken', {}))
+    
+    with pytest.raises(ValueError, match='status 500'):
+        list(dhl.client(retry=False).labels.iter_list(shipmentId='id'))
@@ -0,0 +1,170 @@
+import copy
+import threading
+import time
+
+import requests
+
+from conftest import json_response, auth_response, run_threads
+from dhlparcel.api import DHLParcel_API
+from dhlparcel.token_store import MemoryTokenStore
+from dhlparcel.transports import RequestsTransport, MemoryRequest
+
+THREADS = 16
+
+def handler(request):
+    """ Answers every endpoint with data derived from the request, so each caller can check it got its own response. """
+    
+    time.sleep(0.001)
+    path = request.path.strip('/').split('/')
+    
+    if path[0] == 'labels':
+        return json_response(200, { 'labelId' : path[1], 'token' : request.headers['Authorization'] })
+    if path[0] == 'shipments':
+        shipment = request.json()
+        return json_response(200, { 'shipmentId' : shipment['shipmentId'], 'pieces' : [{ 'labelId' : f'{shipment["shipmentId"]}-{index}' } for index, _ in enumerate(shipment['pieces'])] })
+    if path[0] == 'parcel-shop-locations':
+        return json_response(200, [{ 'id' : f'{request.params["postalCode"]}-{index}', 'address' : { 'zipCode' : request.params['postalCode'] } } for index in range(3)])
+    
+    return json_response(200, [{ 'key' : request.headers['Authorization'], 'params' : request.params }])
+
+def shipment(index):
+    return {
+        'shipmentId' : f'shipment-{index}',
+        'receiver' : { 'name' : { 'firstName' : 'Jane' }, 'address' : { 'countryCode' : 'NL' } },
+        'shipper' : { 'name' : { 'companyName' : 'Shop' }, 'address' : { 'countryCode' : 'NL' } },
+        'pieces' : [{ 'parcelType' : 'SMALL', 'quantity' : 1 }] * (index % 3 + 1),
+        'options' : [{ 'key' : 'DOOR' }],
+        'returnLabel' : True
+    }
+
+def test_threads_share_one_auth_call(fake_dhl):
+    dhl = fake_dhl(handler)
+    client = dhl.client(coalesce_requests=False)
+    
+    run_threads(lambda index: client.products.list())
+    
+    assert dhl.auth_calls == 1
+    assert len(dhl.requests) == THREADS
+
+def test_every_request_carries_the_token_of_its_client(fake_dhl):
+    dhl = fake_dhl(handler)
+    clients = [dhl.client(f'user-{index}', accountNumber=str(index)) for index in range(4)]
+    
+    results = run_threads(lambda index: clients[index % 4].labels.get(f'label-{index}', data_format='json'))
+    
+    for index, label in enumerate(results):
+        assert label.labelId == f'label-{index}'
+        assert label.token == f'Bearer token-user-{index % 4}'
+    
+    assert all(request.headers['Authorization'].startswith('Bearer token-user-') for request in dhl.requests)
+    assert dhl.auth_calls == 4
+
+def test_input_dicts_are_not_changed(fake_dhl):
+    dhl = fake_dhl(handler)
+    client = dhl.client(coalesce_requests=False)
+    shipments = [shipment(index) for index in range(THREADS)]
+    originals = copy.deepcopy(shipments)
+    query = { 'toBusiness' : True, 'senderType' : 'business' }
+    
+    run_threads(lambda index: client.shipments.create(**shipments[index]))
+    results = run_threads(lambda index: client.get('products', query))
+    
+    assert shipments == originals
+    assert query == { 'toBusiness' : True, 'senderType' : 'business' }
+    assert all(response[0].get('params') == { 'toBusiness' : 'true', 'senderType' : 'business' } for status, headers, response in results)
+
+def test_results_are_correct_under_concurrency(fake_dhl):
+    dhl = fake_dhl(handler)
+    client = dhl.client()
+    
+    def mixed(index):
+        kind = index % 3
+        
+        if kind == 0: return kind, client.labels.get(f'label-{index}', data_format='json')
+        if kind == 1: return kind, client.shipments.create(**shipment(index))
+        return kind, client.parcelshops.list('NL', postalCode=f'{1000 + index}AB')
+    
+    for index, (kind, result) in enumerate(run_threads(mixed, THREADS * 3)):
+        assert not result.has_error
+        
+        if kind == 0:
+            assert result.labelId == f'label-{index}'
+        elif kind == 1:
+            assert result.shipmentId == f'shipment-{index}'
+            assert [piece['labelId'] for piece in result.pieces] == [f'shipment-{index}-{number}' for number in range(index % 3 + 1)]
+        else:
+            assert [shop.id for shop in result.items()] == [f'{1000 + index}AB-{number}' for number in range(3)]
+    
+    assert dhl.auth_calls == 1
+
+def test_create_many_returns_every_shipment(fake_dhl):
+    dhl = fake_dhl(handler)
+    client = dhl.client()
+    
+    results = list(client.shipments.create_many([shipment(index) for index in range(40)], max_in_flight=8))
+    
+    assert [item.result.shipmentId for item in results] == [f'shipment-{index}' for index in range(40)]
+    assert dhl.auth_calls == 1
+
+def test_threads_share_one_token_refresh(fake_dhl):
+    store = MemoryTokenStore()
+    now = time.time()
+    store.set('user', { 'accessToken' : 'expired', 'accessTokenExpiration' : now - 1, 'refreshToken' : 'refresh-user', 'refreshTokenExpiration' : now + 9000 })
+    
+    dhl = fake_dhl(handler)
+    client = dhl.client(token_store=store, coalesce_requests=False)
+    
+    run_threads(lambda index: client.labels.get(f'label-{index}', data_format='json'))
+    
+    assert dhl.auth_calls == 1
+    assert [request.path for request in dhl.transport.requests if request.path.startswith('/authenticate')] == ['/authenticate/refresh-token']
+    assert all(request.headers['Authorization'] == 'Bearer token-refreshed' for request in dhl.requests)
+    assert store.get('user')['accessToken'] == 'token-refreshed'
+
+class RecordingAdapter:
+    """ Stands in for the HTTPAdapter of a requests.Session: answers every request itself and records the threads it was used from. """
+    
+    def __init__(self):
+        self.threads = set()
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.threads.add(threading.get_ident())
+            self.count += 1
+        
+        memory_request = MemoryRequest(request.method, request.url, None, request.body, dict(request.headers))
+        memory_response = auth_response(memory_request) if memory_request.path.startswith('/authenticate') else json_response(200, [])
+        
+        response = requests.Response()
+        response.status_code = memory_response.status_code
+        response.headers.update(memory_response.headers)
+        response._content = memory_response.content
+        response.url = request.url
+        response.request = request
+        
+        return response
+    
+    def close(self):
+        pass
+
+def test_threads_share_one_session_and_pool(monkeypatch):
+    adapter = RecordingAdapter()
+    sessions = []
+    
+    def create_session(self, *pool_settings):
+        session = requests.Session()
+        session.mount('https://', adapter)
+        sessions.append(session)
+        return session
+    
+    monkeypatch.setattr(RequestsTransport, '_create_session', create_session)
+    client = DHLParcel_API('user', 'key', '123456', token_store=MemoryTokenStore(), coalesce_requests=False)
+    
+    run_threads(lambda index: (client.products.list() if index % 2 else client.parcel_types.list('business', 'NL')))
+    
+    assert len(sessions) == 1
+    assert client._transport.session is sessions[0]
+    assert adapter.count == THREADS + 1 # one auth call
+    assert len(adapter.threads) > 1
@@ -0,0 +1,138 @@
+from email.utils import formatdate
+
+import time
+
+import pytest
+
+from dhlparcel.instrumentation import Instrumentation
+from dhlparcel.throttling import ConcurrencyLimiter, RateLimiter, RetryPolicy
+
+from conftest import json_response
+
+class FailingHook(Instrumentation):
+    
+    def before_request(self, event) -> None:
+        raise RuntimeError('hook failed')
+
+def assert_all_slots_free(limiter):
+    """ Takes every slot without blocking, so a leaked slot fails the test instead of hanging it. """
+    
+    assert all(limiter._semaphore.acquire(blocking=False) for _ in range(limiter.max_concurrency))
+
+def test_failures_before_the_request_do_not_leak_concurrency_slots(fake_dhl):
+    dhl = fake_dhl(lambda request: json_response(200, []))
+    limiter = ConcurrencyLimiter(2)
+    client = dhl.client(concurrency_limiter=limiter, instrumentation=FailingHook(), retry=False)
+    
+    for _ in range(limiter.max_concurrency):
+        with pytest.raises(RuntimeError):
+            client.products.list()
+    
+    assert_all_slots_free(limiter)
+
+def test_connection_errors_release_the_slot(fake_dhl):
+    def handler(request):
+        raise ConnectionError('connection reset')
+    
+    limiter = ConcurrencyLimiter(1)
+    client = fake_dhl(handler).client(concurrency_limiter=limiter, retry=False)
+    
+    for _ in range(limiter.max_concurrency):
+        with pytest.raises(ConnectionError):
+            client.products.list()
+    
+    assert_all_slots_free(limiter)
+
+class RecordingPolicy(RetryPolicy):
+    """ Records the delays it hands out, and doesn't make the test wait for them. """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delays = []
+    
+    def get_delay(self, attempt, retry_after=None):
+        self.delays.append(super().get_delay(attempt, retry_after))
+        return 0
+
+def failing(*responses):
+    """ Answers with the given (status, headers) responses first, then with a 200. """
+    
+    responses = list(responses)
+    
+    def handler(request):
+        if responses:
+            status, headers = responses.pop(0)
+            return json_response(status, { 'message' : 'try again' }, headers)
+        return json_response(200, { 'shipmentId' : 'id' } if request.method == 'POST' else [])
+    
+    return handler
+
+def create(client):
+    return client.shipments.create('id', [{ 'parcelType' : 'SMALL' }], { 'name' : {} }, { 'name' : {} }, [])
+
+def test_backoff_doubles_up_to_the_maximum():
+    policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=False)
+    
+    assert [policy.get_delay(attempt) for attempt in range(5)] == [0.5, 1, 2, 3, 3]
+    assert all(0 <= RetryPolicy(backoff=0.5).get_delay(2) <= 2 for _ in range(50))
+
+def test_retry_after_is_honored_up_to_the_maximum():
+    policy = RetryPolicy(backoff=0.5, max_backoff=30, jitter=False)
+    
+    assert policy.get_delay(0, '7') == 7
+    assert policy.get_delay(0, '120') == 30
+    assert 9 <= policy.get_delay(0, formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert policy.get_delay(0, formatdate(time.time() - 10, usegmt=True)) == 0
+    assert policy.get_delay(3, 'soon') == 4
+
+def test_should_retry():
+    policy = RetryPolicy(retries=2)
+    
+    assert policy.should_retry('GET', 0, 503) and policy.should_retry('GET', 1, None)
+    assert not policy.should_retry('GET', 2, 503)
+    assert not policy.should_retry('GET', 0, 400)
+    assert not policy.should_retry('POST', 0, 503)
+    assert RetryPolicy(methods=('GET', 'POST')).should_retry('POST', 0, 503)
+
+def test_get_is_retried_with_the_retry_after_of_the_response(fake_dhl):
+    dhl = fake_dhl(failing((503, { 'Retry-After' : '2' }), (502, None)))
+    policy = RecordingPolicy(backoff=0.25, jitter=False)
+    
+    products = dhl.client(retry=policy).products.list()
+    
+    assert not products.has_error
+    assert len(dhl.requests) == 3
+    assert policy.delays == [2, 0.5]
+
+def test_post_is_not_retried_unless_its_endpoint_opts_in(fake_dhl):
+    dhl = fake_dhl(failing((503, None)))
+    
+    assert create(dhl.client(retry=RecordingPolicy())).error.status == 503
+    assert len(dhl.requests) == 1
+    
+    dhl = fake_dhl(failing((503, None)))
+    shipment = create(dhl.client(retry_policies={ 'shipments' : RecordingPolicy(methods=('POST',)) }))
+    
+    assert shipment.shipmentId == 'id'
+    assert len(dhl.requests) == 2
+
+def test_429_pauses_the_rate_limiter(fake_dhl):
+    dhl = fake_dhl(failing((429, { 'Retry-After' : '0.1' })))
+    limiter = RateLimiter(rate=100)
+    client = dhl.client(retry=RetryPolicy(jitter=False), rate_limiter=limiter)
+    client._check_header_tokens()
+    start = time.monotonic()
+    
+    client.products.list()
+    
+    assert len(dhl.requests) == 2
+    assert limiter._blocked_until >= start + 0.1
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=50, burst=1)
+    start = time.monotonic()
+    
+    for _ in range(6):
+        limiter.acquire()
+    
+    assert time.monotonic() - start >= 0.09
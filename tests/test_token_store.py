@@ -0,0 +1,48 @@
+import importlib
+import os
+
+import dhlparcel
+
+def test_default_paths_are_in_the_user_cache_directory(monkeypatch, tmp_path):
+    from dhlparcel import config
+
+    monkeypatch.delenv('DHLPARCEL_CACHE_DIR', raising=False)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+
+    try:
+        importlib.reload(config)
+        package_dir = os.path.dirname(os.path.abspath(dhlparcel.__file__))
+
+        assert config.TOKEN_STORE_DIR == os.path.join(str(tmp_path), 'dhlparcel')
+        for path in (config.TOKEN_STORE_DIR, config.HTTP_CACHE_PATH, config.OUTBOX_PATH):
+            assert not path.startswith(package_dir)
+
+        monkeypatch.setenv('DHLPARCEL_CACHE_DIR', str(tmp_path / 'own'))
+        importlib.reload(config)
+        assert config.HTTP_CACHE_PATH == os.path.join(str(tmp_path / 'own'), 'http_cache.sqlite3')
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+def test_stores_create_their_directory(tmp_path):
+    from dhlparcel.token_store import FileTokenStore, SQLiteTokenStore
+
+    FileTokenStore(str(tmp_path / 'files')).set('user', { 'accessToken' : 'token' })
+    SQLiteTokenStore(str(tmp_path / 'sqlite' / 'tokens.sqlite3')).set('user', { 'accessToken' : 'token' })
+
+    assert FileTokenStore(str(tmp_path / 'files')).get('user') == { 'accessToken' : 'token' }
+    assert SQLiteTokenStore(str(tmp_path / 'sqlite' / 'tokens.sqlite3')).get('user') == { 'accessToken' : 'token' }
+
+def test_file_store_creates_its_directory_on_the_first_write(tmp_path):
+    from dhlparcel.token_store import FileTokenStore
+    
+    directory = tmp_path / 'tokens'
+    store = FileTokenStore(str(directory))
+    
+    assert store.get('user') is None
+    assert not directory.exists()
+    
+    with store.lock('user'):
+        store.set('user', { 'accessToken' : 'token' })
+    
+    assert store.get('user') == { 'accessToken' : 'token' }
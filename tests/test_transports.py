@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import auth_response
+from dhlparcel.api import DHLParcel_API
+from dhlparcel.token_store import MemoryTokenStore
+from dhlparcel.throttling import RetryPolicy
+from dhlparcel.transports import MemoryTransport, MemoryRequest, RequestsTransport, HTTP2Transport
+
+def test_memory_transport_routes():
+    transport = MemoryTransport()
+    transport.add_response('POST', '/authenticate/api-key', json_content={ 'accessToken' : 'token', 'accessTokenExpiration' : 9e9, 'refreshToken' : 'refresh', 'refreshTokenExpiration' : 9e9 })
+    transport.add_response('GET', 'products', json_content=[{ 'key' : 'PARCEL' }])
+    client = DHLParcel_API('user', 'key', '123456', transport=transport, token_store=MemoryTokenStore())
+    
+    assert [product.key for product in client.products.list().items()] == ['PARCEL']
+    assert client.parcel_types.list('business', 'NL').error.status == 404
+    assert [request.path for request in transport.requests] == ['/authenticate/api-key', '/products', '/parcel-types/business/NL']
+    assert transport.requests[1].headers['Authorization'] == 'Bearer token'
+
+def test_requests_transport_creates_its_session_on_first_use():
+    transport = RequestsTransport()
+    
+    assert transport._session is None
+    assert transport.session is transport.session
+    transport.close()
+
+def http2_client(handler, **kwargs):
+    httpx = pytest.importorskip('httpx')
+    
+    def respond(request):
+        if request.url.path.startswith('/authenticate'):
+            response = auth_response(MemoryRequest(request.method, str(request.url), None, request.content, dict(request.headers)))
+            return httpx.Response(response.status_code, content=response.content, headers=dict(response.headers))
+        return handler(httpx, request)
+    
+    transport = HTTP2Transport(client=httpx.Client(transport=httpx.MockTransport(respond)))
+    return DHLParcel_API('user', 'key', '123456', transport=transport, token_store=MemoryTokenStore(), **kwargs)
+
+def test_http2_transport_sends_requests_through_httpx():
+    client = http2_client(lambda httpx, request: httpx.Response(200, json=[{ 'key' : request.url.params['fromCountry'] }]))
+    
+    assert [option.key for option in client.shipments.get_options('business', 'NL').items()] == ['NL']
+
+def test_http2_transport_errors_are_connection_errors():
+    calls = []
+    
+    def handler(httpx, request):
+        calls.append(request)
+        raise httpx.ConnectError('unreachable')
+    
+    client = http2_client(handler, retry=RetryPolicy(2, backoff=0))
+    
+    with pytest.raises(ConnectionError):
+        client.products.list()
+    
+    assert len(calls) == 3
@@ -0,0 +1,54 @@
+import uuid
+
+import pytest
+
+from dhlparcel.validation import ShipmentValidator
+
+from conftest import OPTIONS, PARCEL_TYPES
+
+def shipment(**changes):
+    party = { 'name' : { 'lastName' : 'Jansen' }, 'address' : { 'countryCode' : 'NL', 'postalCode' : '3542AD', 'city' : 'Utrecht', 'street' : 'Reactorweg' } }
+    data = { 'shipmentId' : str(uuid.uuid4()), 'receiver' : party, 'shipper' : party, 'pieces' : [{ 'parcelType' : 'SMALL', 'quantity' : 1 }], 'options' : [{ 'key' : 'DOOR' }] }
+    data.update(changes)
+    return data
+
+def address(**changes):
+    data = { 'countryCode' : 'NL', 'postalCode' : '3542AD', 'city' : 'Utrecht', 'street' : 'Reactorweg' }
+    data.update(changes)
+    return data
+
+def test_valid_shipment_has_no_errors():
+    assert ShipmentValidator(OPTIONS, PARCEL_TYPES).validate(shipment()) == []
+
+@pytest.mark.parametrize('receiver, error', [
+    ('Jansen', 'receiver: must be an object'),
+    ({ 'name' : 'Jansen', 'address' : address() }, 'receiver.name: must be an object'),
+    ({ 'name' : { 'lastName' : 'Jansen' }, 'address' : 'Reactorweg 25, Utrecht' }, 'receiver.address: must be an object'),
+])
+def test_non_object_parties_are_reported(receiver, error):
+    assert ShipmentValidator().validate(shipment(receiver=receiver)) == [error]
+
+@pytest.mark.parametrize('changes, error', [
+    ({ 'pieces' : { 'parcelType' : 'SMALL' } }, 'pieces: must be a list'),
+    ({ 'pieces' : ['SMALL'] }, 'pieces[0]: must be an object'),
+    ({ 'pieces' : [{ 'parcelType' : 'SMALL', 'dimensions' : 10 }] }, 'pieces[0].dimensions: must be an object'),
+    ({ 'options' : 'DOOR' }, 'options: must be a list'),
+    ({ 'options' : ['DOOR'] }, 'options[0]: must be an object'),
+])
+def test_non_object_pieces_and_options_are_reported(changes, error):
+    assert ShipmentValidator(OPTIONS, PARCEL_TYPES).validate(shipment(**changes)) == [error]
+
+def test_postal_codes_are_checked_per_country():
+    validator = ShipmentValidator()
+    receiver = { 'name' : { 'companyName' : 'DHL' }, 'address' : address(countryCode='BE', postalCode='3542AD') }
+    
+    assert validator.validate(shipment(receiver=receiver)) == ["receiver.address.postalCode: '3542AD' is not a valid postal code for BE"]
+    assert validator.is_valid(shipment(receiver=dict(receiver, address=address(countryCode='BE', postalCode='1000'))))
+
+def test_options_and_parcel_types_are_checked():
+    validator = ShipmentValidator(OPTIONS, PARCEL_TYPES)
+    
+    assert validator.validate(shipment(options=[{ 'key' : 'UNKNOWN' }])) == ["options[0].key: 'UNKNOWN' is not an available option"]
+    assert validator.validate(shipment(options=[{ 'key' : 'REFERENCE', 'input' : 'x' * 16 }])) == ['options[0].input: is longer than 15 characters']
+    assert validator.validate(shipment(pieces=[{ 'parcelType' : 'LARGE' }])) == ["pieces[0].parcelType: 'LARGE' is not one of SMALL"]
+    assert validator.validate(shipment(pieces=[{ 'parcelType' : 'SMALL', 'weight' : 5 }])) == ['pieces[0].weight: 5 kg is above the 2 kg of SMALL']